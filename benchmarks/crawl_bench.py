@@ -0,0 +1,86 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.mock_server import MockSite, serve
+
+# —————————————————————————
+# End-to-end crawl benchmark against the local mock site.
+#
+#   python -m benchmarks.crawl_bench --workers 4 8 16 32 --latency lognormal:-2.5,0.6
+#
+# Runs the real scraper (its main()) once per setting, each time into a
+# fresh output directory, and reports requests/s and listings/s as seen
+# by the mock server.
+# —————————————————————————
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRAPER_PATH = os.path.join(ROOT, "scraper-parallel-incrementCSV.py")
+
+
+def load_scraper():
+    spec = importlib.util.spec_from_file_location("guland_scraper", SCRAPER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def crawl_once(site, base_url, workers, provinces, types, extra_args=(), quiet=True):
+    scraper = load_scraper()  # fresh module state (session, globals) per run
+    before = dict(site.stats, status=dict(site.stats["status"]))
+    with tempfile.TemporaryDirectory() as out:
+        argv = ["--base-url", base_url, "--workers", str(workers), "--page-sleep", "0",
+                "--output-dir", out, "--provinces", *provinces, "--types", *types, *extra_args]
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            scraper.main(argv)
+        elapsed = time.perf_counter() - t0
+    return {
+        "workers": workers,
+        "seconds": round(elapsed, 2),
+        "listing_pages": site.stats["listing"] - before["listing"],
+        "detail_pages": site.stats["detail"] - before["detail"],
+        "requests_per_s": round((site.stats["requests"] - before["requests"]) / elapsed, 1),
+        "details_per_s": round((site.stats["detail"] - before["detail"]) / elapsed, 1),
+        "wire_mb": round((site.stats["wire_bytes"] - before["wire_bytes"]) / 1e6, 2),
+        "decoded_mb": round((site.stats["bytes"] - before["bytes"]) / 1e6, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scraper end-to-end against benchmarks/mock_server.py")
+    parser.add_argument("--workers", nargs="+", type=int, default=[4, 8, 16])
+    parser.add_argument("--provinces", nargs="+", default=["ha-noi", "can-tho"])
+    parser.add_argument("--types", nargs="+", default=["nha-mat-pho-mat-tien", "dat-tho-cu"])
+    parser.add_argument("--pages", nargs=2, type=int, default=[2, 4], metavar=("MIN", "MAX"))
+    parser.add_argument("--latency", default="lognormal:-3,0.5")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-403", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--padding-kb", type=int, default=40)
+    parser.add_argument("--no-gzip", dest="gzip", action="store_false", help="serve uncompressed pages")
+    parser.add_argument("--verbose", action="store_true", help="show the scraper's own output")
+    parser.add_argument("scraper_args", nargs="*", help="extra scraper flags (after --)")
+    args = parser.parse_args(argv)
+
+    site = MockSite(pages=tuple(args.pages), listing_latency=args.latency, detail_latency=args.latency,
+                    rate_429=args.rate_429, rate_403=args.rate_403, slow_rate=args.slow_rate,
+                    padding_kb=args.padding_kb, gzip=args.gzip)
+    server = serve(site)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        for workers in args.workers:
+            r = crawl_once(site, base_url, workers, args.provinces, args.types,
+                           args.scraper_args, quiet=not args.verbose)
+            print(f"  workers={r['workers']:<4} {r['seconds']:>7}s  {r['requests_per_s']:>8} req/s  "
+                  f"{r['details_per_s']:>8} details/s  ({r['listing_pages']} listing, {r['detail_pages']} detail, "
+                  f"{r['wire_mb']} MB on the wire / {r['decoded_mb']} MB decoded)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
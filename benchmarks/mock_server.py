@@ -0,0 +1,202 @@
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks import synthetic
+
+# —————————————————————————
+# Local stand-in for guland.vn.
+#
+#   python -m benchmarks.mock_server --port 8765 --pages 2 6 --latency lognormal:-2.5,0.6 --rate-429 0.02
+#   python scraper-parallel-incrementCSV.py --base-url http://127.0.0.1:8765 --output-dir /tmp/mock-crawl --page-sleep 0
+#
+# Serves /mua-ban-{prop_type}-{province}?page=N listing pages and the
+# /post/... detail pages they link to, with the markup the scraper parses.
+# Page contents are a pure function of (seed, URL), so repeated crawls see
+# the same listings. Requests with an absolute URI in the request line are
+# answered too, which lets several instances stand in for HTTP proxies.
+# GET /__stats returns what has been served so far. Pages are gzipped for
+# clients that accept it (as the real site does) unless --no-gzip.
+# —————————————————————————
+CARDS_PER_PAGE = 45
+
+
+def parse_latency(spec):
+    """'fixed:S' | 'uniform:LO,HI' | 'lognormal:MU,SIGMA' (seconds) -> sampler(rng)."""
+    kind, _, params = spec.partition(":")
+    vals = [float(v) for v in params.split(",")] if params else []
+    if kind == "fixed":
+        return lambda rng: vals[0] if vals else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(vals[0], vals[1])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(vals[0], vals[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def _split_combo(slug):
+    """'nha-mat-pho-mat-tien-ha-noi' -> ('nha-mat-pho-mat-tien', 'ha-noi')."""
+    for prop_type in sorted(synthetic.PROPERTY_TYPES, key=len, reverse=True):
+        if slug.startswith(prop_type + "-"):
+            return prop_type, slug[len(prop_type) + 1:]
+    return None, None
+
+
+class MockSite:
+    """Deterministic site content + fault injection, shared by all handler threads."""
+
+    def __init__(self, pages=(2, 6), seed=0, listing_latency="fixed:0", detail_latency="fixed:0",
+                 rate_429=0.0, rate_403=0.0, slow_rate=0.0, slow_seconds=5.0, padding_kb=40, gzip=True):
+        self.pages = pages
+        self.seed = seed
+        self.listing_latency = parse_latency(listing_latency)
+        self.detail_latency = parse_latency(detail_latency)
+        self.rate_429, self.rate_403 = rate_429, rate_403
+        self.slow_rate, self.slow_seconds = slow_rate, slow_seconds
+        self.padding_kb = padding_kb
+        self.gzip = gzip
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "listing": 0, "detail": 0, "bytes": 0, "wire_bytes": 0, "status": {}}
+
+    # ---- content ----
+    def n_pages(self, prop_type, province):
+        key = zlib.crc32(f"{self.seed}|{prop_type}|{province}".encode())
+        return random.Random(key).randint(*self.pages)
+
+    def page_items(self, prop_type, province, page):
+        n_pages = self.n_pages(prop_type, province)
+        if page < 1 or page > n_pages:
+            return []
+        # the last page is short, which is how the scraper detects the end
+        n = CARDS_PER_PAGE if page < n_pages else CARDS_PER_PAGE // 3
+        base = (zlib.crc32(f"{prop_type}|{province}".encode()) % 10_000) * 100_000 + (page - 1) * CARDS_PER_PAGE
+        return [self.item(base + i, prop_type, province) for i in range(n)]
+
+    def item(self, listing_id, prop_type, province):
+        return synthetic.listing(random.Random(f"{self.seed}|{listing_id}"), listing_id, province, prop_type)
+
+    def render(self, path, query):
+        """(kind, status, body) for a request path."""
+        if path.startswith("/mua-ban-"):
+            prop_type, province = _split_combo(path[len("/mua-ban-"):])
+            if not prop_type:
+                return "listing", 404, "not found"
+            page = int(query.get("page", ["1"])[0])
+            items = self.page_items(prop_type, province, page)
+            return "listing", 200, synthetic.listing_page_html(items, padding_kb=self.padding_kb // 2)
+        if path.startswith("/post/ban-"):
+            prop_type, rest = _split_combo(path[len("/post/ban-"):])
+            province, _, listing_id = (rest or "").rpartition("-")
+            if not prop_type or not listing_id.isdigit():
+                return "detail", 404, "not found"
+            item = self.item(int(listing_id), prop_type, province)
+            return "detail", 200, synthetic.detail_page_html(item, padding_kb=self.padding_kb)
+        return "other", 404, "not found"
+
+    # ---- faults ----
+    def delay_and_fault(self, kind):
+        with self._lock:
+            r = self._rng.random()
+            latency = (self.detail_latency if kind == "detail" else self.listing_latency)(self._rng)
+            slow = self._rng.random() < self.slow_rate
+        if slow:
+            latency += self.slow_seconds
+        time.sleep(max(0.0, latency))
+        if r < self.rate_429:
+            return 429
+        if r < self.rate_429 + self.rate_403:
+            return 403
+        return None
+
+    def record(self, kind, status, n_bytes, wire_bytes):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats[kind] = self.stats.get(kind, 0) + 1
+            self.stats["bytes"] += n_bytes
+            self.stats["wire_bytes"] += wire_bytes
+            self.stats["status"][str(status)] = self.stats["status"].get(str(status), 0) + 1
+
+
+class Handler(BaseHTTPRequestHandler):
+    site: MockSite = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/__stats":
+            return self._send(200, json.dumps(self.site.stats), "application/json")
+
+        kind, status, body = self.site.render(url.path, parse_qs(url.query))
+        fault = self.site.delay_and_fault(kind)
+        if fault:
+            status, body = fault, "Too Many Requests" if fault == 429 else "Forbidden"
+        n_bytes = len(body.encode("utf-8"))
+        self.site.record(kind, status, n_bytes, self._send(status, body))
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        """Writes the response; returns the body bytes sent."""
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if self.site.gzip and "gzip" in self.headers.get("Accept-Encoding", "") and len(data) > 1024:
+            data = gzip.compress(data, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(data)
+        return len(data)
+
+    def log_message(self, *args):
+        pass  # one line per request would dominate the benchmark
+
+
+def serve(site, host="127.0.0.1", port=0):
+    """Start a server in a background thread; returns it (`server.server_address` has the port)."""
+    handler = type("BoundHandler", (Handler,), {"site": site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve mock guland.vn pages for offline crawl tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", nargs=2, type=int, default=[2, 6], metavar=("MIN", "MAX"),
+                        help="listing pages per province × type (drawn per combo)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", default="fixed:0", help="detail-page latency: fixed:S | uniform:LO,HI | lognormal:MU,SIGMA")
+    parser.add_argument("--listing-latency", default=None, help="listing-page latency (defaults to --latency)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--rate-403", type=float, default=0.0, help="fraction of requests answered 403")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests delayed by --slow-seconds")
+    parser.add_argument("--slow-seconds", type=float, default=5.0)
+    parser.add_argument("--padding-kb", type=int, default=40, help="extra page chrome per detail page")
+    parser.add_argument("--no-gzip", dest="gzip", action="store_false", help="never compress responses")
+    args = parser.parse_args(argv)
+
+    site = MockSite(pages=tuple(args.pages), seed=args.seed,
+                    listing_latency=args.listing_latency or args.latency, detail_latency=args.latency,
+                    rate_429=args.rate_429, rate_403=args.rate_403,
+                    slow_rate=args.slow_rate, slow_seconds=args.slow_seconds, padding_kb=args.padding_kb, gzip=args.gzip)
+    server = serve(site, args.host, args.port)
+    print(f"🧪 Mock guland.vn on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
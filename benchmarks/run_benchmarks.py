@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks import synthetic
+from crawler.parsers import detail_urls, parse_detail_html, parse_listing_html
+from scripts import imputeData, preprocessData
+from scripts.schema import read_csv_typed
+from scripts.streamStats import collect
+
+# —————————————————————————
+# Offline benchmarks for the scraper parsers and the pipeline hot paths.
+#
+#   python -m benchmarks.run_benchmarks                    # compare against baselines.json
+#   python -m benchmarks.run_benchmarks --save-baseline    # record new baselines
+#   python -m benchmarks.run_benchmarks --scales 1000 20000 --stages impute_extract
+#
+# A scale is the number of rows for row stages; page stages use scale / 100
+# pages (a listing page holds ~45 cards, a detail page is ~50 KB of HTML).
+# —————————————————————————
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_SCALES = [1000, 10000]
+PAGES_PER_SCALE = 100
+CARDS_PER_PAGE = 45
+
+
+def _items(n, seed=0):
+    rng = random.Random(seed)
+    return [synthetic.listing(rng, 1_000_000 + i) for i in range(n)]
+
+# —————————————————————————
+# STAGES: each returns (body, unit); body() returns the number of items processed
+# —————————————————————————
+def stage_parse_listing(scale):
+    n_pages = max(1, scale // PAGES_PER_SCALE)
+    items = _items(CARDS_PER_PAGE)
+    pages = [synthetic.listing_page_html(items)] * n_pages
+
+    def body():
+        for html in pages:
+            detail_urls(parse_listing_html(html), "https://guland.vn")
+        return n_pages
+    return body, "pages"
+
+
+def stage_parse_detail(scale):
+    n_pages = max(1, scale // PAGES_PER_SCALE)
+    pages = [(synthetic.detail_page_html(item), item) for item in _items(n_pages)]
+
+    def body():
+        for html, item in pages:
+            parse_detail_html(html, synthetic.detail_path(item), item["province"], item["prop_type"])
+        return n_pages
+    return body, "pages"
+
+
+def stage_impute_extract(scale):
+    desc = pd.Series([item["description"] for item in _items(scale)])
+
+    def body():
+        imputeData.extract_all(desc)
+        return len(desc)
+    return body, "rows"
+
+
+def stage_preprocess_helpers(scale):
+    items = _items(scale)
+    price = pd.Series([i["price"] for i in items])
+    area = pd.Series([i["area"] for i in items])
+    updated = pd.Series([i["updated"] for i in items])
+
+    def body():
+        price.apply(preprocessData.parse_price_to_million)
+        area.apply(preprocessData.parse_area)
+        updated.apply(preprocessData.parse_relative_to_timedelta)
+        return len(items)
+    return body, "rows"
+
+
+def stage_load_raw_csv(scale, tmpdir):
+    path = synthetic.write_scraped_csv(os.path.join(tmpdir, f"raw_{scale}.csv"), scale)
+
+    def body():
+        return len(read_csv_typed(path, "raw"))
+    return body, "rows"
+
+
+def stage_stream_stats(scale, tmpdir):
+    path = os.path.join(tmpdir, f"raw_{scale}.csv")
+    if not os.path.exists(path):
+        synthetic.write_scraped_csv(path, scale)
+
+    def body():
+        chunks = read_csv_typed(path, "raw", chunksize=max(1000, scale // 4))
+        total, _ = collect(chunks, by="Province", cat_cols=["Province", "Property Type"])
+        return total.rows
+    return body, "rows"
+
+
+STAGES = {
+    "parse_listing": stage_parse_listing,
+    "parse_detail": stage_parse_detail,
+    "impute_extract": stage_impute_extract,
+    "preprocess_helpers": stage_preprocess_helpers,
+    "load_raw_csv": stage_load_raw_csv,
+    "stream_stats": stage_stream_stats,
+}
+FILE_STAGES = {"load_raw_csv", "stream_stats"}
+
+# —————————————————————————
+# RUNNER
+# —————————————————————————
+def measure(name, scale, repeat, tmpdir):
+    factory = STAGES[name]
+    body, unit = factory(scale, tmpdir) if name in FILE_STAGES else factory(scale)
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n = body()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return {"items": n, "unit": unit, "seconds": round(best, 4), "rate": round(n / best, 1)}
+
+
+def compare(results, baselines, tolerance):
+    """Rows of (stage, scale, rate, baseline, change) and whether any regressed."""
+    rows, regressed = [], False
+    for name, per_scale in results.items():
+        for scale, r in per_scale.items():
+            base = baselines.get(name, {}).get(scale)
+            change = None
+            if base:
+                change = r["rate"] / base["rate"] - 1
+                regressed |= change < -tolerance
+            rows.append((name, scale, r["rate"], r["unit"], base and base["rate"], change))
+    return rows, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for guland parsing and pipeline stages.")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--scales", nargs="+", type=int, default=DEFAULT_SCALES)
+    parser.add_argument("--repeat", type=int, default=3, help="best-of-N timing")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="fractional slowdown vs baseline that counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE_PATH}")
+    parser.add_argument("--check", action="store_true", help="exit non-zero on regression")
+    parser.add_argument("--json", help="also write the raw results to this file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in args.stages:
+            results[name] = {}
+            for scale in args.scales:
+                r = measure(name, scale, args.repeat, tmpdir)
+                results[name][str(scale)] = r
+                print(f"  {name:<20} scale={scale:<7} {r['rate']:>12,.1f} {r['unit']}/s  ({r['seconds']}s)")
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baselines = json.load(f).get("results", {})
+
+    rows, regressed = compare(results, baselines, args.tolerance)
+    if baselines:
+        print("\n📊 Against baseline:")
+        for name, scale, rate, unit, base, change in rows:
+            if change is None:
+                print(f"  {name:<20} scale={scale:<7} (no baseline)")
+                continue
+            flag = "❌" if change < -args.tolerance else "✅"
+            print(f"  {flag} {name:<20} scale={scale:<7} {rate:>12,.1f} vs {base:>12,.1f} {unit}/s ({change:+.1%})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        merged = {**baselines}
+        for name, per_scale in results.items():
+            merged.setdefault(name, {}).update(per_scale)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "results": merged}, f, indent=2)
+        print(f"\n📝 Baseline saved to {BASELINE_PATH}")
+
+    if args.check and regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import csv
+import random
+from datetime import datetime, timedelta
+
+# —————————————————————————
+# Synthetic guland.vn pages and scraped CSVs.
+#
+# The markup uses the same selectors as crawler/parsers.py, so anything
+# that parses the live site parses these too. Everything is seeded and
+# generated in memory: no network access is needed.
+# —————————————————————————
+
+PROVINCES = {
+    "ha-noi": ("Hà Nội", ["Ba Đình", "Cầu Giấy", "Đống Đa", "Hoàng Mai", "Long Biên"], (21.03, 105.85)),
+    "tp-ho-chi-minh": ("TP. Hồ Chí Minh", ["Quận 1", "Quận 3", "Bình Thạnh", "Gò Vấp", "Thủ Đức"], (10.78, 106.70)),
+    "da-nang": ("Đà Nẵng", ["Hải Châu", "Sơn Trà", "Ngũ Hành Sơn", "Liên Chiểu"], (16.05, 108.20)),
+    "can-tho": ("Cần Thơ", ["Ninh Kiều", "Cái Răng", "Bình Thủy"], (10.03, 105.77)),
+    "soc-trang": ("Sóc Trăng", ["TP. Sóc Trăng", "Vĩnh Châu", "Mỹ Xuyên"], (9.60, 105.97)),
+}
+PROPERTY_TYPES = {
+    "nha-mat-pho-mat-tien": "Nhà mặt phố",
+    "dat-tho-cu": "Đất thổ cư",
+    "can-ho-chung-cu": "Căn hộ chung cư",
+    "kho-nha-xuong": "Kho, nhà xưởng",
+    "van-phong": "Văn phòng",
+    "phong-tro": "Phòng trọ",
+    "khach-san": "Khách sạn",
+}
+DIRECTIONS = ["Đông", "Tây", "Nam", "Bắc", "Đông Bắc", "Đông Nam", "Tây Bắc", "Tây Nam"]
+ROAD_TYPES = ["bê tông", "nhựa", "đất", "đá"]
+STREETS = ["Lê Lợi", "Nguyễn Trãi", "Trần Hưng Đạo", "Hai Bà Trưng", "Lý Thường Kiệt", "Phan Đình Phùng"]
+UPDATED = ["{} phút trước", "{} giờ trước", "{} ngày trước", "{} tuần trước", "{} tháng trước"]
+
+
+def _num(rng, lo, hi, step=0.5):
+    v = round(rng.uniform(lo, hi) / step) * step
+    return f"{v:g}".replace(".", ",") if rng.random() < 0.3 else f"{v:g}"
+
+
+def description(rng):
+    """A Vietnamese listing description built from the phrases imputeData looks for."""
+    parts = [rng.choice(["Chính chủ cần bán gấp", "Bán nhà", "Cần bán", "Bán lô đất", "Sang nhượng"])]
+    if rng.random() < 0.7:
+        parts.append(rng.choice([
+            f"DT {_num(rng, 3, 12)}x{_num(rng, 10, 30)}m",
+            f"ngang {_num(rng, 3, 12)}m dài {_num(rng, 10, 30)}m",
+            f"diện tích {_num(rng, 3, 12)} * {_num(rng, 10, 30)}",
+        ]))
+    if rng.random() < 0.6:
+        parts.append(f"{rng.randint(1, 6)} PN {rng.randint(1, 5)} WC")
+    if rng.random() < 0.5:
+        floors = "1 trệt" + (f" {rng.randint(1, 4)} lầu" if rng.random() < 0.8 else "")
+        parts.append(floors + (" sân thượng tum" if rng.random() < 0.3 else ""))
+    if rng.random() < 0.5:
+        parts.append(f"hướng {rng.choice(DIRECTIONS).lower()}")
+    if rng.random() < 0.6:
+        where = rng.choice(["hẻm", "đường", "lộ"])
+        parts.append(f"{where} {_num(rng, 2, 12)}m {rng.choice(ROAD_TYPES)} xe hơi vào tận nhà")
+    if rng.random() < 0.4:
+        parts.append(rng.choice(["sổ hồng riêng", "sổ đỏ chính chủ", "sổ hồng hoàn công đủ"]))
+    if rng.random() < 0.3:
+        parts.append(rng.choice(["full nội thất", "nội thất cao cấp", "nhà trống"]))
+    if rng.random() < 0.3:
+        parts.append(f"mặt tiền {rng.choice(STREETS)}")
+    parts.append(rng.choice([
+        "gần chợ, trường học, bệnh viện", "khu dân cư an ninh, dân trí cao",
+        "thích hợp ở hoặc kinh doanh", "giá thương lượng", "liên hệ chính chủ",
+    ]))
+    return ". ".join(parts) + "."
+
+
+def listing(rng, listing_id, province=None, prop_type=None):
+    """Field values for one listing, shared by the page and CSV generators."""
+    province = province or rng.choice(list(PROVINCES))
+    prop_type = prop_type or rng.choice(list(PROPERTY_TYPES))
+    prov_name, districts, (lat, lon) = PROVINCES.get(province, (province, ["Trung tâm"], (16.0, 106.0)))
+    district = rng.choice(districts)
+    if rng.random() < 0.7:
+        price = f"{_num(rng, 1, 40, 0.1)} tỷ"
+    else:
+        price = rng.choice([f"{rng.randint(300, 990)} triệu", "Thỏa thuận"])
+    return {
+        "id": str(listing_id),
+        "province": province,
+        "prop_type": prop_type,
+        "title": f"Bán {PROPERTY_TYPES.get(prop_type, 'nhà').lower()} {district}, {rng.choice(STREETS)}",
+        "vip": rng.random() < 0.2,
+        "price": price,
+        "area": f"{rng.randint(30, 400)} m²",
+        "location": f"Phường {rng.randint(1, 15)}, {district}, {prov_name}",
+        "updated": rng.choice(UPDATED).format(rng.randint(1, 11)),
+        "details": {
+            "Loại BĐS": PROPERTY_TYPES.get(prop_type, "Nhà"),
+            "Chiều ngang": f"{rng.randint(3, 12)} m",
+            "Chiều dài": f"{rng.randint(10, 30)} m",
+            "Số phòng ngủ": str(rng.randint(1, 6)),
+            "Số phòng tắm": str(rng.randint(1, 5)),
+            "Số tầng": str(rng.randint(1, 5)),
+            "Vị trí": rng.choice(["Đường chính", "Trong hẻm"]),
+            "Hướng cửa chính": rng.choice(DIRECTIONS),
+            "Đường/hẻm vào rộng": f"{rng.randint(2, 12)} m",
+            "Loại đường": f"Đường {rng.choice(ROAD_TYPES)}",
+        },
+        "detail_keep": rng.random(),  # decides which detail rows a page omits
+        "description": description(rng),
+        "lat": f"{lat + rng.uniform(-0.2, 0.2):.6f}",
+        "lon": f"{lon + rng.uniform(-0.2, 0.2):.6f}",
+        "images": [f"https://img.guland.vn/2024/{listing_id}_{i}.jpg" for i in range(rng.randint(0, 8))],
+        "avatar": rng.choice(["https://guland.vn/avatar/u{}.jpg".format(rng.randint(1, 5000)), None]),
+        "agent_role": rng.choice(["Môi giới", "Chính chủ"]),
+        "agent_name": rng.choice(["Anh Minh", "Chị Lan", "Anh Tuấn", "Chị Hoa"]),
+        "agent_count": rng.randint(1, 300),
+    }
+
+
+def detail_path(item):
+    return f"/post/ban-{item['prop_type']}-{item['province']}-{item['id']}"
+
+
+def _padding(kb):
+    # site chrome (menus, footers, inline scripts) that the parser has to skip
+    block = '<li class="menu__itm"><a href="/mua-ban-nha-dat">Mua bán nhà đất</a></li>\n'
+    return "<ul class=\"menu\">" + block * max(0, kb * 1024 // len(block)) + "</ul>"
+
+
+def detail_page_html(item, padding_kb=40):
+    rows = "".join(
+        f'<div class="s-dtl-inf__itm"><div class="s-dtl-inf__lbl">{k}</div>'
+        f'<div class="s-dtl-inf__val">{v}</div></div>'
+        for i, (k, v) in enumerate(item["details"].items())
+        if item["detail_keep"] > i / 20  # later rows are missing more often, as on the site
+    )
+    thumbs = "".join(
+        f'<div class="media-thumb-wrap__inner" style="background-image: url(\'{u}\')"></div>'
+        for u in item["images"] + ["https://guland.vn/images/map-icon.jpg"]
+    )
+    vip = '<span class="vrf-bdg">VIP</span>' if item["vip"] else ""
+    avatar = item["avatar"] or "https://guland.vn/images/profile.png"
+    return f"""<!DOCTYPE html><html lang="vi"><head><meta charset="utf-8"><title>{item['title']}</title></head>
+<body>{_padding(padding_kb)}
+<div class="dtl-main">
+<h1 class="dtl-tle">{vip}{item['title']}</h1>
+<div class="dtl-stl"><div class="dtl-stl__row"><span>{item['location']}</span>
+<span>Mã tin: <b>{item['id']}</b></span><span>Cập nhật {item['updated']}</span></div></div>
+<div class="dtl-prc"><div class="dtl-prc__ttl">{item['price']}</div><div class="dtl-prc__dtc">{item['area']}</div></div>
+<div class="media-thumb-wrap">{thumbs}</div>
+<div class="s-dtl-inf">{rows}</div>
+<div class="dtl-inf"><div class="dtl-inf__dsr">{item['description']}</div></div>
+<a class="map-direction" href="https://www.google.com/maps/dir/?api=1&query={item['lat']},{item['lon']}">Chỉ đường</a>
+<div class="dtl-aut"><div class="dtl-aut__avt"><img src="{avatar}"></div>
+<div class="dtl-aut__rol">{item['agent_role']}</div><div class="dtl-aut__tle">{item['agent_name']}</div>
+<div class="dtl-aut__stl">{item['agent_count']} tin đăng</div></div>
+</div>{_padding(padding_kb // 4)}</body></html>"""
+
+
+def card_html(item):
+    return f"""<div class="l-sdb-list__single"><div class="c-sdb-card">
+<div class="c-sdb-card__tle"><a href="{detail_path(item)}">{item['title']}</a></div>
+<div class="c-sdb-card__prc">{item['price']}</div><div class="c-sdb-card__dtc">{item['area']}</div>
+<div class="c-sdb-card__loc">{item['location']}</div></div></div>"""
+
+
+def listing_page_html(items, padding_kb=20):
+    cards = "\n".join(card_html(item) for item in items)
+    return f"""<!DOCTYPE html><html lang="vi"><head><meta charset="utf-8"></head>
+<body>{_padding(padding_kb)}<div class="l-sdb-list">{cards}</div></body></html>"""
+
+
+def csv_row(item, scraped_at):
+    """The row the scraper would write for `item` (CSV_COLUMNS order)."""
+    d = item["details"]
+    return [
+        item["title"], item["price"], item["area"], item["location"], item["id"], item["updated"],
+        d["Loại BĐS"], d["Chiều ngang"], d["Chiều dài"], d["Số phòng ngủ"], d["Số phòng tắm"], d["Số tầng"],
+        d["Vị trí"], d["Hướng cửa chính"], d["Đường/hẻm vào rộng"], d["Loại đường"],
+        item["description"], "https://guland.vn" + detail_path(item), item["lat"], item["lon"], item["vip"],
+        "; ".join(item["images"]) or "N/A", item["avatar"] or "N/A",
+        item["agent_role"], item["agent_name"], str(item["agent_count"]),
+        item["province"], item["prop_type"], scraped_at.strftime("%Y-%m-%d %H:%M:%S"),
+    ]
+
+
+def write_scraped_csv(path, n_rows, seed=0, columns=None):
+    """A raw scraped CSV of `n_rows` listings, as in scraped-data/{province}.csv."""
+    from scripts.schema import CSV_COLUMNS
+    rng = random.Random(seed)
+    start = datetime(2025, 9, 1)
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f)
+        w.writerow(columns or CSV_COLUMNS)
+        for i in range(n_rows):
+            item = listing(rng, 1_000_000 + i)
+            w.writerow(csv_row(item, start + timedelta(minutes=i)))
+    return path
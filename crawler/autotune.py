@@ -0,0 +1,204 @@
+import math
+import os
+import threading
+import time
+
+# —————————————————————————
+# Concurrency autotuner for detail pages (--autotune).
+#
+# AdjustableLimit    a semaphore whose size can change while threads wait on it
+# ConcurrencyTuner   every INTERVAL seconds of fetching, compares goodput
+#                    (detail pages parsed per busy second) with the interval
+#                    before and moves the limit by hill-climbing: keep going
+#                    (doubling the step) while it helps, turn back (halving it) when it
+#                    hurts, and prefer fewer workers when more gain less
+#                    than TOLERANCE. It settles at the throughput knee and
+#                    keeps probing around it, so it follows the network.
+#
+# Guards, checked before climbing:
+#   errors   429/403/5xx/exceptions above ERROR_LIMIT: limit × BACKOFF, then
+#            climb back one worker at a time
+#   CPU      the process at CPU_LIMIT cores (parsing holds the GIL) or the
+#            load average above the core count: no increase
+#   rate     with a requests/s cap, Little's law (in flight = rate × time per
+#            request) caps the limit at cap × service time × HEADROOM; more
+#            workers would only queue on the token bucket
+#   demand   if no fetch had to wait for a slot, more slots can't help
+#   drift    steps down that each lose less than TOLERANCE still add up: once
+#            goodput is TOLERANCE below the best limit seen, go back to it
+# —————————————————————————
+INTERVAL = 5.0       # busy seconds per measurement
+MIN_SAMPLES = 40     # completed pages per measurement
+TOLERANCE = 0.05     # goodput changes smaller than this count as "no change"
+ERROR_LIMIT = 0.05
+BACKOFF = 0.7
+CPU_LIMIT = 0.9      # cores used by this process
+HEADROOM = 1.25
+BEST_DECAY = 0.995   # per measurement: the best goodput seen fades, so it follows the network
+
+
+def _cpu_seconds():
+    t = os.times()
+    return t.user + t.system
+
+
+def _load_per_core():
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):  # no load average on this platform
+        return 0.0
+
+
+class AdjustableLimit:
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.waits = 0           # acquisitions that found every slot taken
+        self.waiting = 0         # threads blocked in acquire() right now
+        self._busy = 0.0         # seconds with at least one slot held
+        self._busy_since = None
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            if self.active >= self.limit:
+                self.waits += 1
+                self.waiting += 1
+                while self.active >= self.limit:
+                    self._cond.wait()
+                self.waiting -= 1
+            if self.active == 0:
+                self._busy_since = time.monotonic()
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            if self.active == 0:
+                self._busy += time.monotonic() - self._busy_since
+            self._cond.notify()
+
+    def set_limit(self, n):
+        with self._cond:
+            self.limit = n
+            self._cond.notify_all()
+
+    def busy_time(self):
+        """Seconds so far with at least one slot held (page sleeps don't count)."""
+        with self._cond:
+            return self._busy + (time.monotonic() - self._busy_since if self.active else 0.0)
+
+
+class ConcurrencyTuner:
+    def __init__(self, start, min_workers=1, max_workers=64, rate_cap=None,
+                 interval=INTERVAL, on_change=None):
+        """rate_cap: requests/s allowed in total (None = unlimited); on_change(old, new, reason)."""
+        self.min, self.max = max(1, min_workers), max(min_workers, max_workers)
+        self.limit = AdjustableLimit(max(self.min, min(start, self.max)))
+        self.rate_cap = rate_cap or None
+        self.interval = interval
+        self.on_change = on_change
+        self.direction, self.step = 1, max(1, start // 4)
+        self.prev_goodput = None
+        self.best = (0.0, self.limit.limit)   # (goodput, limit)
+        self.changes = 0
+        self._lock = threading.Lock()
+        self._new_window()
+
+    def _new_window(self):
+        self.w_done = self.w_ok = self.w_responses = self.w_errors = 0
+        self.w_slot_s = self.w_wait_s = 0.0
+        self.w_busy0, self.w_waits0 = self.limit.busy_time(), self.limit.waits
+        self.w_t0, self.w_cpu0 = time.monotonic(), _cpu_seconds()
+
+    # ---- hooks ----
+    def run(self, fn, *args):
+        """fn(*args) inside a slot; a None result counts as a failed page."""
+        self.limit.acquire()
+        t0 = time.perf_counter()
+        result = None
+        try:
+            result = fn(*args)
+        finally:
+            seconds = time.perf_counter() - t0
+            self.limit.release()
+            self._completed(seconds, result is not None)
+        return result
+
+    def observe_response(self, ok, waited=0.0):
+        """One HTTP answer (ok=False for 429/403/5xx or an exception); waited: seconds spent on the rate limiter."""
+        with self._lock:
+            self.w_responses += 1
+            self.w_errors += not ok
+            self.w_wait_s += waited
+
+    # ---- controller ----
+    def _completed(self, seconds, ok):
+        with self._lock:
+            self.w_done += 1
+            self.w_ok += ok
+            self.w_slot_s += seconds
+            busy = self.limit.busy_time() - self.w_busy0
+            if busy < self.interval or self.w_done < MIN_SAMPLES:
+                return
+            old, new, reason = self._decide(busy)
+            self._new_window()
+        if new != old and self.on_change:
+            self.on_change(old, new, reason)
+
+    def _decide(self, busy):
+        n = self.limit.limit
+        goodput = self.w_ok / busy
+        errors = self.w_errors / max(self.w_responses, 1)
+        cpu = (_cpu_seconds() - self.w_cpu0) / max(time.monotonic() - self.w_t0, 1e-9)
+        service_s = max(self.w_slot_s - self.w_wait_s, 0.0) / self.w_done
+        # new arrivals that found no slot, or a backlog already blocked before this window
+        queued = self.limit.waits > self.w_waits0 or self.limit.waiting > 0
+        ceiling = self.max
+        if self.rate_cap:
+            ceiling = min(ceiling, max(self.min, math.ceil(self.rate_cap * service_s * HEADROOM)))
+        best_goodput, best_n = self.best[0] * BEST_DECAY, self.best[1]
+        if n == best_n:
+            best_goodput = (best_goodput + goodput) / 2   # the best limit re-measured
+        elif goodput > best_goodput:
+            best_goodput, best_n = goodput, n
+        self.best = (best_goodput, best_n)
+        stats = f"{goodput:.1f} pages/s, errors {errors:.0%}, cpu {cpu:.2f}"
+
+        if errors > ERROR_LIMIT:
+            # back off hard, then climb back one worker at a time from a fresh reference
+            new, reason = int(n * BACKOFF), f"backoff: {stats}"
+            self.direction, self.step, self.prev_goodput = 1, 1, None
+        else:
+            if self.prev_goodput:
+                gain = goodput / self.prev_goodput - 1
+                if gain < -TOLERANCE or (gain < TOLERANCE and self.direction > 0):
+                    # the last move hurt, or more workers did not help: turn around
+                    self.direction, self.step = -self.direction, max(1, self.step // 2)
+                elif gain >= TOLERANCE and self.direction > 0:
+                    self.step = min(self.step * 2, max(1, n // 2))   # paying off: take bigger steps
+            self.prev_goodput = goodput
+            if self.direction < 0 and best_n > n and goodput < best_goodput * (1 - TOLERANCE):
+                # the small losses of each step down have added up: return to the best limit
+                new, reason = best_n, f"back to best ({best_goodput:.1f} pages/s): {stats}"
+                self.direction, self.step, self.prev_goodput = 1, 1, None
+            elif self.direction > 0 and (cpu >= CPU_LIMIT or _load_per_core() > 1.0):
+                new, reason = n, f"hold (cpu): {stats}"
+            elif self.direction > 0 and not queued:
+                new, reason = n, f"hold (no queue): {stats}"
+            else:
+                new, reason = n + self.direction * self.step, stats
+        if new > ceiling:
+            new, self.prev_goodput = ceiling, None   # held back by the rate cap: not a result to climb from
+        new = max(self.min, new)
+        if new == self.min and self.direction < 0:
+            self.direction = 1   # nothing left to shed; the next move probes upwards again
+        if new != n:
+            self.changes += 1
+            self.limit.set_limit(new)
+        return n, new, reason
+
+    def summary(self):
+        with self._lock:
+            return {"workers": self.limit.limit, "changes": self.changes,
+                    "best_workers": self.best[1], "best_pages_per_s": round(self.best[0], 1)}
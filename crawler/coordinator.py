@@ -0,0 +1,195 @@
+import argparse
+import os
+import socket
+import sqlite3
+import time
+from collections import namedtuple
+
+# —————————————————————————
+# Shared work queue for distributed crawls.
+#
+# Work units (a province × property type, optionally narrowed to a page
+# range) live in one SQLite file on a volume every worker can reach. A
+# worker leases a unit for `lease_seconds`, renews the lease while it
+# makes progress and marks the unit done or failed when it finishes.
+# Units whose lease expires (crashed or blocked worker) go back to
+# whoever asks next.
+#
+#   python scraper-parallel-incrementCSV.py --queue /shared/queue.db --seed-queue   # once
+#   python scraper-parallel-incrementCSV.py --queue /shared/queue.db                # on each node
+#   python -m crawler.coordinator status --db /shared/queue.db
+#
+# SQLite's rollback journal is used (not WAL) because WAL needs shared
+# memory and does not work across machines on a network filesystem.
+# —————————————————————————
+MAX_ATTEMPTS = 5
+
+WorkUnit = namedtuple("WorkUnit", "unit_id province prop_type page_start page_end attempts")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_units (
+    unit_id        TEXT PRIMARY KEY,
+    province       TEXT NOT NULL,
+    prop_type      TEXT NOT NULL,
+    page_start     INTEGER NOT NULL DEFAULT 1,
+    page_end       INTEGER,                      -- NULL: until the last page
+    status         TEXT NOT NULL DEFAULT 'pending',  -- pending | leased | done | split | failed
+    worker         TEXT,
+    lease_expires  REAL,
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    rows           INTEGER,
+    error          TEXT,
+    updated_at     REAL
+);
+CREATE INDEX IF NOT EXISTS idx_units_status ON work_units(status, lease_expires);
+"""
+
+
+def unit_key(province, prop_type, page_start=1, page_end=None):
+    if page_start == 1 and page_end is None:
+        return f"{province}|{prop_type}"
+    return f"{province}|{prop_type}|{page_start}-{page_end or ''}"
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    def __init__(self, path, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def _tx(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can't
+        # both read the same pending row and lease it
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    # ---- coordinator side ----
+    def seed(self, units):
+        """units: iterable of (province, prop_type[, page_start, page_end]). Existing units are kept."""
+        now = time.time()
+        self._tx()
+        try:
+            for u in units:
+                province, prop_type, start, end = (tuple(u) + (1, None))[:4]
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO work_units (unit_id, province, prop_type, page_start, page_end, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (unit_key(province, prop_type, start, end), province, prop_type, start, end, now))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def status(self):
+        rows = self.conn.execute("SELECT status, COUNT(*), COALESCE(SUM(rows), 0) FROM work_units GROUP BY status")
+        return {status: {"units": n, "rows": r} for status, n, r in rows}
+
+    def reset_failed(self):
+        cur = self.conn.execute(
+            "UPDATE work_units SET status = 'pending', attempts = 0, error = NULL, updated_at = ? WHERE status = 'failed'",
+            (time.time(),))
+        return cur.rowcount
+
+    # ---- worker side ----
+    def lease(self, worker, lease_seconds=600):
+        """Claim the next available unit, or None when nothing is left to lease."""
+        now = time.time()
+        self._tx()
+        try:
+            # an expired lease on its last attempt will not be handed out again: fail it,
+            # or it would stay 'leased' and keep every worker waiting for it
+            self.conn.execute(
+                "UPDATE work_units SET status = 'failed', lease_expires = NULL,"
+                " error = COALESCE(error, 'lease expired'), updated_at = ?"
+                " WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts))
+            row = self.conn.execute(
+                "SELECT unit_id, province, prop_type, page_start, page_end, attempts FROM work_units"
+                " WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))"
+                "   AND attempts < ?"
+                " ORDER BY attempts, rowid LIMIT 1", (now, self.max_attempts)).fetchone()
+            if row:
+                self.conn.execute(
+                    "UPDATE work_units SET status = 'leased', worker = ?, lease_expires = ?,"
+                    " attempts = attempts + 1, updated_at = ? WHERE unit_id = ?",
+                    (worker, now + lease_seconds, now, row[0]))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return WorkUnit(*row[:5], row[5] + 1) if row else None
+
+    def renew(self, unit_id, worker, lease_seconds=600):
+        """Extend a lease; False means it expired and another worker may own the unit now."""
+        cur = self.conn.execute(
+            "UPDATE work_units SET lease_expires = ?, updated_at = ?"
+            " WHERE unit_id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + lease_seconds, time.time(), unit_id, worker))
+        return cur.rowcount == 1
+
+    def split(self, unit_id, worker, units):
+        """Replace a leased unit with smaller ones (page ranges); the parent is marked 'split'."""
+        now = time.time()
+        self._tx()
+        try:
+            for province, prop_type, start, end in units:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO work_units (unit_id, province, prop_type, page_start, page_end, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (unit_key(province, prop_type, start, end), province, prop_type, start, end, now))
+            self.conn.execute(
+                "UPDATE work_units SET status = 'split', lease_expires = NULL, updated_at = ?"
+                " WHERE unit_id = ? AND worker = ?", (now, unit_id, worker))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def complete(self, unit_id, worker, rows=0):
+        """Mark the unit done; True when that finished its combo (no unit of it pending or leased)."""
+        self._tx()
+        try:
+            cur = self.conn.execute(
+                "UPDATE work_units SET status = 'done', rows = ?, error = NULL, lease_expires = NULL, updated_at = ?"
+                " WHERE unit_id = ? AND worker = ?", (rows, time.time(), unit_id, worker))
+            # in the same transaction, so of two workers finishing a combo's last ranges only one sees True
+            left = self.conn.execute(
+                "SELECT COUNT(*) FROM work_units o JOIN work_units u USING (province, prop_type)"
+                " WHERE u.unit_id = ? AND o.status IN ('pending', 'leased')", (unit_id,)).fetchone()[0]
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount == 1 and left == 0
+
+    def fail(self, unit_id, worker, error):
+        """Give the unit back; after max_attempts it stays 'failed' until reset."""
+        self.conn.execute(
+            "UPDATE work_units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+            " error = ?, lease_expires = NULL, updated_at = ? WHERE unit_id = ? AND worker = ?",
+            (self.max_attempts, str(error)[:500], time.time(), unit_id, worker))
+
+
+class LeaseLost(Exception):
+    """Raised by a worker when its lease was taken over while it was still working."""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or repair the shared crawl work queue.")
+    parser.add_argument("cmd", choices=["status", "reset-failed"])
+    parser.add_argument("--db", required=True, help="SQLite file on a volume shared by all workers")
+    args = parser.parse_args(argv)
+
+    queue = WorkQueue(args.db)
+    if args.cmd == "reset-failed":
+        print(f"🔁 Reset {queue.reset_failed()} failed units")
+    for status, v in sorted(queue.status().items()):
+        print(f"  {status:<8} {v['units']:>6} units  {v['rows']:>9} rows")
+
+
+if __name__ == "__main__":
+    main()
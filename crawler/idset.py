@@ -0,0 +1,193 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+
+# —————————————————————————
+# Compact set of seen Listing IDs.
+#
+# A combo's IDs live in two files next to each other in checkpoint/:
+#
+#   {province}_{type}_ids.npy   sorted unique int64 snapshot, memory-mapped
+#                               on load (no parsing, pages read on demand)
+#   {province}_{type}_ids.log   IDs appended since the last compaction (one
+#                               per line, as before; crash-safe journal)
+#
+# Membership is a binary search in the snapshot and in the (sorted) journal
+# read at startup, plus a small Python set for the IDs added since. That is
+# 8 bytes per ID instead of ~90 for a set of strings, and startup reads only
+# the journal tail. Snapshots of BLOOM_MIN_IDS or
+# more also get a Bloom filter ({...}_ids.bloom.npy) so most lookups of new
+# IDs are answered without touching the snapshot's pages.
+#
+# Old checkpoints migrate by themselves: a log without snapshot is simply
+# a long journal, folded into a snapshot at the next compaction.
+#
+#   python -m crawler.idset compact scraped-data/checkpoint
+#   python -m crawler.idset stats   scraped-data/checkpoint
+# —————————————————————————
+BLOOM_MIN_IDS = 1_000_000
+BLOOM_BITS_PER_ID = 10   # ~1% false positives with BLOOM_HASHES = 7
+BLOOM_HASHES = 7
+_M64 = (1 << 64) - 1
+_H1, _H2 = 0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F
+
+
+def paths_for(log_path):
+    """(snapshot, bloom) paths belonging to an `_ids.log`."""
+    stem = log_path[:-len(".log")] if log_path.endswith(".log") else log_path
+    return stem + ".npy", stem + ".bloom.npy"
+
+
+def _as_int(listing_id):
+    s = str(listing_id).strip()
+    # isdigit() alone also accepts digits like '²' that int() rejects
+    return int(s) if s.isascii() and s.isdigit() and len(s) < 19 else None
+
+
+def _sorted_unique(a):
+    # sort + neighbour mask; np.unique's hash path is several times slower on int64
+    a = np.sort(a, kind="stable")
+    return a[np.r_[True, a[1:] != a[:-1]]] if len(a) else a
+
+
+def _has(sorted_ids, x):
+    i = int(np.searchsorted(sorted_ids, x))
+    return i < len(sorted_ids) and int(sorted_ids[i]) == x
+
+
+class BloomFilter:
+    def __init__(self, bits: np.ndarray):
+        """bits: uint8 array of 2**k bits (packed, little bit order)."""
+        self.bits = bits
+        self.shift = 64 - (len(bits) * 8).bit_length() + 1
+
+    @classmethod
+    def build(cls, ids: np.ndarray, bits_per_id=BLOOM_BITS_PER_ID):
+        n_bits = 1 << max(10, int(np.ceil(np.log2(max(len(ids), 1) * bits_per_id))))
+        shift = np.uint64(64 - n_bits.bit_length() + 1)
+        flags = np.zeros(n_bits, dtype=bool)
+        x = ids.astype(np.uint64)
+        with np.errstate(over="ignore"):
+            h1, h2 = x * np.uint64(_H1), (x * np.uint64(_H2)) | np.uint64(1)
+            for i in range(BLOOM_HASHES):
+                flags[(h1 + np.uint64(i) * h2) >> shift] = True
+        return cls(np.packbits(flags, bitorder="little"))
+
+    def __contains__(self, x: int):
+        h1, h2 = (x * _H1) & _M64, ((x * _H2) & _M64) | 1
+        for i in range(BLOOM_HASHES):
+            pos = ((h1 + i * h2) & _M64) >> self.shift
+            if not (self.bits[pos >> 3] >> (pos & 7)) & 1:
+                return False
+        return True
+
+
+class IdSet:
+    def __init__(self, base=None, bloom=None):
+        self.base = base if base is not None else np.empty(0, dtype=np.int64)
+        self.bloom = bloom
+        self.journal = np.empty(0, dtype=np.int64)  # numeric IDs from the journal, sorted
+        self.added = set()   # numeric IDs added since loading
+        self.other = set()   # non-numeric IDs ("N/A", ...), kept only in the journal
+
+    def __contains__(self, listing_id):
+        x = _as_int(listing_id)
+        if x is None:
+            return str(listing_id).strip() in self.other
+        if x in self.added or _has(self.journal, x):
+            return True
+        if self.bloom is not None and x not in self.bloom:
+            return False
+        return _has(self.base, x)
+
+    def add(self, listing_id):
+        x = _as_int(listing_id)
+        if x is None:
+            self.other.add(str(listing_id).strip())
+        elif x not in self:
+            self.added.add(x)
+
+    def __len__(self):
+        return len(self.base) + len(self.journal) + len(self.added) + len(self.other)
+
+    def to_array(self) -> np.ndarray:
+        """Every numeric ID, sorted and unique."""
+        added = np.fromiter(self.added, dtype=np.int64, count=len(self.added))
+        return _sorted_unique(np.concatenate([self.base, self.journal, added]))
+
+    def nbytes(self):
+        return self.base.nbytes + (self.bloom.bits.nbytes if self.bloom is not None else 0)
+
+    # ---- persistence ----
+    @classmethod
+    def load(cls, log_path):
+        """Snapshot (memory-mapped) plus every ID in the journal."""
+        snap, bloom = paths_for(log_path)
+        base = np.load(snap, mmap_mode="r") if os.path.exists(snap) else None
+        ids = cls(base, BloomFilter(np.load(bloom, mmap_mode="r")) if base is not None and os.path.exists(bloom)
+                  else None)
+        if os.path.exists(log_path):
+            with open(log_path, encoding="utf-8") as f:
+                tokens = f.read().split()
+            numeric, other = [], ids.other
+            for t in tokens:
+                if t.isascii() and t.isdigit() and len(t) < 19:
+                    numeric.append(t)
+                else:
+                    other.add(t)
+            if numeric:
+                journal = _sorted_unique(np.array(numeric, dtype=np.int64))
+                if len(ids.base):
+                    # what the snapshot already has (a crash during compaction) needn't be kept twice;
+                    # searchsorted only touches the snapshot pages it needs
+                    pos = np.minimum(np.searchsorted(ids.base, journal), len(ids.base) - 1)
+                    journal = journal[ids.base[pos] != journal]
+                ids.journal = journal
+        return ids
+
+    def compact(self, log_path):
+        """
+        Fold the journal into the snapshot and empty it (non-numeric IDs stay
+        in the journal). Call only while no other process appends to it.
+        """
+        snap, bloom = paths_for(log_path)
+        merged = self.to_array()
+        # to_array() copied the IDs; let go of the memory maps so the files under them
+        # can be replaced (Windows refuses to replace a file that is mapped)
+        self.base, self.bloom = np.empty(0, dtype=np.int64), None
+        # np.save appends .npy to names without it, so the tmp name keeps the suffix
+        tmp = snap[:-len(".npy")] + ".tmp.npy"
+        np.save(tmp, merged)
+        os.replace(tmp, snap)
+        if len(merged) >= BLOOM_MIN_IDS:
+            np.save(tmp, BloomFilter.build(merged).bits)
+            os.replace(tmp, bloom)
+        elif os.path.exists(bloom):
+            os.remove(bloom)
+        # a crash before this point only leaves IDs in both files, which is harmless
+        with open(log_path + ".tmp", "w", encoding="utf-8") as f:
+            f.writelines(f"{x}\n" for x in sorted(self.other))
+        os.replace(log_path + ".tmp", log_path)
+
+        reloaded = IdSet.load(log_path)
+        self.base, self.bloom, self.journal, self.added = reloaded.base, reloaded.bloom, reloaded.journal, set()
+        return len(merged)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact or inspect the scraper's seen-ID checkpoints.")
+    parser.add_argument("command", choices=["compact", "stats"])
+    parser.add_argument("checkpoint_dir", nargs="?", default=os.path.join("scraped-data", "checkpoint"))
+    args = parser.parse_args()
+
+    for log_path in sorted(glob.glob(os.path.join(args.checkpoint_dir, "*_ids.log"))):
+        ids = IdSet.load(log_path)
+        name = os.path.basename(log_path)[:-len("_ids.log")]
+        if args.command == "compact":
+            n = ids.compact(log_path)
+            print(f"🗜️ {name}: {n} ids → {paths_for(log_path)[0]} ({ids.nbytes() / 1024:.0f} KB)")
+        else:
+            print(f"  {name:<40} {len(ids):>9} ids  snapshot {len(ids.base):>9}  journal {len(ids.journal) + len(ids.other):>7}"
+                  f"  {'bloom' if ids.bloom is not None else ''}")
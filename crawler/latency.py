@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+# —————————————————————————
+# Tail-latency control for the fetch layer.
+#
+# LatencyTracker  recent latencies of one request kind; timeout() is
+#                 p99 × factor, clamped, instead of a fixed 15 s, so a stuck
+#                 request is abandoned after a few "normal" latencies
+# TokenBucket     requests/s ceiling shared by every request (hedges included)
+# Hedger          sends a second copy of a request that has not answered by
+#                 the p95 latency and takes whichever answers first; at most
+#                 `budget` of all requests are hedged
+# —————————————————————————
+WINDOW = 500             # latencies kept per kind
+MIN_SAMPLES = 50         # below this the fixed ceiling is used
+TIMEOUT_QUANTILE = 0.99
+TIMEOUT_FACTOR = 3.0
+MIN_TIMEOUT = 2.0        # seconds; never time out faster than this
+HEDGE_QUANTILE = 0.95
+HEDGE_BUDGET = 0.05      # fraction of requests that may get a hedge
+MIN_HEDGE_DELAY = 0.05   # seconds
+
+
+class LatencyTracker:
+    def __init__(self, ceiling, window=WINDOW, min_samples=MIN_SAMPLES,
+                 quantile=TIMEOUT_QUANTILE, factor=TIMEOUT_FACTOR, floor=MIN_TIMEOUT):
+        self.ceiling, self.floor = ceiling, min(floor, ceiling)
+        self.quantile_for_timeout, self.factor = quantile, factor
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Record one latency (a timed-out request counts as its timeout, so timeouts can't shrink)."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q):
+        """Latency quantile of the window, or None until min_samples have been seen."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+        return float(np.quantile(samples, q))
+
+    def timeout(self):
+        p = self.quantile(self.quantile_for_timeout)
+        if p is None:
+            return self.ceiling
+        return min(self.ceiling, max(self.floor, p * self.factor))
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        """rate: tokens per second (None or 0 = unlimited); burst: bucket size (default: 1 s worth)."""
+        self.rate = rate or None
+        self.capacity = float(burst or max(1.0, rate or 1.0))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self):
+        """Seconds until a token is available (0 if one is now)."""
+        if self.rate is None:
+            return 0.0
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self._tokens) / self.rate)
+
+    def try_acquire(self):
+        if self.rate is None:
+            return True
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds waited."""
+        if self.rate is None:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                pause = (1 - self._tokens) / self.rate
+            time.sleep(pause)
+            waited += pause
+
+
+class Hedger:
+    def __init__(self, tracker, limiter=None, budget=HEDGE_BUDGET, quantile=HEDGE_QUANTILE, max_workers=32):
+        self.tracker, self.limiter = tracker, limiter
+        self.budget, self.quantile = budget, quantile
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self.calls = self.hedges = self.hedge_wins = 0
+
+    def _may_hedge(self):
+        with self._lock:
+            if self.hedges >= self.budget * self.calls:
+                return False
+            if self.limiter is not None and self.limiter.wait_time() > 0:
+                return False  # no spare rate budget: never queue a hedge behind real requests
+            self.hedges += 1
+            return True
+
+    def call(self, attempt):
+        """
+        Result of attempt(), or of a second attempt() started once the first
+        has been running for longer than the tracked p95 latency. The loser
+        is left to finish (or time out) in the background.
+        """
+        with self._lock:
+            self.calls += 1
+        first = self.pool.submit(attempt)
+        delay = self.tracker.quantile(self.quantile)
+        if delay is None or wait([first], timeout=max(delay, MIN_HEDGE_DELAY)).done or not self._may_hedge():
+            return first.result()
+
+        second = self.pool.submit(attempt)
+        done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = first if first in done else second
+        if winner.exception() is not None:
+            winner = second if winner is first else first  # the other copy may still succeed
+        if winner is second:
+            with self._lock:
+                self.hedge_wins += 1
+        return winner.result()
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+    def close(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,216 @@
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# —————————————————————————
+# Crawl metrics: thread-safe counters, latency histograms and per-combo
+# progress, exported as periodic JSON lines and/or a local HTTP endpoint.
+# —————————————————————————
+
+# bucket upper bounds in milliseconds; the last bucket is open-ended
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class Histogram:
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.n = 0
+        self.total = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.n += 1
+        self.total += ms
+
+    def quantile(self, q):
+        """Estimate, interpolating linearly inside the bucket holding the q-th observation."""
+        if not self.n:
+            return None
+        rank, seen = q * self.n, 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lower = self.bounds[i - 1] if i else 0
+                if i == len(self.bounds):
+                    return lower  # open-ended bucket: report its floor
+                return round(lower + (self.bounds[i] - lower) * (rank - seen) / c, 1)
+            seen += c
+        return self.bounds[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.n,
+            "mean_ms": round(self.total / self.n, 1) if self.n else None,
+            "p50_ms": self.quantile(0.5), "p95_ms": self.quantile(0.95), "p99_ms": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in self.bounds] + ["inf"], self.counts)),
+        }
+
+
+class CrawlMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = {}          # kind -> count
+        self.status = {}            # kind -> {status: count}
+        self.errors = {}            # kind -> exceptions (timeouts, resets)
+        self.bytes = {}             # kind -> decoded bytes
+        self.wire_bytes = {}        # kind -> bytes on the wire (when the transport knows)
+        self.latency = {}           # kind -> Histogram
+        self.parse = {}             # kind -> Histogram
+        self.gauges = {}            # name -> value (queue depths, ...)
+        self.throttle_seconds = 0.0
+        self.combos = {}            # "province|type" -> progress dict
+        self.combos_total = None
+        self._last = (self.started, 0)
+
+    # ---- recording ----
+    def observe_request(self, kind, seconds, status=None, n_bytes=0, wire_bytes=None, error=None):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            self.latency.setdefault(kind, Histogram()).observe(seconds * 1000)
+            if error is not None:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+                status = type(error).__name__
+            by_status = self.status.setdefault(kind, {})
+            by_status[str(status)] = by_status.get(str(status), 0) + 1
+            self.bytes[kind] = self.bytes.get(kind, 0) + n_bytes
+            if wire_bytes is not None:
+                self.wire_bytes[kind] = self.wire_bytes.get(kind, 0) + wire_bytes
+
+    def observe_parse(self, kind, seconds):
+        with self._lock:
+            self.parse.setdefault(kind, Histogram()).observe(seconds * 1000)
+
+    def add_gauge(self, name, delta):
+        with self._lock:
+            self.gauges[name] = self.gauges.get(name, 0) + delta
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def throttled(self, seconds):
+        with self._lock:
+            self.throttle_seconds += seconds
+
+    def combo_started(self, key, expected_pages=None):
+        with self._lock:
+            self.combos[key] = {"started": time.time(), "pages": 0, "listings": 0,
+                                "expected_pages": expected_pages, "done": False}
+
+    def page_done(self, key, listings):
+        with self._lock:
+            c = self.combos.get(key)
+            if c:
+                c["pages"] += 1
+                c["listings"] += listings
+
+    def combo_skipped(self):
+        with self._lock:
+            if self.combos_total:
+                self.combos_total -= 1
+
+    def combo_done(self, key):
+        with self._lock:
+            c = self.combos.get(key)
+            if c:
+                c["done"] = True
+                c["finished"] = time.time()
+
+    def combo_failed(self, key, err):
+        """The combo raised or lost its lease: it leaves "active" and is counted under combos_failed."""
+        with self._lock:
+            c = self.combos.get(key)
+            if c and not c["done"]:
+                c.update(done=True, failed=True, error=str(err)[:200], finished=time.time())
+
+    # ---- export ----
+    def _combo_view(self, key, c, now):
+        view = {"pages": c["pages"], "listings": c["listings"], "done": c["done"]}
+        elapsed = (c.get("finished") or now) - c["started"]
+        view["seconds"] = round(elapsed, 1)
+        if c["expected_pages"] and c["pages"] and not c["done"]:
+            left = max(0, c["expected_pages"] - c["pages"])
+            view["expected_pages"] = c["expected_pages"]
+            view["eta_s"] = round(elapsed / c["pages"] * left, 1)
+        return view
+
+    def snapshot(self):
+        with self._lock:
+            now = time.time()
+            total = sum(self.requests.values())
+            last_t, last_n = self._last
+            self._last = (now, total)
+            done = [c for c in self.combos.values() if c["done"] and not c.get("failed")]
+            snap = {
+                "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "elapsed_s": round(now - self.started, 1),
+                "requests": dict(self.requests),
+                "rps": round(total / max(now - self.started, 1e-9), 2),
+                "rps_recent": round((total - last_n) / max(now - last_t, 1e-9), 2),
+                "status": {k: dict(v) for k, v in self.status.items()},
+                "errors": dict(self.errors),
+                "bytes": dict(self.bytes),
+                "wire_bytes": dict(self.wire_bytes),
+                "latency": {k: h.snapshot() for k, h in self.latency.items()},
+                "parse": {k: h.snapshot() for k, h in self.parse.items()},
+                "gauges": dict(self.gauges),
+                "throttle_s": round(self.throttle_seconds, 1),
+                "combos_done": len(done),
+                "combos_failed": {k: c["error"] for k, c in self.combos.items() if c.get("failed")},
+                "combos_total": self.combos_total,
+                "active": {k: self._combo_view(k, c, now) for k, c in self.combos.items() if not c["done"]},
+            }
+            if self.combos_total and done:
+                per_combo = sum(c["finished"] - c["started"] for c in done) / len(done)
+                left = self.combos_total - len(done) - len(snap["combos_failed"])
+                snap["eta_s"] = round(per_combo * max(0, left), 1)
+            return snap
+
+
+class JsonLinesReporter:
+    """Appends one snapshot per `interval` seconds (and a final one on stop)."""
+
+    def __init__(self, metrics, path, interval=10.0):
+        self.metrics, self.path, self.interval = metrics, path, interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _write(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.metrics.snapshot(), ensure_ascii=False) + "\n")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._write()
+
+
+def serve_metrics(metrics, port, host="127.0.0.1"):
+    """GET http://host:port/metrics -> current snapshot as JSON."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode("utf-8")
+            self.send_response(200 if self.path.startswith("/metrics") else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
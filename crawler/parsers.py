@@ -0,0 +1,154 @@
+import re
+from datetime import datetime
+from bs4 import BeautifulSoup
+
+# —————————————————————————
+# HTML PARSERS (pure: no network, usable offline and in benchmarks)
+# —————————————————————————
+LISTING_SELECTOR = ".l-sdb-list__single"
+CARD_LINK_SELECTOR = ".c-sdb-card__tle a"
+CARD_PRICE_SELECTOR = ".c-sdb-card__prc"
+CARD_AREA_SELECTOR = ".c-sdb-card__dtc"
+CARD_LOCATION_SELECTOR = ".c-sdb-card__loc"
+
+
+def parse_listing_html(html):
+    """Listing cards (`.l-sdb-list__single`) of one search-result page."""
+    soup = BeautifulSoup(html, "html.parser")
+    return soup.select(LISTING_SELECTOR)
+
+
+def detail_urls(listings, listing_base):
+    urls = []
+    for item in listings:
+        link = item.select_one(CARD_LINK_SELECTOR)
+        if link and link.get("href"):
+            href = link["href"]
+            full_url = href if "http" in href else listing_base + href
+            urls.append(full_url)
+    return urls
+
+
+def card_id_from_url(url):
+    """Listing ID at the end of a post URL (`/post/...-1234567`), else the URL itself."""
+    m = re.search(r"-(\d+)(?:\.html)?/?(?:[?#].*)?$", url)
+    return m.group(1) if m else url
+
+
+def parse_card(item, listing_base):
+    """Fields a listing card shows without opening the detail page (None if it has no link)."""
+    link = item.select_one(CARD_LINK_SELECTOR)
+    if not link or not link.get("href"):
+        return None
+    href = link["href"]
+    url = href if "http" in href else listing_base + href
+
+    def text(sel):
+        tag = item.select_one(sel)
+        return tag.get_text(" ", strip=True) if tag else "N/A"
+
+    return {
+        "card_id": card_id_from_url(url),
+        "url": url,
+        "title": link.get_text(strip=True) or "N/A",
+        "price": text(CARD_PRICE_SELECTOR),
+        "area": text(CARD_AREA_SELECTOR),
+        "location": text(CARD_LOCATION_SELECTOR),
+    }
+
+
+def parse_detail_html(html, full_url, province, prop_type):
+    """One row in CSV_COLUMNS order from a detail page."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    listing_id = "N/A"
+    for span in soup.select(".dtl-stl__row span"):
+        if "Mã tin" in span.get_text():
+            b = span.find("b")
+            if b:
+                listing_id = b.get_text(strip=True)
+            break
+
+    title_tag = soup.select_one(".dtl-tle")
+    if title_tag:
+        vip_tag = title_tag.select_one(".vrf-bdg")
+        is_vip = bool(vip_tag)
+        if vip_tag:
+            vip_tag.extract()
+        title = title_tag.get_text(strip=True)
+    else:
+        is_vip, title = False, "N/A"
+
+    def safe_text(sel):
+        tag = soup.select_one(sel)
+        return tag.get_text(strip=True) if tag else "N/A"
+
+    price = safe_text(".dtl-prc__ttl")
+    area = safe_text(".dtl-prc__dtc")
+    location = safe_text(".dtl-stl__row > span")
+
+    updated_time = "N/A"
+    for span in soup.select(".dtl-stl__row span"):
+        text = span.get_text()
+        if "Cập nhật" in text:
+            updated_time = text.replace("Cập nhật", "").strip()
+
+    def get_detail_value(label):
+        tag = soup.find("div", class_="s-dtl-inf__lbl", string=lambda x: x and label in x)
+        return tag.find_next_sibling("div").get_text(strip=True) if tag else "N/A"
+
+    property_type_label = get_detail_value("Loại BĐS")
+    width = get_detail_value("Chiều ngang")
+    length = get_detail_value("Chiều dài")
+    bedrooms = get_detail_value("Số phòng ngủ")
+    bathrooms = get_detail_value("Số phòng tắm")
+    floors = get_detail_value("Số tầng")
+    position = get_detail_value("Vị trí")
+    direction = get_detail_value("Hướng cửa chính")
+    alley_width = get_detail_value("Đường/hẻm vào rộng")
+    road_type = get_detail_value("Loại đường")
+
+    description = safe_text(".dtl-inf__dsr")
+
+    gps_link = soup.select_one("a.map-direction")
+    latitude = longitude = "N/A"
+    if gps_link:
+        href = gps_link.get("href", "")
+        match = re.search(r'query=([\d.]+),([\d.]+)', href)
+        if match:
+            latitude, longitude = match.group(1), match.group(2)
+
+    image_urls = []
+    for div in soup.select(".media-thumb-wrap__inner"):
+        style = div.get("style", "")
+        match = re.search(r"url\('([^']+)'\)", style)
+        if match:
+            url = match.group(1)
+            if not url.endswith("map-icon.jpg"):
+                image_urls.append(url)
+    images = "; ".join(image_urls) if image_urls else "N/A"
+
+    avatar_url, agent_role, agent_name, agent_listing_count = "N/A", "N/A", "N/A", "N/A"
+    avatar_tag = soup.select_one(".dtl-aut__avt img")
+    if avatar_tag and "profile.png" not in avatar_tag.get("src", ""):
+        avatar_url = avatar_tag["src"]
+
+    role_tag = soup.select_one(".dtl-aut__rol")
+    if role_tag: agent_role = role_tag.get_text(strip=True)
+    name_tag = soup.select_one(".dtl-aut__tle")
+    if name_tag: agent_name = name_tag.get_text(strip=True)
+    listing_count_tag = soup.select_one(".dtl-aut__stl")
+    if listing_count_tag:
+        m = re.search(r'(\d+)', listing_count_tag.get_text())
+        if m: agent_listing_count = m.group(1)
+
+    scraped_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    return [
+        title, price, area, location, listing_id, updated_time,
+        property_type_label, width, length, bedrooms, bathrooms, floors,
+        position, direction, alley_width, road_type,
+        description, full_url, latitude, longitude, is_vip, images,
+        avatar_url, agent_role, agent_name, agent_listing_count,
+        province, prop_type, scraped_at
+    ]
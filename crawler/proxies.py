@@ -0,0 +1,171 @@
+import random
+import threading
+import time
+
+from crawler.latency import TokenBucket
+from crawler.transport import make_transport
+
+# —————————————————————————
+# Egress pool: spread requests over several HTTP proxies.
+#
+# Each proxy has its own transport (connection pool), its own token bucket
+# (--proxy-rps) and a health record: EWMAs of success, latency and block
+# rate (429/403). A request goes to the better of two random proxies that
+# have a token free, so healthy proxies carry more traffic without the
+# rest going stale. A proxy that fails FAIL_LIMIT times in a row or gets
+# mostly blocked is quarantined; when its quarantine ends it is on
+# probation, and its next request decides whether it rejoins the pool or
+# goes back for twice as long.
+#
+# ProxyPool has the transport interface (get / summary / close), so the
+# scraper's fetch() does not care whether it talks to one egress or many.
+# —————————————————————————
+ALPHA = 0.2              # EWMA weight of the newest request
+FAIL_LIMIT = 3           # consecutive failures before quarantine
+BLOCK_LIMIT = 0.5        # quarantine when the blocked-response EWMA exceeds this ...
+MIN_REQUESTS = 5         # ... after at least this many requests
+QUARANTINE_S = 60.0      # first quarantine; doubles on every relapse
+MAX_QUARANTINE_S = 1800.0
+BLOCKED = {403, 429}
+
+
+def load_proxies(path):
+    """Proxy URLs from a file, one per line (blank lines and # comments ignored)."""
+    with open(path, encoding="utf-8") as f:
+        return [line.split("#")[0].strip() for line in f if line.split("#")[0].strip()]
+
+
+class Proxy:
+    def __init__(self, url, transport, rate):
+        self.url, self.transport = url, transport
+        self.bucket = TokenBucket(rate)
+        self.success = 1.0       # EWMA of 2xx/3xx/404 answers
+        self.blocked = 0.0       # EWMA of 429/403
+        self.latency = None      # EWMA seconds of answered requests
+        self.consecutive_failures = 0
+        self.quarantined_until = 0.0
+        self.quarantine_s = QUARANTINE_S
+        self.probation = False
+        self.on_probe = False
+        self.counts = {"requests": 0, "ok": 0, "blocked": 0, "errors": 0, "quarantines": 0}
+
+    def score(self):
+        latency = self.latency if self.latency is not None else 0.5
+        return self.success * (1 - self.blocked) / (latency + 0.05)
+
+    def available(self, now):
+        return now >= self.quarantined_until
+
+    def view(self, now):
+        return dict(self.counts, score=round(self.score(), 2),
+                    latency_ms=round(self.latency * 1000) if self.latency is not None else None,
+                    quarantined_s=round(max(0.0, self.quarantined_until - now), 1))
+
+
+class ProxyPool:
+    def __init__(self, proxies, headers, pool_size=16, transport="requests", rate=None, retries=2):
+        """proxies: URLs like http://host:port; rate: requests/s per proxy (None = unlimited)."""
+        if not proxies:
+            raise ValueError("empty proxy list")
+        self.name = f"{transport} via {len(proxies)} proxies"
+        self.proxies = [Proxy(url, make_transport(transport, headers, pool_size, proxy=url), rate)
+                        for url in proxies]
+        self.retries = min(retries, len(self.proxies) - 1)
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+
+    # ---- routing ----
+    def _pick(self, exclude):
+        """Take a token from the healthier of two random ready proxies; waits while none is ready."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                live = [p for p in self.proxies if p.available(now)]
+                usable = [p for p in live if p not in exclude] or live  # rather reuse one than wait
+                ready = [p for p in usable if p.bucket.wait_time() == 0]
+                if ready:
+                    best = max(self._rng.sample(ready, min(2, len(ready))), key=Proxy.score)
+                    best.bucket.try_acquire()
+                    if best.probation:
+                        best.probation, best.on_probe = False, True  # this request is its re-probe
+                    return best
+                if usable:
+                    pause = min(p.bucket.wait_time() for p in usable)
+                else:
+                    pause = min(p.quarantined_until for p in self.proxies) - now
+            time.sleep(max(pause, 0.01))
+
+    def get(self, url, timeout):
+        tried, last_err = [], None
+        for _ in range(self.retries + 1):
+            proxy = self._pick(tried)
+            tried.append(proxy)
+            t0 = time.perf_counter()
+            try:
+                resp = proxy.transport.get(url, timeout=timeout)
+            except Exception as err:
+                self._record(proxy, None, time.perf_counter() - t0)
+                last_err = err
+                continue
+            self._record(proxy, resp.status_code, time.perf_counter() - t0)
+            if resp.status_code not in BLOCKED:
+                return resp
+            last_err = resp
+        if isinstance(last_err, Exception):
+            raise last_err
+        return last_err  # every proxy tried was blocked: hand back the last 429/403
+
+    # ---- health ----
+    def _record(self, proxy, status, seconds):
+        with self._lock:
+            c = proxy.counts
+            c["requests"] += 1
+            ok = status is not None and status not in BLOCKED and status < 500
+            blocked = status in BLOCKED
+            c["ok" if ok else "blocked" if blocked else "errors"] += 1
+            if not proxy.available(time.monotonic()):
+                return  # a request sent before the quarantine; its health is already decided
+            proxy.success += ALPHA * (ok - proxy.success)
+            proxy.blocked += ALPHA * (blocked - proxy.blocked)
+            if status is not None:
+                proxy.latency = seconds if proxy.latency is None else proxy.latency + ALPHA * (seconds - proxy.latency)
+            proxy.consecutive_failures = 0 if ok else proxy.consecutive_failures + 1
+
+            probe, proxy.on_probe = proxy.on_probe, False
+            bad = (proxy.consecutive_failures >= FAIL_LIMIT
+                   or (c["requests"] >= MIN_REQUESTS and proxy.blocked > BLOCK_LIMIT)
+                   or (probe and not ok))
+            if bad:
+                self._quarantine(proxy, relapse=probe)
+            elif probe:
+                proxy.quarantine_s = QUARANTINE_S  # healthy again
+
+    def _quarantine(self, proxy, relapse):
+        if relapse:
+            proxy.quarantine_s = min(proxy.quarantine_s * 2, MAX_QUARANTINE_S)
+        proxy.quarantined_until = time.monotonic() + proxy.quarantine_s
+        proxy.counts["quarantines"] += 1
+        # on release it starts from neutral health and is re-probed by its next request
+        proxy.success, proxy.blocked, proxy.consecutive_failures = 1.0, 0.0, 0
+        proxy.probation = True
+        print(f"🚧 Proxy {proxy.url} quarantined for {proxy.quarantine_s:.0f}s")
+
+    # ---- transport interface ----
+    def summary(self):
+        now = time.monotonic()
+        merged = {"transport": self.name, "http_versions": {}, "encodings": {}, "wire_bytes": 0, "bytes": 0}
+        for p in self.proxies:
+            s = p.transport.summary()
+            for key in ("http_versions", "encodings"):
+                for k, v in s[key].items():
+                    merged[key][k] = merged[key].get(k, 0) + v
+            merged["wire_bytes"] += s["wire_bytes"]
+            merged["bytes"] += s["bytes"]
+        merged["compression_ratio"] = round(merged["bytes"] / merged["wire_bytes"], 2) if merged["wire_bytes"] else None
+        with self._lock:
+            merged["proxies"] = {p.url: p.view(now) for p in self.proxies}
+        return merged
+
+    def close(self):
+        for p in self.proxies:
+            p.transport.close()
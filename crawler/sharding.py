@@ -0,0 +1,59 @@
+# —————————————————————————
+# Splitting one province × property type into page-range work units.
+#
+# The site has no "N pages" indicator, but a listing page past the end has
+# no cards and the last real page has fewer than CUTOFF_COUNT. That is
+# enough to find the last page with O(log n) requests: double the page
+# number until it runs off the end, then binary-search the gap.
+# —————————————————————————
+MAX_PAGES = 2000  # guards against a site that repeats its last page forever
+
+
+def probe_last_page(count_on_page, cutoff, max_pages=MAX_PAGES):
+    """
+    Last page number that has listings (0 if none).
+
+    count_on_page(p) returns how many listing cards page p has; any page
+    with fewer than `cutoff` is the last one by the scraper's own rule.
+    """
+    n = count_on_page(1)
+    if n == 0:
+        return 0
+    if n < cutoff:
+        return 1
+
+    lo, hi, page = 1, None, 2  # lo: known full page, hi: known empty page
+    while hi is None:
+        if page > max_pages:
+            return max_pages
+        n = count_on_page(page)
+        if n == 0:
+            hi = page
+        elif n < cutoff:
+            return page
+        else:
+            lo, page = page, page * 2
+
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        n = count_on_page(mid)
+        if n == 0:
+            hi = mid
+        elif n < cutoff:
+            return mid
+        else:
+            lo = mid
+    return lo
+
+
+def page_ranges(last_page, shard_pages):
+    """
+    [(start, end), ...] covering 1..last_page in chunks of `shard_pages`.
+    The final range is open-ended (end=None) so pages that appear while
+    the crawl runs are still reached by paginating to the cutoff.
+    """
+    if last_page <= 0:
+        return [(1, None)]
+    ranges = [(s, min(s + shard_pages - 1, last_page)) for s in range(1, last_page + 1, shard_pages)]
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
@@ -0,0 +1,344 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from scripts.preprocessData import parse_price_to_million
+from scripts.schema import CSV_COLUMNS, STAGES
+
+# —————————————————————————
+# Listing store: one row per Listing ID instead of append-only CSVs.
+#
+# Every scraped row is upserted. When a listing comes back with different
+# values, only the fields that changed are written to listing_history as
+# (listing_id, changed_at, field, old, new), so price moves can be followed
+# over time without keeping full copies of each version.
+#
+#   python scraper-parallel-incrementCSV.py --store scraped-data/listings.db
+#   python -m crawler.store changes --db scraped-data/listings.db --since "2025-06-01"
+#   python -m crawler.store export  --db scraped-data/listings.db --out scraped-data
+# —————————————————————————
+ID_COLUMN = "Listing ID"
+SCRAPED_AT = "Scraped At"
+# fields that change on every scrape without the listing itself changing
+VOLATILE = {SCRAPED_AT, "Last Updated"}
+# compared as numbers: a CSV round trip may write 10.78 back as 10.780000
+NUMERIC = set(STAGES["raw"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    listing_id   TEXT PRIMARY KEY,
+    province     TEXT,
+    prop_type    TEXT,
+    price_m      REAL,               -- price in million VND (NULL when "thỏa thuận")
+    scraped_at   TEXT,               -- last time the listing was seen
+    first_seen   TEXT,
+    changed_at   TEXT,               -- last time any tracked field changed
+    data         TEXT NOT NULL       -- JSON object of the CSV_COLUMNS values
+);
+CREATE INDEX IF NOT EXISTS idx_listings_province   ON listings(province);
+CREATE INDEX IF NOT EXISTS idx_listings_prop_type  ON listings(prop_type);
+CREATE INDEX IF NOT EXISTS idx_listings_price      ON listings(price_m);
+CREATE INDEX IF NOT EXISTS idx_listings_scraped_at ON listings(scraped_at);
+CREATE INDEX IF NOT EXISTS idx_listings_changed_at ON listings(changed_at);
+
+CREATE TABLE IF NOT EXISTS listing_history (
+    listing_id   TEXT NOT NULL,
+    changed_at   TEXT NOT NULL,
+    field        TEXT NOT NULL,
+    old          TEXT,
+    new          TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_changed_at ON listing_history(changed_at);
+CREATE INDEX IF NOT EXISTS idx_history_listing    ON listing_history(listing_id, changed_at);
+
+-- what the listing cards show (card-only harvests); detail_pending marks
+-- cards whose detail page must be (re)fetched: new, or price/area changed
+CREATE TABLE IF NOT EXISTS cards (
+    card_id        TEXT PRIMARY KEY,
+    url            TEXT NOT NULL,
+    province       TEXT,
+    prop_type      TEXT,
+    title          TEXT,
+    price          TEXT,
+    area           TEXT,
+    location       TEXT,
+    price_m        REAL,
+    first_seen     TEXT,
+    last_seen      TEXT,
+    changed_at     TEXT,
+    detail_pending INTEGER NOT NULL DEFAULT 1,
+    detail_at      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cards_pending   ON cards(detail_pending, province, prop_type);
+CREATE INDEX IF NOT EXISTS idx_cards_province  ON cards(province, prop_type);
+CREATE INDEX IF NOT EXISTS idx_cards_price     ON cards(price_m);
+CREATE INDEX IF NOT EXISTS idx_cards_last_seen ON cards(last_seen);
+"""
+
+
+def _text(v):
+    """Normalise a cell so '' / "N/A" / NaN / None compare equal and numbers compare as scraped."""
+    if v is None or (isinstance(v, float) and v != v) or v is pd.NA:
+        return None
+    v = str(v)
+    return v if v.strip() and v.strip() != "N/A" else None
+
+
+def _same(field, old, new):
+    if old == new:
+        return True
+    if field in NUMERIC and old is not None and new is not None:
+        try:
+            return float(old) == float(new)
+        except ValueError:
+            pass
+    return False
+
+
+def _price(text):
+    p = parse_price_to_million(text) if text else None
+    return None if p is None or p is pd.NA else float(p)
+
+
+class ListingStore:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---- writes ----
+    def upsert_rows(self, rows):
+        """
+        rows: lists in CSV_COLUMNS order (as the scraper produces) or dicts.
+        Returns {"inserted": n, "changed": n, "unchanged": n}.
+        """
+        counts = {"inserted": 0, "changed": 0, "unchanged": 0}
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                rec = dict(zip(CSV_COLUMNS, row)) if not isinstance(row, dict) else row
+                rec = {c: _text(rec.get(c)) for c in CSV_COLUMNS}
+                counts[self._upsert(rec)] += 1
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return counts
+
+    def _upsert(self, rec):
+        lid = rec[ID_COLUMN]
+        if not lid:
+            return "unchanged"
+        now = rec[SCRAPED_AT] or time.strftime("%Y-%m-%d %H:%M:%S")
+        prev = self.conn.execute("SELECT data, scraped_at FROM listings WHERE listing_id = ?", (lid,)).fetchone()
+        if prev is None:
+            self.conn.execute(
+                "INSERT INTO listings (listing_id, province, prop_type, price_m, scraped_at, first_seen, changed_at, data)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (lid, rec["Province"], rec["Property Type Slug"], _price(rec["Price"]), now, now, now,
+                 json.dumps(rec, ensure_ascii=False)))
+            return "inserted"
+
+        old = json.loads(prev[0])
+        if prev[1] and now < prev[1]:
+            return "unchanged"  # an older scrape (e.g. importing old CSVs after newer ones)
+        diff = [(f, old.get(f), rec[f]) for f in CSV_COLUMNS if f not in VOLATILE and not _same(f, _text(old.get(f)), rec[f])]
+        if not diff:
+            self.conn.execute("UPDATE listings SET scraped_at = ?, data = ? WHERE listing_id = ?",
+                              (now, json.dumps(rec, ensure_ascii=False), lid))
+            return "unchanged"
+
+        self.conn.executemany(
+            "INSERT INTO listing_history (listing_id, changed_at, field, old, new) VALUES (?, ?, ?, ?, ?)",
+            [(lid, now, f, o, n) for f, o, n in diff])
+        self.conn.execute(
+            "UPDATE listings SET province = ?, prop_type = ?, price_m = ?, scraped_at = ?, changed_at = ?, data = ?"
+            " WHERE listing_id = ?",
+            (rec["Province"], rec["Property Type Slug"], _price(rec["Price"]), now, now,
+             json.dumps(rec, ensure_ascii=False), lid))
+        return "changed"
+
+    def upsert_cards(self, cards, province, prop_type, seen_at=None):
+        """
+        cards: dicts from crawler.parsers.parse_card. Returns the cards whose
+        detail page should be fetched: new ones, ones whose card price or
+        area changed (recorded in listing_history as "Card Price" / "Card
+        Area") and ones still pending from an earlier run.
+        """
+        now = seen_at or time.strftime("%Y-%m-%d %H:%M:%S")
+        need = []
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for c in cards:
+                prev = self.conn.execute("SELECT price, area, detail_pending FROM cards WHERE card_id = ?",
+                                         (c["card_id"],)).fetchone()
+                if prev is None:
+                    known = self._has_listing(c["card_id"])  # detail already scraped by a full run
+                    self.conn.execute(
+                        "INSERT INTO cards (card_id, url, province, prop_type, title, price, area, location, price_m,"
+                        " first_seen, last_seen, changed_at, detail_pending) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                        (c["card_id"], c["url"], province, prop_type, c["title"], c["price"], c["area"],
+                         c["location"], _price(c["price"]), now, now, now,
+                         0 if known else 1))
+                    if not known:
+                        need.append(c)
+                    continue
+                diff = [(f"Card {f.title()}", old, c[f]) for f, old in (("price", prev[0]), ("area", prev[1]))
+                        if old != c[f]]
+                if diff:
+                    self.conn.executemany(
+                        "INSERT INTO listing_history (listing_id, changed_at, field, old, new) VALUES (?, ?, ?, ?, ?)",
+                        [(c["card_id"], now, f, o, n) for f, o, n in diff])
+                pending = 1 if diff else prev[2]
+                self.conn.execute(
+                    "UPDATE cards SET url = ?, title = ?, price = ?, area = ?, location = ?, price_m = ?,"
+                    " last_seen = ?, changed_at = CASE WHEN ? THEN ? ELSE changed_at END, detail_pending = ?"
+                    " WHERE card_id = ?",
+                    (c["url"], c["title"], c["price"], c["area"], c["location"], _price(c["price"]),
+                     now, bool(diff), now, pending, c["card_id"]))
+                if pending:
+                    need.append(c)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return need
+
+    def _has_listing(self, listing_id):
+        return self.conn.execute("SELECT 1 FROM listings WHERE listing_id = ?", (listing_id,)).fetchone() is not None
+
+    def pending_details(self, provinces=None, prop_types=None, limit=None):
+        """(card_id, url, province, prop_type) of cards waiting for a detail fetch."""
+        sql, args = "SELECT card_id, url, province, prop_type FROM cards WHERE detail_pending = 1", []
+        if provinces:
+            sql += f" AND province IN ({', '.join('?' * len(provinces))})"
+            args += list(provinces)
+        if prop_types:
+            sql += f" AND prop_type IN ({', '.join('?' * len(prop_types))})"
+            args += list(prop_types)
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.conn.execute(sql, args).fetchall()
+
+    def details_done(self, card_ids, done_at=None):
+        now = done_at or time.strftime("%Y-%m-%d %H:%M:%S")
+        self.conn.executemany("UPDATE cards SET detail_pending = 0, detail_at = ? WHERE card_id = ?",
+                              [(now, cid) for cid in card_ids])
+
+    def import_csv(self, path, chunksize=50_000):
+        """Load an existing scraped CSV; duplicate IDs collapse into history rows."""
+        counts = {"inserted": 0, "changed": 0, "unchanged": 0}
+        for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize,
+                                 encoding="utf-8-sig"):
+            if SCRAPED_AT in chunk:
+                chunk = chunk.sort_values(SCRAPED_AT, kind="stable")
+            for k, v in self.upsert_rows(chunk.to_dict("records")).items():
+                counts[k] += v
+        return counts
+
+    # ---- reads ----
+    def ids(self, province=None, prop_type=None):
+        sql, args = "SELECT listing_id FROM listings WHERE 1=1", []
+        if province:
+            sql, args = sql + " AND province = ?", args + [province]
+        if prop_type:
+            sql, args = sql + " AND prop_type = ?", args + [prop_type]
+        return {r[0] for r in self.conn.execute(sql, args)}
+
+    def changes_since(self, since, field=None):
+        """History rows with changed_at >= since, newest first, as a DataFrame."""
+        sql = ("SELECT h.listing_id, h.changed_at, h.field, h.old, h.new, l.province, l.prop_type"
+               " FROM listing_history h JOIN listings l USING (listing_id) WHERE h.changed_at >= ?")
+        args = [since]
+        if field:
+            sql, args = sql + " AND h.field = ?", args + [field]
+        return pd.read_sql_query(sql + " ORDER BY h.changed_at DESC", self.conn, params=args)
+
+    def new_since(self, since):
+        return pd.read_sql_query(
+            "SELECT listing_id, province, prop_type, price_m, first_seen FROM listings"
+            " WHERE first_seen >= ? ORDER BY first_seen DESC", self.conn, params=[since])
+
+    def history(self, listing_id):
+        return pd.read_sql_query(
+            "SELECT changed_at, field, old, new FROM listing_history WHERE listing_id = ? ORDER BY changed_at",
+            self.conn, params=[listing_id])
+
+    def stats(self):
+        n, provinces = self.conn.execute("SELECT COUNT(*), COUNT(DISTINCT province) FROM listings").fetchone()
+        h = self.conn.execute("SELECT COUNT(*) FROM listing_history").fetchone()[0]
+        cards, pending = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(detail_pending), 0) FROM cards").fetchone()
+        return {"listings": n, "provinces": provinces, "history_rows": h,
+                "cards": cards, "details_pending": pending}
+
+    def export_csvs(self, out_dir):
+        """Latest version of every listing as <out_dir>/<province>.csv (the layout appendData reads)."""
+        os.makedirs(out_dir, exist_ok=True)
+        written = {}
+        provinces = [r[0] for r in self.conn.execute("SELECT DISTINCT province FROM listings ORDER BY province")]
+        for province in provinces:
+            path = os.path.join(out_dir, f"{province}.csv")
+            with open(path, "w", newline="", encoding="utf-8-sig") as f:
+                w = csv.writer(f)
+                w.writerow(CSV_COLUMNS)
+                n = 0
+                for (data,) in self.conn.execute(
+                        "SELECT data FROM listings WHERE province IS ? ORDER BY listing_id", (province,)):
+                    rec = json.loads(data)
+                    w.writerow([rec.get(c) for c in CSV_COLUMNS])
+                    n += 1
+            written[path] = n
+        return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the listing store.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name in ("stats", "changes", "new", "history", "export", "import"):
+        p = sub.add_parser(name)
+        p.add_argument("--db", required=True)
+        if name in ("changes", "new"):
+            p.add_argument("--since", required=True, help='e.g. "2025-06-01" or "2025-06-01 08:00:00"')
+        if name == "changes":
+            p.add_argument("--field", default=None, help='only this column, e.g. "Price"')
+        if name == "history":
+            p.add_argument("listing_id")
+        if name == "export":
+            p.add_argument("--out", required=True, help="folder for <province>.csv files")
+        if name == "import":
+            p.add_argument("csvs", nargs="+", help="scraped CSVs (globs allowed)")
+    args = parser.parse_args(argv)
+
+    store = ListingStore(args.db)
+    if args.cmd == "stats":
+        print(store.stats())
+    elif args.cmd == "changes":
+        print(store.changes_since(args.since, args.field).to_string(index=False))
+    elif args.cmd == "new":
+        print(store.new_since(args.since).to_string(index=False))
+    elif args.cmd == "history":
+        print(store.history(args.listing_id).to_string(index=False))
+    elif args.cmd == "export":
+        for path, n in store.export_csvs(args.out).items():
+            print(f"✅ {path}: {n} listings")
+    elif args.cmd == "import":
+        for pattern in args.csvs:
+            for path in sorted(glob.glob(pattern)):
+                print(f"📥 {path}: {store.import_csv(path)}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
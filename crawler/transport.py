@@ -0,0 +1,122 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import httpx
+except ImportError:  # optional: only needed for --transport httpx
+    httpx = None
+
+# —————————————————————————
+# Fetch transports for the scraper.
+#
+#   requests  HTTP/1.1; every in-flight request holds its own pooled
+#             connection (default)
+#   httpx     HTTP/2 when the server offers it (pip install "httpx[http2]"):
+#             all detail requests to the site share a few multiplexed
+#             connections instead of one socket per worker thread
+#
+# Both send Accept-Encoding with every codec the installed decoders support
+# (gzip/deflate, plus br with brotli, zstd with zstandard). Each response
+# gets `wire_bytes` (body bytes as received, before decompression) next to
+# its decoded `content`, and summary() tells which HTTP versions and
+# content encodings the server actually used.
+# —————————————————————————
+TRANSPORTS = ("requests", "httpx")
+# what a request that ran out of time raises, whichever transport sent it
+TIMEOUT_ERRORS = (requests.Timeout,) + ((httpx.TimeoutException,) if httpx is not None else ())
+UNCOMPRESSED_WARN_BYTES = 16 * 1024  # warn once when a page this big arrives without Content-Encoding
+
+
+class _Transport:
+    name = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.http_versions = {}   # "HTTP/1.1" / "HTTP/2" -> responses
+        self.encodings = {}       # Content-Encoding ("identity" when none) -> responses
+        self.wire_bytes = 0
+        self.bytes = 0
+        self._warned = False
+
+    def _count(self, version, encoding, wire, decoded):
+        with self._lock:
+            self.http_versions[version] = self.http_versions.get(version, 0) + 1
+            self.encodings[encoding] = self.encodings.get(encoding, 0) + 1
+            self.wire_bytes += wire
+            self.bytes += decoded
+            warn = encoding == "identity" and decoded > UNCOMPRESSED_WARN_BYTES and not self._warned
+            self._warned |= warn
+        if warn:
+            print(f"⚠️ Server sent {decoded / 1024:.0f} KB uncompressed although we accept {ACCEPT_ENCODING}")
+
+    def summary(self):
+        with self._lock:
+            return {"transport": self.name, "http_versions": dict(self.http_versions),
+                    "encodings": dict(self.encodings), "wire_bytes": self.wire_bytes, "bytes": self.bytes,
+                    "compression_ratio": round(self.bytes / self.wire_bytes, 2) if self.wire_bytes else None}
+
+
+class RequestsTransport(_Transport):
+    name = "requests"
+
+    def __init__(self, headers, pool_size=16, proxy=None):
+        super().__init__()
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        if proxy:
+            self.session.proxies = {"http": proxy, "https": proxy}
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        # the default pool keeps 10 connections per host; more workers than
+        # that would open and drop a fresh connection per request
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url, timeout):
+        resp = self.session.get(url, timeout=timeout)
+        # urllib3 counts the body bytes it read off the socket, before decoding
+        resp.wire_bytes = resp.raw.tell() if resp.raw is not None else len(resp.content)
+        version = {10: "HTTP/1.0", 11: "HTTP/1.1"}.get(getattr(resp.raw, "version", 11), "HTTP/1.1")
+        self._count(version, resp.headers.get("Content-Encoding", "identity"), resp.wire_bytes, len(resp.content))
+        return resp
+
+    def close(self):
+        self.session.close()
+
+
+class HttpxTransport(_Transport):
+    name = "httpx"
+
+    def __init__(self, headers, pool_size=16, proxy=None, http2=True):
+        super().__init__()
+        if httpx is None:
+            raise RuntimeError('--transport httpx needs httpx: pip install "httpx[http2]"')
+        try:
+            self.client = httpx.Client(
+                http2=http2, headers=headers, follow_redirects=True, proxy=proxy,
+                # with HTTP/2 one connection carries every stream; the limit only matters for HTTP/1.1 fallbacks
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+        except ImportError as err:  # http2=True without the h2 package
+            raise RuntimeError('HTTP/2 needs the h2 package: pip install "httpx[http2]"') from err
+
+    def get(self, url, timeout):
+        resp = self.client.get(url, timeout=timeout)
+        resp.wire_bytes = resp.num_bytes_downloaded
+        self._count(resp.http_version, resp.headers.get("Content-Encoding", "identity"),
+                    resp.wire_bytes, len(resp.content))
+        return resp
+
+    def close(self):
+        self.client.close()
+
+
+def make_transport(name, headers, pool_size=16, proxy=None):
+    """Transport by name ('requests' or 'httpx'); responses have .status_code, .text, .content, .wire_bytes."""
+    if name == "requests":
+        return RequestsTransport(headers, pool_size, proxy)
+    if name == "httpx":
+        return HttpxTransport(headers, pool_size, proxy)
+    raise ValueError(f"unknown transport {name!r}; expected one of {TRANSPORTS}")
@@ -1,23 +1,164 @@
-from scripts import appendData, cleanData, imputeData, preprocessData, descStats, makePublicData
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
 
-def run_pipeline():
-    print("\n🧩 Step 1: Appending CSVs...")
-    appendData.run()
+from scripts import appendData, cleanData, imputeData, preprocessData, dedupData, aggregateData, descStats, makePublicData, queryData, geoIndex, downloadImages
+from scripts.profiling import profile_step
 
-    print("\n🧼 Step 2: Imputing variables...")
-    imputeData.run()
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(ROOT, "preprocessed-data", ".pipeline_state.json")
+REPORT_PATH = os.path.join(ROOT, "preprocessed-data", "run_report.json")
+PROFILE_DIR = os.path.join(ROOT, "preprocessed-data", "profiles")
 
-    print("\n🔍 Step 3: Cleaning data...")
-    cleanData.run()
+# (name, header, module) in run order
+STEPS = [
+    ("appendData",     "🧩 Step 1: Appending CSVs...",          appendData),
+    ("imputeData",     "🧼 Step 2: Imputing variables...",      imputeData),
+    ("cleanData",      "🔍 Step 3: Cleaning data...",           cleanData),
+    ("preprocessData", "🧠 Step 4: Preprocessing data...",      preprocessData),
+    ("dedupData",      "👯 Step 5: Finding near-duplicates...", dedupData),
+    ("aggregateData",  "🧊 Step 6: Updating aggregate cube...", aggregateData),
+    ("descStats",      "📊 Step 7: Descriptive stats...",       descStats),
+    ("makePublicData", "🔓 Step 8: Making public dataset...",   makePublicData),
+    ("queryData",      "🔎 Step 9: Building query database...", queryData),
+    ("geoIndex",       "🗺️ Step 10: Building geo index...",     geoIndex),
+    ("downloadImages", "🖼️ Step 11: Downloading images...",     downloadImages),
+]
+STEP_NAMES = [name for name, _, _ in STEPS]
 
-    print("\n🧠 Step 4: Preprocessing data...")
-    preprocessData.run()
+# —————————————————————————
+# FINGERPRINTS
+# —————————————————————————
+def _expand(patterns):
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(os.path.join(ROOT, pattern))))
+    return paths
 
-    print("\n📊 Step 5: Descriptive stats...")
-    descStats.run()
 
-    print("\n🔓 Step 6: Making public dataset...")
-    makePublicData.run()
+def files_fingerprint(patterns) -> str:
+    """make-style: path + size + mtime of every matching file."""
+    h = hashlib.sha256()
+    for path in _expand(patterns):
+        st = os.stat(path)
+        h.update(f"{os.path.relpath(path, ROOT)}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def code_version(module) -> str:
+    """Hash of the step's source plus the helper modules it imports from scripts/."""
+    files = {inspect.getsourcefile(module)}
+    for obj in vars(module).values():
+        owner = getattr(obj, "__module__", None)
+        if owner and owner.startswith("scripts.") and owner in sys.modules:
+            files.add(inspect.getsourcefile(sys.modules[owner]))
+    h = hashlib.sha256()
+    for path in sorted(files):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    with open(STATE_PATH, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def is_up_to_date(name, module, state) -> bool:
+    outputs = getattr(module, "OUTPUTS", [])
+    if not outputs:
+        return False  # report-only steps always run
+    if not all(os.path.exists(os.path.join(ROOT, p)) for p in outputs):
+        return False
+    prev = state.get(name)
+    return bool(prev) and prev == {
+        "code": code_version(module),
+        "inputs": files_fingerprint(module.INPUTS),
+        "outputs": files_fingerprint(outputs),
+    }
+
+# —————————————————————————
+# PIPELINE
+# —————————————————————————
+def run_pipeline(start=None, only=None, force=False, profile=False, cprofile=False, images=False):
+    """
+    Run the steps in order, skipping any whose inputs, outputs and code are
+    unchanged since its last successful run.
+
+    start:    first step to run; it and every later step are re-run.
+    only:     run just these steps (always re-run).
+    force:    ignore the cache entirely.
+    profile:  write wall/CPU time, peak RSS and rows/s per step to run_report.json.
+    cprofile: also dump a cProfile file per step into preprocessed-data/profiles/.
+    images:   include the OPTIONAL steps (image download), which otherwise run only with --only.
+    """
+    state = _load_state()
+    profile = profile or cprofile
+    report = {"started": time.strftime("%Y-%m-%d %H:%M:%S"), "steps": []}
+    first = STEP_NAMES.index(start) if start else 0
+
+    for i, (name, header, module) in enumerate(STEPS):
+        if only and name not in only:
+            continue
+        if not only and i < first:
+            continue
+        if getattr(module, "OPTIONAL", False) and not images and not only:
+            continue
+        print(f"\n{header}")
+        forced = force or bool(only) or (start is not None)
+        if not forced and is_up_to_date(name, module, state):
+            print(f"⏩ Skipping {name}: inputs and code unchanged since last run.")
+            report["steps"].append({"step": name, "status": "skipped"})
+            continue
+
+        if profile:
+            _, record = profile_step(name, module.run, PROFILE_DIR if cprofile else None)
+            report["steps"].append(record)
+            print(f"⏱️ {name}: {record['wall_s']}s wall, {record['cpu_s']}s CPU, "
+                  f"peak {record['rss_peak_mb']} MB, {record.get('rows_per_s', '-')} rows/s")
+        else:
+            module.run()
+
+        state[name] = {
+            "code": code_version(module),
+            "inputs": files_fingerprint(module.INPUTS),
+            "outputs": files_fingerprint(getattr(module, "OUTPUTS", [])),
+        }
+        _save_state(state)
+
+    if profile:
+        report["total_wall_s"] = round(sum(r.get("wall_s", 0) for r in report["steps"]), 3)
+        with open(REPORT_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Run report saved to {REPORT_PATH}")
 
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser(description="Run the guland cleaning pipeline.")
+    parser.add_argument("--from", dest="start", choices=STEP_NAMES,
+                        help="re-run this step and every step after it")
+    parser.add_argument("--only", nargs="+", choices=STEP_NAMES,
+                        help="run only these steps")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore cached results and run every step")
+    parser.add_argument("--profile", action="store_true",
+                        help="record time, CPU, peak memory and rows/s per step in run_report.json")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="like --profile, plus a cProfile dump per step")
+    parser.add_argument("--images", action="store_true",
+                        help="also download listing images (scripts/downloadImages.py)")
+    args = parser.parse_args()
+    run_pipeline(start=args.start, only=args.only, force=args.force,
+                 profile=args.profile, cprofile=args.cprofile, images=args.images)
@@ -1,10 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-import time, re, os
+import argparse, threading, time, os
 from tqdm import tqdm
-from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from scripts.schema import CSV_COLUMNS, apply_schema
+from crawler.parsers import detail_urls, parse_card, parse_detail_html, parse_listing_html
+from crawler.metrics import CrawlMetrics, JsonLinesReporter, serve_metrics
+from crawler.coordinator import LeaseLost, WorkQueue, default_worker_id, unit_key
+from crawler.sharding import page_ranges, probe_last_page
+from crawler.store import ListingStore
+from crawler.idset import IdSet
+from crawler.transport import TIMEOUT_ERRORS, TRANSPORTS, make_transport
+from crawler.latency import HEDGE_BUDGET, Hedger, LatencyTracker, TokenBucket
+from crawler.proxies import ProxyPool, load_proxies
+from crawler.autotune import ConcurrencyTuner
 
 # ========================
 # CONFIGURATION
@@ -12,30 +20,31 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 MAX_WORKERS = 16   # number of parallel threads for detail pages
 PAGE_SLEEP = 2     # pause between listing pages (seconds)
-DETAIL_TIMEOUT = 15  # timeout for detail requests (seconds)
+DETAIL_TIMEOUT = 15  # timeout ceiling (seconds); the actual timeout follows observed latency
 CUTOFF_COUNT = 45  # stop paginating if fewer listings than this on a page
+SHARD_PAGES = 0    # >0: split each combo into page ranges of this size (probes the page count first)
+RANGE_WORKERS = 1  # page ranges of one combo scraped at the same time
+CARDS_MODE = False     # harvest listing cards into the store; detail pages only for new / re-priced cards
+DEFER_DETAILS = False  # with CARDS_MODE: leave detail pages pending for a later --fetch-pending run
 # ========================
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 output_dir = os.path.join(script_dir, "scraped-data")
-os.makedirs(output_dir, exist_ok=True)
 checkpoint_dir = os.path.join(output_dir, "checkpoint")
-os.makedirs(checkpoint_dir, exist_ok=True)
 checkpoint_path = os.path.join(checkpoint_dir, "done.log")
+per_run_checkpoint = False  # set_output_dir: True when the checkpoint is cleared after a complete run
 
 listing_base = "https://guland.vn"
 
-session = requests.Session()
-session.headers.update(HEADERS)
+transport = make_transport("requests", HEADERS, MAX_WORKERS)  # replaced in main() per --transport / --workers
 
-CSV_COLUMNS = [
-    "Title","Price","Area","Location","Listing ID","Last Updated",
-    "Property Type","Width","Length","Bedrooms","Bathrooms","Floors",
-    "Position","Direction","Alley Width","Road Type",
-    "Description","URL","Latitude","Longitude","VIP Account","Images",
-    "Avatar","Agent Role","Agent Name","Agent Listing Count",
-    "Province","Property Type Slug","Scraped At"
-]
+metrics = CrawlMetrics()
+write_lock = threading.Lock()  # CSV / id-log / checkpoint appends from parallel page ranges
+store = None  # ListingStore when --store is given; rows are upserted there instead of appended to CSVs
+latency = {kind: LatencyTracker(DETAIL_TIMEOUT) for kind in ("listing", "detail")}
+limiter = TokenBucket(None)  # --max-rps; every request takes a token, hedges too
+hedger = None  # Hedger for detail pages when --hedge is given
+tuner = None   # ConcurrencyTuner when --autotune is given; it sets how many detail pages are in flight
 
 province_slugs = {
     "soc-trang": "Sóc Trăng",
@@ -108,186 +117,251 @@ property_types = [
     "kho-nha-xuong", "van-phong", "phong-tro", "khach-san"
 ]
 
+# ----------------------------
+# INSTRUMENTED FETCH
+# ----------------------------
+def fetch(url, kind):
+    """
+    transport.get that records latency, status and size under `kind`
+    (listing/detail). The timeout follows that kind's recent latency; with
+    --hedge, a detail page that is slower than usual is requested twice.
+    A request that runs past the adaptive timeout is retried once with the
+    full DETAIL_TIMEOUT, so a merely slow page is still fetched.
+    """
+    tracker = latency[kind]
+
+    def send(timeout):
+        waited = limiter.acquire()
+        if waited:
+            metrics.throttled(waited)
+        t0 = time.perf_counter()
+        try:
+            resp = transport.get(url, timeout=timeout)
+        except Exception as err:
+            elapsed = time.perf_counter() - t0
+            metrics.observe_request(kind, elapsed, error=err)
+            if elapsed >= timeout:
+                tracker.observe(elapsed)  # keep timeouts in the window so they can't ratchet down
+            if tuner is not None and kind == "detail":
+                tuner.observe_response(False, waited)
+            raise
+        elapsed = time.perf_counter() - t0
+        tracker.observe(elapsed)
+        metrics.observe_request(kind, elapsed, resp.status_code, len(resp.content), resp.wire_bytes)
+        if tuner is not None and kind == "detail":
+            tuner.observe_response(resp.status_code not in (403, 429) and resp.status_code < 500, waited)
+        return resp
+
+    def attempt():
+        timeout = tracker.timeout()
+        metrics.set_gauge(f"{kind}_timeout_s", round(timeout, 2))
+        try:
+            return send(timeout)
+        except TIMEOUT_ERRORS:
+            if timeout >= DETAIL_TIMEOUT:
+                raise
+            metrics.add_gauge("timeout_retries", 1)
+            return send(DETAIL_TIMEOUT)
+
+    if hedger is not None and kind == "detail":
+        resp = hedger.call(attempt)
+        metrics.set_gauge("hedges", hedger.hedges)
+        metrics.set_gauge("hedge_wins", hedger.hedge_wins)
+        return resp
+    return attempt()
+
 # ----------------------------
 # DETAIL PAGE PARSER (worker)
 # ----------------------------
 def parse_detail(full_url, province, prop_type):
+    if tuner is not None:
+        return tuner.run(_parse_detail, full_url, province, prop_type)
+    return _parse_detail(full_url, province, prop_type)
+
+
+def _parse_detail(full_url, province, prop_type):
+    metrics.add_gauge("detail_active", 1)
     try:
-        resp = session.get(full_url, timeout=DETAIL_TIMEOUT)
+        resp = fetch(full_url, "detail")
         if resp.status_code != 200:
             return None
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        listing_id = "N/A"
-        for span in soup.select(".dtl-stl__row span"):
-            if "Mã tin" in span.get_text():
-                b = span.find("b")
-                if b:
-                    listing_id = b.get_text(strip=True)
-                break
-
-        title_tag = soup.select_one(".dtl-tle")
-        if title_tag:
-            vip_tag = title_tag.select_one(".vrf-bdg")
-            is_vip = bool(vip_tag)
-            if vip_tag:
-                vip_tag.extract()
-            title = title_tag.get_text(strip=True)
-        else:
-            is_vip, title = False, "N/A"
-
-        def safe_text(sel):
-            tag = soup.select_one(sel)
-            return tag.get_text(strip=True) if tag else "N/A"
-
-        price = safe_text(".dtl-prc__ttl")
-        area = safe_text(".dtl-prc__dtc")
-        location = safe_text(".dtl-stl__row > span")
-
-        updated_time = "N/A"
-        for span in soup.select(".dtl-stl__row span"):
-            text = span.get_text()
-            if "Cập nhật" in text:
-                updated_time = text.replace("Cập nhật", "").strip()
-
-        def get_detail_value(label):
-            tag = soup.find("div", class_="s-dtl-inf__lbl", string=lambda x: x and label in x)
-            return tag.find_next_sibling("div").get_text(strip=True) if tag else "N/A"
-
-        property_type_label = get_detail_value("Loại BĐS")
-        width = get_detail_value("Chiều ngang")
-        length = get_detail_value("Chiều dài")
-        bedrooms = get_detail_value("Số phòng ngủ")
-        bathrooms = get_detail_value("Số phòng tắm")
-        floors = get_detail_value("Số tầng")
-        position = get_detail_value("Vị trí")
-        direction = get_detail_value("Hướng cửa chính")
-        alley_width = get_detail_value("Đường/hẻm vào rộng")
-        road_type = get_detail_value("Loại đường")
-
-        description = safe_text(".dtl-inf__dsr")
-
-        gps_link = soup.select_one("a.map-direction")
-        latitude = longitude = "N/A"
-        if gps_link:
-            href = gps_link.get("href", "")
-            match = re.search(r'query=([\d.]+),([\d.]+)', href)
-            if match:
-                latitude, longitude = match.group(1), match.group(2)
-
-        image_urls = []
-        for div in soup.select(".media-thumb-wrap__inner"):
-            style = div.get("style", "")
-            match = re.search(r"url\('([^']+)'\)", style)
-            if match:
-                url = match.group(1)
-                if not url.endswith("map-icon.jpg"):
-                    image_urls.append(url)
-        images = "; ".join(image_urls) if image_urls else "N/A"
-
-        avatar_url, agent_role, agent_name, agent_listing_count = "N/A", "N/A", "N/A", "N/A"
-        avatar_tag = soup.select_one(".dtl-aut__avt img")
-        if avatar_tag and "profile.png" not in avatar_tag.get("src", ""):
-            avatar_url = avatar_tag["src"]
-
-        role_tag = soup.select_one(".dtl-aut__rol")
-        if role_tag: agent_role = role_tag.get_text(strip=True)
-        name_tag = soup.select_one(".dtl-aut__tle")
-        if name_tag: agent_name = name_tag.get_text(strip=True)
-        listing_count_tag = soup.select_one(".dtl-aut__stl")
-        if listing_count_tag:
-            m = re.search(r'(\d+)', listing_count_tag.get_text())
-            if m: agent_listing_count = m.group(1)
-
-        scraped_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        return [
-            title, price, area, location, listing_id, updated_time,
-            property_type_label, width, length, bedrooms, bathrooms, floors,
-            position, direction, alley_width, road_type,
-            description, full_url, latitude, longitude, is_vip, images,
-            avatar_url, agent_role, agent_name, agent_listing_count,
-            province, prop_type, scraped_at
-        ]
+        t0 = time.perf_counter()
+        row = parse_detail_html(resp.text, full_url, province, prop_type)
+        metrics.observe_parse("detail", time.perf_counter() - t0)
+        return row
     except Exception:
         return None
+    finally:
+        metrics.add_gauge("detail_active", -1)
 
 # ----------------------------
 # PARALLEL FETCH FOR A PAGE
 # ----------------------------
-def fetch_page_details(listings, province, prop_type, seen_ids, max_workers=MAX_WORKERS):
-    urls = []
-    for item in listings:
-        link = item.select_one(".c-sdb-card__tle a")
-        if link and link.get("href"):
-            href = link["href"]
-            full_url = href if "http" in href else listing_base + href
-            urls.append(full_url)
-
-    results = []
+def fetch_details(urls, province, prop_type, max_workers=MAX_WORKERS):
+    """Yields (url, row) for every detail page that parsed, in completion order."""
+    metrics.set_gauge("detail_pending", len(urls))
     with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futures = [ex.submit(parse_detail, url, province, prop_type) for url in urls]
+        futures = {ex.submit(parse_detail, url, province, prop_type): url for url in urls}
         for fut in as_completed(futures):
+            metrics.add_gauge("detail_pending", -1)
             res = fut.result()
             if res:
-                listing_id = res[4]  # position of Listing ID
-                if listing_id not in seen_ids:
-                    seen_ids.add(listing_id)
-                    results.append(res)
+                yield futures[fut], res
+
+
+def fetch_page_details(listings, province, prop_type, seen_ids, max_workers=MAX_WORKERS):
+    results = []
+    for _, res in fetch_details(detail_urls(listings, listing_base), province, prop_type, max_workers):
+        listing_id = res[4]  # position of Listing ID
+        if store is None:
+            # CSVs are append-only, so a listing is written once; the store instead
+            # upserts every listing it sees again and records what changed
+            with write_lock:  # page ranges of one combo share seen_ids
+                if listing_id in seen_ids:
+                    continue
+                seen_ids.add(listing_id)
+        results.append(res)
     return results
 
 # ----------------------------
-# MAIN LOOP
+# CARD-ONLY HARVEST (--cards)
 # ----------------------------
-for province in province_slugs:
-    outpath = os.path.join(output_dir, f"{province}.csv")
-    for prop_type in property_types:
-        try:
-            checkpoint_key = f"{province}|{prop_type}"
-            if os.path.exists(checkpoint_path) and checkpoint_key in open(checkpoint_path).read():
-                print(f"⏩ Skipping {checkpoint_key}, already scraped.")
-                continue
+def store_details(pending, province, prop_type):
+    """Fetch detail pages for [(card_id, url)], upsert the rows and clear their pending flag."""
+    card_of = dict((url, card_id) for card_id, url in pending)
+    fetched = list(fetch_details(list(card_of), province, prop_type, max_workers=MAX_WORKERS))
+    with write_lock:
+        if fetched:
+            counts = store.upsert_rows([row for _, row in fetched])
+            metrics.add_gauge("store_changed", counts["changed"])
+        store.details_done([card_of[url] for url, _ in fetched])
+    return len(fetched)
+
+
+def harvest_cards(listings, province, prop_type):
+    """
+    Card fields of one listing page into the store. Detail pages are fetched
+    only for cards that are new or whose price/area changed (unless
+    DEFER_DETAILS); returns the number of detail rows written.
+    """
+    cards = [c for c in (parse_card(item, listing_base) for item in listings) if c]
+    with write_lock:
+        need = store.upsert_cards(cards, province, prop_type)
+    metrics.add_gauge("cards_harvested", len(cards))
+    print(f"🃏 {len(cards)} cards, {len(need)} need a detail fetch"
+          + (" (deferred)" if DEFER_DETAILS and need else ""))
+    if DEFER_DETAILS or not need:
+        return 0
+    return store_details([(c["card_id"], c["url"]) for c in need], province, prop_type)
+
+
+def fetch_pending(provinces=None, prop_types=None, batch=500):
+    """Drain the detail pages left pending by --cards --defer-details runs."""
+    total = 0
+    while True:
+        pending = store.pending_details(provinces, prop_types, limit=batch)
+        if not pending:
+            break
+        groups = {}
+        for card_id, url, province, prop_type in pending:
+            groups.setdefault((province, prop_type), []).append((card_id, url))
+        n = 0
+        for (province, prop_type), jobs in groups.items():
+            n += store_details(jobs, province, prop_type)
+        if n == 0:
+            print(f"⚠️ None of {len(pending)} pending detail pages could be fetched; leaving them pending")
+            break
+        total += n
+        print(f"📥 {total} pending detail pages fetched")
+    return total
+
+# ----------------------------
+# CHECKPOINTS
+# ----------------------------
+def done_keys():
+    if checkpoint_path is None or not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path, encoding="utf-8") as f:
+        return set(line.strip() for line in f)
+
+
+def mark_done(key):
+    if checkpoint_path is None:
+        return
+    with write_lock, open(checkpoint_path, "a", encoding="utf-8") as log:
+        log.write(f"{key}\n")
 
-            # load seen IDs for this combo
-            id_log_path = os.path.join(checkpoint_dir, f"{province}_{prop_type}_ids.log")
-            seen_ids = set()
-            if os.path.exists(id_log_path):
-                with open(id_log_path, "r", encoding="utf-8") as f:
-                    seen_ids = set(line.strip() for line in f if line.strip())
-
-            print(f"\n🌍 Scraping {province} - {prop_type}")
-            page = 1
-            total_written = 0
-            while True:
-                print(f"\n🔎 Page {page}...")
-                url = f"https://guland.vn/mua-ban-{prop_type}-{province}?page={page}"
-                response = session.get(url, timeout=DETAIL_TIMEOUT)
-                if response.status_code != 200:
-                    print(f"❌ Failed at page {page}")
-                    break
-
-                soup = BeautifulSoup(response.text, "html.parser")
-                listings = soup.select(".l-sdb-list__single")
-
-                if not listings:
-                    print("✅ No more listings found.")
-                    break
-
-                print(f"📦 {len(listings)} listings on page {page}")
-
-                # cutoff condition
-                last_page = False
-                if len(listings) < CUTOFF_COUNT:
-                    print(f"ℹ️ Less than {CUTOFF_COUNT} listings → scrape this page and stop pagination after.")
-                    last_page = True
-
-                # parallel scrape detail pages
-                page_results = fetch_page_details(listings, province, prop_type, seen_ids, max_workers=MAX_WORKERS)
-
-                # --- write CSV incrementally (per page) ---
-                if page_results:
+
+def load_seen_ids(province, prop_type):
+    """IDs already scraped for a combo: memory-mapped snapshot (_ids.npy) + journal (_ids.log)."""
+    id_log_path = os.path.join(checkpoint_dir, f"{province}_{prop_type}_ids.log")
+    return IdSet.load(id_log_path), id_log_path
+
+# ----------------------------
+# PAGES OF ONE PROVINCE × PROPERTY TYPE
+# ----------------------------
+def listing_url(province, prop_type, page):
+    return f"{listing_base}/mua-ban-{prop_type}-{province}?page={page}"
+
+
+def count_listings(province, prop_type, page):
+    """Number of cards on one listing page (used to probe the page count)."""
+    response = fetch(listing_url(province, prop_type, page), "listing")
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code} probing page {page}")
+    time.sleep(PAGE_SLEEP)
+    metrics.throttled(PAGE_SLEEP)
+    return len(parse_listing_html(response.text))
+
+
+def scrape_pages(province, prop_type, seen_ids, id_log_path, page_start=1, page_end=None,
+                 on_page=None, progress_key=None):
+    """Pages page_start..page_end (or until the cutoff); returns listings written."""
+    outpath = os.path.join(output_dir, f"{province}.csv")
+    progress_key = progress_key or f"{province}|{prop_type}"
+    page = page_start
+    total_written = 0
+    while page_end is None or page <= page_end:
+        print(f"\n🔎 Page {page}...")
+        response = fetch(listing_url(province, prop_type, page), "listing")
+        if response.status_code != 200:
+            print(f"❌ Failed at page {page}")
+            break
+
+        t0 = time.perf_counter()
+        listings = parse_listing_html(response.text)
+        metrics.observe_parse("listing", time.perf_counter() - t0)
+
+        if not listings:
+            print("✅ No more listings found.")
+            break
+
+        print(f"📦 {len(listings)} listings on page {page}")
+
+        # cutoff condition
+        last_page = False
+        if len(listings) < CUTOFF_COUNT:
+            print(f"ℹ️ Less than {CUTOFF_COUNT} listings → scrape this page and stop pagination after.")
+            last_page = True
+
+        if CARDS_MODE:
+            # cards go straight to the store; details only where needed
+            n_written = harvest_cards(listings, province, prop_type)
+            page_results = []
+        else:
+            # parallel scrape detail pages
+            page_results = fetch_page_details(listings, province, prop_type, seen_ids, max_workers=MAX_WORKERS)
+            n_written = len(page_results)
+
+        # --- write CSV incrementally (per page) ---
+        if page_results:
+            with write_lock:
+                if store is not None:
+                    counts = store.upsert_rows(page_results)
+                    metrics.add_gauge("store_changed", counts["changed"])
+                else:
                     write_header = not os.path.exists(outpath)
-                    df_page = pd.DataFrame(page_results, columns=CSV_COLUMNS)
+                    df_page = apply_schema(pd.DataFrame(page_results, columns=CSV_COLUMNS), "raw")
                     df_page.to_csv(outpath, mode='a', header=write_header, index=False, encoding='utf-8-sig')
 
                     # only AFTER a successful CSV write, append IDs to the id-log
@@ -295,21 +369,295 @@ for province in province_slugs:
                         for row in page_results:
                             f.write(row[4] + "\n")  # Listing ID
 
-                    total_written += len(page_results)
+        total_written += n_written
+        metrics.page_done(progress_key, n_written)
+        if on_page:
+            on_page()
+
+        page += 1
+        if last_page:
+            break
+        time.sleep(PAGE_SLEEP)
+        metrics.throttled(PAGE_SLEEP)
+    return total_written
+
+# ----------------------------
+# ONE PROVINCE × PROPERTY TYPE (or a page range of it)
+# ----------------------------
+def scrape_combo(province, prop_type, on_page=None, page_start=1, page_end=None):
+    """Scrape one combo, or one page range of it; returns the number of listings written.
+
+    on_page() is called after each page is saved (distributed mode renews
+    its lease there and may raise LeaseLost to abandon the combo).
+
+    With SHARD_PAGES set, a whole combo is first probed for its page count
+    and split into ranges of SHARD_PAGES pages, RANGE_WORKERS at a time.
+    Each range is checkpointed on its own, so a resumed crawl only redoes
+    the unfinished ranges.
+    """
+    checkpoint_key = unit_key(province, prop_type, page_start, page_end)
+    done = done_keys()
+    if checkpoint_key in done:
+        print(f"⏩ Skipping {checkpoint_key}, already scraped.")
+        metrics.combo_skipped()
+        return 0
+
+    seen_ids, id_log_path = load_seen_ids(province, prop_type)
+    print(f"\n🌍 Scraping {checkpoint_key}")
+
+    whole_combo = page_start == 1 and page_end is None
+    ranges = None
+    if SHARD_PAGES and whole_combo:
+        last = probe_last_page(lambda p: count_listings(province, prop_type, p), CUTOFF_COUNT)
+        ranges = page_ranges(last, SHARD_PAGES)
+        print(f"📐 {checkpoint_key}: ~{last} pages → {len(ranges)} range(s) of {SHARD_PAGES}")
+        metrics.combo_started(checkpoint_key, expected_pages=last)
+    else:
+        metrics.combo_started(checkpoint_key)
+
+    if ranges and len(ranges) > 1:
+        def run_range(rng):
+            key = unit_key(province, prop_type, *rng)
+            if key in done:
+                print(f"⏩ Skipping {key}, already scraped.")
+                return 0
+            n = scrape_pages(province, prop_type, seen_ids, id_log_path, *rng, progress_key=checkpoint_key)
+            mark_done(key)
+            return n
+
+        with ThreadPoolExecutor(max_workers=RANGE_WORKERS) as ex:
+            total_written = sum(ex.map(run_range, ranges))
+    else:
+        total_written = scrape_pages(province, prop_type, seen_ids, id_log_path, page_start, page_end,
+                                     on_page=on_page, progress_key=checkpoint_key)
+
+    if whole_combo:
+        # fold this run's IDs into the snapshot; ranges leave that to the whole
+        # combo (or, in queue mode, to the worker finishing its last range),
+        # since other workers may still be appending to the journal
+        seen_ids.compact(id_log_path)
+
+    # mark the combo (or range) as done
+    mark_done(checkpoint_key)
+    metrics.combo_done(checkpoint_key)
+
+    print(f"✅ Saved {total_written} listings for {checkpoint_key}")
+    return total_written
 
-                page += 1
-                if last_page:
-                    break
-                time.sleep(PAGE_SLEEP)
+# ----------------------------
+# DISTRIBUTED WORKER
+# ----------------------------
+def run_worker(queue, worker_id, lease_seconds):
+    """Lease combos from the shared queue until none are left anywhere."""
+    while True:
+        unit = queue.lease(worker_id, lease_seconds)
+        if unit is None:
+            if "leased" in queue.status():
+                # others still working; their units come back if a lease expires
+                time.sleep(min(30, lease_seconds / 4))
+                continue
+            print("🏁 Queue drained.")
+            return
 
-            # mark province|prop_type as done
-            with open(checkpoint_path, "a") as log:
-                log.write(f"{checkpoint_key}\n")
+        print(f"\n📥 {worker_id} leased {unit.unit_id} (attempt {unit.attempts})")
 
-            print(f"✅ Saved {total_written} listings for {province}-{prop_type}")
+        def heartbeat():
+            if not queue.renew(unit.unit_id, worker_id, lease_seconds):
+                raise LeaseLost(unit.unit_id)
 
+        try:
+            if SHARD_PAGES and unit.page_start == 1 and unit.page_end is None:
+                last = probe_last_page(lambda p: count_listings(unit.province, unit.prop_type, p), CUTOFF_COUNT)
+                ranges = page_ranges(last, SHARD_PAGES)
+                if len(ranges) > 1:
+                    # hand the ranges back to the queue so every worker can take some
+                    queue.split(unit.unit_id, worker_id, [(unit.province, unit.prop_type, *r) for r in ranges])
+                    print(f"📐 Split {unit.unit_id} (~{last} pages) into {len(ranges)} ranges")
+                    continue
+            rows = scrape_combo(unit.province, unit.prop_type, on_page=heartbeat,
+                                page_start=unit.page_start, page_end=unit.page_end)
+            if queue.complete(unit.unit_id, worker_id, rows) and (unit.page_start, unit.page_end) != (1, None):
+                # last range of its combo: every worker is done appending, so fold the
+                # journal as it is on disk (this worker's set lacks what the others added)
+                seen_ids, id_log_path = load_seen_ids(unit.province, unit.prop_type)
+                n = seen_ids.compact(id_log_path)
+                print(f"🗜️ {unit.province}|{unit.prop_type} complete; compacted {n} seen IDs")
+        except LeaseLost:
+            metrics.combo_failed(unit.unit_id, "lease lost")
+            print(f"⚠️ Lease on {unit.unit_id} expired; another worker took it over.")
         except Exception as err:
+            metrics.combo_failed(unit.unit_id, err)
+            queue.fail(unit.unit_id, worker_id, err)
             with open(os.path.join(output_dir, "failed.log"), "a") as fail:
-                fail.write(f"{province}|{prop_type} - {err}\n")
-            print(f"❌ Failed {province}|{prop_type}: {err}")
-            continue
\ No newline at end of file
+                fail.write(f"{unit.unit_id} - {err}\n")
+            print(f"❌ Failed {unit.unit_id}: {err}")
+
+# ----------------------------
+# MAIN LOOP
+# ----------------------------
+def set_output_dir(path, per_run=False, queue=False):
+    global output_dir, checkpoint_dir, checkpoint_path, per_run_checkpoint
+    output_dir = path
+    checkpoint_dir = os.path.join(output_dir, "checkpoint")
+    # card harvests keep their own checkpoints so they never skip (or are skipped by) full scrapes.
+    # --store and --cards runs re-read listings to record changes: their checkpoint only lets
+    # an interrupted run resume and is removed once a run gets through every combo.
+    # With --queue they keep none (None): the queue already tracks which units are done
+    per_run_checkpoint = per_run
+    name = "cards-done.log" if CARDS_MODE else "store-done.log" if per_run_checkpoint else "done.log"
+    checkpoint_path = None if per_run and queue else os.path.join(checkpoint_dir, name)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+
+def finish_run(failed):
+    """End of a full pass over the combos: a per-run checkpoint is cleared unless some combo failed."""
+    if per_run_checkpoint and not failed and checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+        print(f"🧹 Every combo refreshed; removed {checkpoint_path} so the next run starts over")
+
+
+def _workers_changed(old, new, reason):
+    metrics.set_gauge("detail_workers", new)
+    print(f"🎛️ Detail workers {old} → {new} ({reason})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape guland.vn listings into scraped-data/{province}.csv")
+    parser.add_argument("--provinces", nargs="+", default=list(province_slugs), metavar="SLUG")
+    parser.add_argument("--types", nargs="+", default=property_types, metavar="SLUG")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="parallel detail-page threads")
+    parser.add_argument("--page-sleep", type=float, default=PAGE_SLEEP, help="pause between listing pages (s)")
+    parser.add_argument("--base-url", default=listing_base,
+                        help="site root, e.g. http://127.0.0.1:8765 for benchmarks/mock_server.py")
+    parser.add_argument("--output-dir", default=output_dir)
+    parser.add_argument("--transport", choices=TRANSPORTS, default="requests",
+                        help="httpx multiplexes detail requests over HTTP/2 (needs httpx[http2])")
+    parser.add_argument("--proxies", nargs="+", default=None, metavar="URL",
+                        help="spread requests over these HTTP proxies, e.g. http://10.0.0.5:3128")
+    parser.add_argument("--proxy-file", default=None, help="proxy URLs, one per line")
+    parser.add_argument("--proxy-rps", type=float, default=0,
+                        help="requests per second allowed through each proxy (0 = no cap)")
+    parser.add_argument("--store", default=None, metavar="DB",
+                        help="upsert rows into this SQLite listing store (with change history) instead of the CSVs")
+    parser.add_argument("--cards", action="store_true",
+                        help="card-only harvest into --store: detail pages only for new or re-priced listings")
+    parser.add_argument("--defer-details", action="store_true",
+                        help="with --cards: store cards only and leave their detail pages for --fetch-pending")
+    parser.add_argument("--fetch-pending", action="store_true",
+                        help="fetch the detail pages pending in --store (for --provinces/--types) and exit")
+    parser.add_argument("--max-rps", type=float, default=0,
+                        help="cap on requests per second across all threads, hedges included (0 = no cap)")
+    parser.add_argument("--autotune", action="store_true",
+                        help="adjust the number of detail pages in flight while crawling, starting from --workers")
+    parser.add_argument("--autotune-max", type=int, default=64,
+                        help="with --autotune: most detail pages in flight at once (all page ranges together)")
+    parser.add_argument("--hedge", action="store_true",
+                        help="re-request detail pages slower than the recent p95 latency; first answer wins")
+    parser.add_argument("--hedge-budget", type=float, default=HEDGE_BUDGET,
+                        help="max fraction of detail requests that get a hedge")
+    parser.add_argument("--shard-pages", type=int, default=SHARD_PAGES,
+                        help="probe each combo's page count and split it into ranges of this many pages")
+    parser.add_argument("--range-workers", type=int, default=RANGE_WORKERS,
+                        help="page ranges of one combo scraped in parallel (each with --workers detail threads)")
+    parser.add_argument("--queue", default=None, metavar="DB",
+                        help="distributed mode: lease combos from this shared SQLite queue")
+    parser.add_argument("--seed-queue", action="store_true",
+                        help="add --provinces × --types to the queue (existing units are kept)")
+    parser.add_argument("--worker-id", default=default_worker_id())
+    parser.add_argument("--lease-seconds", type=float, default=600,
+                        help="a combo goes back to the queue if not renewed for this long")
+    parser.add_argument("--metrics-file", default=None,
+                        help="JSON-lines stats file (default: <output-dir>/crawl-metrics.jsonl)")
+    parser.add_argument("--metrics-interval", type=float, default=10, help="seconds between stats lines; 0 disables")
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve live stats on http://127.0.0.1:PORT/metrics")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    global MAX_WORKERS, PAGE_SLEEP, SHARD_PAGES, RANGE_WORKERS, CARDS_MODE, DEFER_DETAILS, listing_base, store, transport
+    global limiter, hedger, tuner
+    args = parse_args(argv)
+    if (args.cards or args.fetch_pending) and not args.store:
+        raise SystemExit("--cards and --fetch-pending need --store DB")
+    MAX_WORKERS, PAGE_SLEEP = args.workers, args.page_sleep
+    SHARD_PAGES, RANGE_WORKERS = args.shard_pages, max(1, args.range_workers)
+    CARDS_MODE, DEFER_DETAILS = args.cards, args.cards and args.defer_details
+    listing_base = args.base_url.rstrip("/")
+    proxies = args.proxies or (load_proxies(args.proxy_file) if args.proxy_file else None)
+    if args.autotune:
+        # one limit shared by every page range; each range gets threads for all of it
+        start = args.workers * RANGE_WORKERS
+        caps = [r for r in (args.max_rps, args.proxy_rps * len(proxies or [])) if r]
+        tuner = ConcurrencyTuner(start, max_workers=max(start, args.autotune_max),
+                                 rate_cap=min(caps) if caps else None, on_change=_workers_changed)
+        MAX_WORKERS = tuner.max
+    # a hedged request can have two copies in flight
+    pool_size = MAX_WORKERS * RANGE_WORKERS * (2 if args.hedge else 1)
+    try:
+        if proxies:
+            transport = ProxyPool(proxies, HEADERS, pool_size, args.transport, rate=args.proxy_rps)
+        else:
+            transport = make_transport(args.transport, HEADERS, pool_size)
+    except RuntimeError as err:
+        raise SystemExit(str(err))
+    limiter = TokenBucket(args.max_rps)
+    if args.hedge:
+        hedger = Hedger(latency["detail"], limiter, budget=args.hedge_budget,
+                        max_workers=2 * MAX_WORKERS * RANGE_WORKERS)
+    set_output_dir(args.output_dir, per_run=bool(args.store), queue=bool(args.queue))
+    if args.store:
+        store = ListingStore(args.store)
+
+    metrics.combos_total = len(args.provinces) * len(args.types)
+    reporter = None
+    if args.metrics_interval > 0:
+        metrics_file = args.metrics_file or os.path.join(output_dir, "crawl-metrics.jsonl")
+        reporter = JsonLinesReporter(metrics, metrics_file, args.metrics_interval).start()
+    server = serve_metrics(metrics, args.metrics_port) if args.metrics_port else None
+
+    try:
+        if args.fetch_pending:
+            fetch_pending(args.provinces, args.types)
+            return
+
+        if args.queue:
+            queue = WorkQueue(args.queue)
+            if args.seed_queue:
+                queue.seed((p, t) for p in args.provinces for t in args.types)
+                print(f"🌱 Queue {args.queue}: {queue.status()}")
+            metrics.combos_total = None  # shared with other workers; see `crawler.coordinator status`
+            run_worker(queue, args.worker_id, args.lease_seconds)
+            return
+
+        failed = 0
+        for province in args.provinces:
+            for prop_type in args.types:
+                try:
+                    scrape_combo(province, prop_type)
+                except Exception as err:
+                    metrics.combo_failed(unit_key(province, prop_type), err)
+                    with open(os.path.join(output_dir, "failed.log"), "a") as fail:
+                        fail.write(f"{province}|{prop_type} - {err}\n")
+                    print(f"❌ Failed {province}|{prop_type}: {err}")
+                    failed += 1
+                    continue
+        finish_run(failed)
+    finally:
+        if reporter:
+            reporter.stop()
+        if server:
+            server.shutdown()
+        print(f"📡 Transport: {transport.summary()}")
+        if tuner is not None:
+            print(f"🎛️ Autotune: {tuner.summary()}")
+        if hedger is not None:
+            print(f"🏇 Hedging: {hedger.stats()}")
+            hedger.close()
+        transport.close()
+        if store is not None:
+            print(f"🗄️ Listing store {args.store}: {store.stats()}")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+try:
+    from scripts.snapshot import read_typed
+    from scripts.streamStats import Moments, QuantileSketch
+except ImportError:  # run directly as `python scripts/aggregateData.py`
+    from snapshot import read_typed
+    from streamStats import Moments, QuantileSketch
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_final.csv", "preprocessed-data/guland_duplicates.csv"]
+OUTPUTS = ["preprocessed-data/cube_state.npz", "preprocessed-data/cube.csv"]
+
+# —————————————————————————
+# SETUP LOGGING
+# —————————————————————————
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# —————————————————————————
+# CUBE LAYOUT
+# —————————————————————————
+# One cell per Province × Property Type × month of Last Updated Date. Each
+# cell keeps, per measure, Welford moments (count/sum/mean/var/min/max) and
+# a small t-digest, all mergeable, so cells can be rolled up to any coarser
+# grouping (province × month, whole country, ...) without the raw rows.
+#
+# cube_state.npz  columnar state: dimension arrays, moment arrays and the
+#                 t-digest centroids of every cell, plus hashes of the
+#                 Listing IDs already counted (for incremental updates)
+# cube.csv        the dashboard table: count, mean and quartiles per cell
+DIMENSIONS = ["Province", "Property Type", "month"]
+MEASURES = ["Price", "Area", "price_per_m2"]   # million VND, m², million VND / m²
+CELL_COMPRESSION = 50                          # centroids per cell sketch; small cells keep exact values
+CHUNK_ROWS = 200_000
+
+
+class Cell:
+    def __init__(self):
+        self.count = 0
+        self.moments = {m: Moments() for m in MEASURES}
+        self.sketches = {m: QuantileSketch(CELL_COMPRESSION, buffer_size=1000) for m in MEASURES}
+
+    def update(self, frame: pd.DataFrame):
+        self.count += len(frame)
+        for m in MEASURES:
+            values = frame[m].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            self.moments[m].update(values)
+            self.sketches[m].update(values)
+
+    def merge(self, other: "Cell"):
+        self.count += other.count
+        for m in MEASURES:
+            self.moments[m].merge(other.moments[m])
+            self.sketches[m].merge(other.sketches[m])
+        return self
+
+    def summary(self) -> dict:
+        row = {"count": self.count}
+        for m in MEASURES:
+            mo, sk = self.moments[m], self.sketches[m]
+            row[f"{m}_n"] = mo.n
+            row[f"{m}_sum"] = mo.mean * mo.n if mo.n else np.nan
+            row[f"{m}_mean"] = mo.mean if mo.n else np.nan
+            for q in (0.25, 0.5, 0.75):
+                row[f"{m}_p{int(q * 100)}"] = sk.quantile(q) if mo.n else np.nan
+        return row
+
+
+def _measures(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    out["Province"] = df["Province"].astype("string").fillna("unknown")
+    out["Property Type"] = df["Property Type"].astype("string").fillna("unknown")
+    when = pd.to_datetime(df["Last Updated Date"], format="%d/%m/%Y %H:%M", errors="coerce")
+    out["month"] = when.dt.strftime("%Y-%m").fillna("unknown")
+    out["Price"] = pd.to_numeric(df["Price"], errors="coerce")
+    out["Area"] = pd.to_numeric(df["Area"], errors="coerce")
+    out["price_per_m2"] = out["Price"] / out["Area"].where(out["Area"] > 0)
+    return out
+
+
+def id_hashes(ids: pd.Series) -> np.ndarray:
+    return pd.util.hash_array(ids.astype(str).to_numpy(dtype=object))
+
+# —————————————————————————
+# STATE (de)serialisation
+# —————————————————————————
+def save_state(path, cells: dict, seen: np.ndarray):
+    keys = sorted(cells)
+    arrays = {"seen_ids": np.sort(seen)}
+    for i, dim in enumerate(DIMENSIONS):
+        arrays[f"dim:{dim}"] = np.array([k[i] for k in keys], dtype=str)
+    arrays["count"] = np.array([cells[k].count for k in keys], dtype=np.int64)
+    for m in MEASURES:
+        mos = [cells[k].moments[m] for k in keys]
+        sks = [cells[k].sketches[m] for k in keys]
+        for sk in sks:
+            sk._compress()
+        arrays[f"{m}:n"] = np.array([mo.n for mo in mos], dtype=np.int64)
+        arrays[f"{m}:mean"] = np.array([mo.mean for mo in mos])
+        arrays[f"{m}:m2"] = np.array([mo.m2 for mo in mos])
+        arrays[f"{m}:min"] = np.array([mo.min for mo in mos])
+        arrays[f"{m}:max"] = np.array([mo.max for mo in mos])
+        # centroids of all cells back to back; offsets[i]:offsets[i+1] belong to cell i
+        arrays[f"{m}:offsets"] = np.r_[0, np.cumsum([len(sk.means) for sk in sks])].astype(np.int64)
+        arrays[f"{m}:c_means"] = np.concatenate([sk.means for sk in sks]) if sks else np.empty(0)
+        arrays[f"{m}:c_weights"] = np.concatenate([sk.weights for sk in sks]) if sks else np.empty(0)
+    np.savez_compressed(path, **arrays)
+
+
+def load_state(path):
+    """(cells, seen_id_hashes); empty when the state file doesn't exist yet."""
+    if not os.path.exists(path):
+        return {}, np.empty(0, dtype=np.uint64)
+    z = np.load(path, allow_pickle=False)
+    keys = list(zip(*(z[f"dim:{dim}"].tolist() for dim in DIMENSIONS)))
+    cells = {}
+    for i, key in enumerate(keys):
+        cell = Cell()
+        cell.count = int(z["count"][i])
+        for m in MEASURES:
+            mo, sk = cell.moments[m], cell.sketches[m]
+            mo.n, mo.mean, mo.m2 = int(z[f"{m}:n"][i]), float(z[f"{m}:mean"][i]), float(z[f"{m}:m2"][i])
+            mo.min, mo.max = float(z[f"{m}:min"][i]), float(z[f"{m}:max"][i])
+            a, b = z[f"{m}:offsets"][i], z[f"{m}:offsets"][i + 1]
+            sk.means, sk.weights = z[f"{m}:c_means"][a:b], z[f"{m}:c_weights"][a:b]
+            sk.min, sk.max = mo.min, mo.max
+        cells[key] = cell
+    return cells, z["seen_ids"]
+
+
+def cube_frame(cells: dict) -> pd.DataFrame:
+    rows = [dict(zip(DIMENSIONS, key), **cell.summary()) for key, cell in sorted(cells.items())]
+    return pd.DataFrame(rows, columns=DIMENSIONS + (list(rows[0])[len(DIMENSIONS):] if rows else []))
+
+
+def rollup(cells: dict, by) -> dict:
+    """Merge cells into a coarser grouping, e.g. by=["Province", "month"]."""
+    pos = [DIMENSIONS.index(d) for d in by]
+    out = {}
+    for key, cell in cells.items():
+        k = tuple(key[p] for p in pos)
+        out.setdefault(k, Cell()).merge(cell)
+    return out
+
+# —————————————————————————
+# INCREMENTAL UPDATE
+# —————————————————————————
+def _skipped_rows(dups, seen) -> np.ndarray:
+    """
+    Row positions never to count: a duplicate cluster counts once, through
+    whichever member was counted first (or else its canonical member).
+    """
+    if dups is None or not len(dups):
+        return np.empty(0, dtype=np.int64)
+    counted = np.isin(id_hashes(dups["Listing ID"]), seen)
+    done = dups["cluster"].isin(dups.loc[counted, "cluster"])
+    return dups.loc[done | ~dups["is_canonical"], "row"].to_numpy(dtype=np.int64)
+
+
+def run(rebuild=False):
+    # same folder convention as preprocessData.py
+    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    folder = os.path.join(script_dir, "preprocessed-data")
+    infile = os.path.join(folder, "guland_final.csv")
+    dupfile = os.path.join(folder, "guland_duplicates.csv")
+    state_path = os.path.join(folder, "cube_state.npz")
+    table_path = os.path.join(folder, "cube.csv")
+
+    cells, seen = ({}, np.empty(0, dtype=np.uint64)) if rebuild else load_state(state_path)
+    logging.info(f"Cube state: {len(cells)} cells, {len(seen):,} listings already counted")
+    dups = pd.read_csv(dupfile, dtype={"Listing ID": str}) if os.path.exists(dupfile) else None
+    skip = _skipped_rows(dups, seen)
+
+    cols = ["Listing ID", "Province", "Property Type", "Last Updated Date", "Price", "Area"]
+    n_rows = n_added = 0
+    new_hashes = []
+    for chunk in read_typed(infile, "final", columns=cols, chunksize=CHUNK_ROWS):
+        n_rows += len(chunk)
+        hashes = id_hashes(chunk["Listing ID"])
+        add = ~np.isin(hashes, seen) & ~chunk.index.isin(skip)
+        if not add.any():
+            continue
+        m = _measures(chunk[add])
+        for key, group in m.groupby(DIMENSIONS, sort=False, observed=True):
+            cells.setdefault(tuple(str(k) for k in key), Cell()).update(group)
+        new_hashes.append(hashes[add])
+        n_added += int(add.sum())
+
+    seen = np.concatenate([seen] + new_hashes).astype(np.uint64)
+    save_state(state_path, cells, seen)
+    table = cube_frame(cells)
+    table.to_csv(table_path, index=False, encoding="utf-8-sig")
+    logging.info(f"Added {n_added:,} of {n_rows:,} rows; {len(cells):,} cells")
+    logging.info(f"✅ Cube saved to: {table_path} ({os.path.getsize(table_path) / 1024:.1f} KB), "
+                 f"state {state_path} ({os.path.getsize(state_path) / 1024:.1f} KB)")
+    return n_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the Province × Type × month aggregate cube.")
+    parser.add_argument("--rebuild", action="store_true", help="recount every row instead of only new listings")
+    parser.add_argument("--rollup", nargs="+", choices=DIMENSIONS, metavar="DIM",
+                        help="print the cube merged to these dimensions instead of updating it")
+    args = parser.parse_args()
+    if args.rollup:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        cells, _ = load_state(os.path.join(root, OUTPUTS[0]))
+        merged = rollup(cells, args.rollup)
+        rows = [dict(zip(args.rollup, k), **c.summary()) for k, c in sorted(merged.items())]
+        cols = args.rollup + ["count"] + [f"{m}_p50" for m in MEASURES]
+        print(pd.DataFrame(rows)[cols].to_string(index=False))
+    else:
+        run(rebuild=args.rebuild)
@@ -1,5 +1,14 @@
 import os
 import pandas as pd
+try:
+    from scripts.schema import apply_schema, read_csv_typed
+except ImportError:  # run directly as `python scripts/appendData.py`
+    from schema import apply_schema, read_csv_typed
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["scraped-data/*.csv"]
+OUTPUTS = ["preprocessed-data/guland_full.csv", "preprocessed-data/guland_qc_report.csv"]
 
 def run():
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -14,7 +23,7 @@ def run():
     for file in csv_files:
         file_path = os.path.join(folder_path, file)
         try:
-            df = pd.read_csv(file_path)
+            df = read_csv_typed(file_path, "raw")
 
             province = file.replace('.csv', '')
             df['province_from_filename'] = province
@@ -52,12 +61,14 @@ def run():
 
     # Combine valid data
     if all_dataframes:
-        full_df = pd.concat(all_dataframes, ignore_index=True)
+        # categories differ per file, so concat falls back to object; re-apply
+        full_df = apply_schema(pd.concat(all_dataframes, ignore_index=True), "raw")
         full_df.to_csv(os.path.join(output_path, "guland_full.csv"), index=False, encoding='utf-8-sig')
         print(f"\n🎉 Appended {len(all_dataframes)} files. Output: guland_full.csv")
     else:
         print("\n❌ No valid data to append!")
 
     print(f"📝 QC report saved to guland_qc_report.csv")
+    return sum(r['rows'] for r in qc_report)
 
 if __name__ == "__main__": run() 
\ No newline at end of file
@@ -3,6 +3,17 @@ import re
 import pandas as pd
 import numpy as np
 import logging
+try:
+    from scripts.schema import apply_schema, read_csv_typed
+    from scripts.gazetteer import GAZETTEER_PATH, Gazetteer
+except ImportError:  # run directly as `python scripts/cleanData.py`
+    from schema import apply_schema, read_csv_typed
+    from gazetteer import GAZETTEER_PATH, Gazetteer
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_full_imputed.csv", GAZETTEER_PATH]
+OUTPUTS = ["preprocessed-data/guland_full_imputed_cleaned.csv"]
 
 # —————————————————————————
 # SETUP LOGGING
@@ -23,7 +34,7 @@ def run():
     out_path = os.path.join(script_dir, "preprocessed-data", "guland_full_imputed_cleaned.csv")
 
     logging.info(f"Loading data from {in_path}")
-    df = pd.read_csv(in_path, dtype=str)
+    df = read_csv_typed(in_path, "imputed")
     total = len(df)
     logging.info(f"Total rows: {total}")
 
@@ -40,52 +51,66 @@ def run():
         'Road Type':      'imputed_var_road_type'
     }
 
-    # Strip unit suffixes from original dimension columns
-    for col in ['Width', 'Length', 'Alley Width']:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-            df[col] = df[col].str.replace(r'(?i)m$', '', regex=True)
-
-    # 2. Merge: use imputed ONLY when original is truly missing or invalid
     numeric_cols = ['Width', 'Length', 'Bedrooms', 'Bathrooms', 'Floors', 'Alley Width']
+    unit_cols = ['Width', 'Length', 'Alley Width']
+
+    pairs = {o: i for o, i in merge_map.items() if o in df.columns and i in df.columns}
     for orig_col, imp_col in merge_map.items():
-        if orig_col not in df or imp_col not in df:
+        if orig_col not in pairs:
             logging.warning(f"Missing column: {orig_col} or {imp_col}")
-            continue
-
-        orig = df[orig_col].copy()
-        imp  = df[imp_col]
-
-        if orig_col in numeric_cols:
-            # consider non-numeric or NaN as missing
-            mask_orig_invalid = pd.to_numeric(orig, errors='coerce').isna()
-            use_imp = mask_orig_invalid & imp.notna()
-        else:
-            s = orig.astype(str).str.strip().str.lower()
-            mask_orig_empty = orig.isna() | s.eq('') | s.eq('nan')
-            use_imp = mask_orig_empty & imp.notna()
-
-        filled = use_imp.sum()
-        # overwrite only masked rows
-        df[orig_col] = orig.where(~use_imp, imp.astype(str))
-        logging.info(f"{orig_col}: filled {filled}/{total} from {imp_col}")
-
-    # 3. Convert to appropriate dtypes
-    # Numeric dims
-    for col in ['Width', 'Length', 'Alley Width']:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    # Integral counts
-    df['Bedrooms'] = pd.to_numeric(df['Bedrooms'], errors='coerce').astype('Int64')
-    df['Bathrooms'] = pd.to_numeric(df['Bathrooms'], errors='coerce').astype('Int64')
-    # Floors may be non-integer
-    df['Floors'] = pd.to_numeric(df['Floors'], errors='coerce')
-
-    # 4. Drop imputed columns
+
+    # 2. Merge: use imputed ONLY when original is truly missing or invalid
+    # 2a. Numeric block: coerce each original column exactly once (dropping
+    #     a trailing 'm' unit), then a non-numeric original is simply NaN.
+    num_orig = [c for c in numeric_cols if c in pairs]
+    if num_orig:
+        orig = pd.DataFrame({
+            c: pd.to_numeric(
+                df[c].str.strip().str.removesuffix('m').str.removesuffix('M') if c in unit_cols else df[c],
+                errors='coerce')
+            for c in num_orig
+        }, index=df.index)
+        imp = df[[pairs[c] for c in num_orig]].astype('float64').to_numpy()
+        use_imp = orig.isna().to_numpy() & ~np.isnan(imp)
+        merged = orig.where(~use_imp, imp)
+        for c, filled in zip(num_orig, use_imp.sum(axis=0)):
+            df[c] = merged[c]
+            logging.info(f"{c}: filled {filled}/{total} from {pairs[c]}")
+
+    # 2b. Label block: validity is decided per category, not per row, and the
+    #     fill is done on category codes so no strings are copied.
+    for c in [c for c in pairs if c not in numeric_cols]:
+        orig = df[c].astype('category')
+        imp = df[pairs[c]].astype('category')
+        cats = orig.cat.categories.union(imp.cat.categories)
+        orig_codes = orig.cat.set_categories(cats).cat.codes.to_numpy()
+        imp_codes = imp.cat.set_categories(cats).cat.codes.to_numpy()
+
+        norm = pd.Series(cats.astype(str)).str.strip().str.lower()
+        blank_codes = np.flatnonzero(norm.isin(['', 'nan']).to_numpy())
+        use_imp = ((orig_codes == -1) | np.isin(orig_codes, blank_codes)) & (imp_codes != -1)
+
+        df[c] = pd.Categorical.from_codes(np.where(use_imp, imp_codes, orig_codes), categories=cats)
+        logging.info(f"{c}: filled {use_imp.sum()}/{total} from {pairs[c]}")
+
+    # 3. Location -> administrative codes and canonical names (needs the gazetteer)
+    gazetteer = Gazetteer.load(os.path.join(script_dir, GAZETTEER_PATH))
+    if gazetteer is not None:
+        admin = gazetteer.normalize(df['Location'])
+        df[admin.columns] = admin
+        for col in admin.columns:
+            logging.info(f"{col}: matched {admin[col].notna().sum()}/{total}")
+
+    # 4. Convert to appropriate dtypes (integral counts, float32 dims, categories)
+    apply_schema(df, "cleaned")
+
+    # 5. Drop imputed columns
     df.drop(columns=list(merge_map.values()), inplace=True)
 
-    # 5. Save
+    # 6. Save
     df.to_csv(out_path, index=False, encoding='utf-8-sig')
     logging.info(f"✅ Cleaned data saved to: {out_path}")
+    return total
 
 if __name__ == '__main__':
     run()
@@ -0,0 +1,251 @@
+import logging
+import os
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+try:
+    from scripts.snapshot import read_typed
+except ImportError:  # run directly as `python scripts/dedupData.py`
+    from snapshot import read_typed
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_final.csv"]
+OUTPUTS = ["preprocessed-data/guland_duplicates.csv"]
+
+# —————————————————————————
+# SETUP LOGGING
+# —————————————————————————
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# —————————————————————————
+# PARAMETERS
+# —————————————————————————
+# The same property reposted by another agent gets a new Listing ID but
+# keeps most of its description and usually the same photos. Each listing
+# gets two MinHash signatures (description word 3-grams, image URL set);
+# LSH bands put listings with similar signatures in the same bucket, so
+# only bucket-mates are ever compared and the whole pass stays ~linear.
+DESC_PERMS, DESC_BANDS = 64, 16   # 16 bands × 4 rows: ~50% Jaccard to become a candidate
+IMG_PERMS, IMG_BANDS = 16, 8      # 8 bands × 2 rows: ~35%
+DESC_THRESHOLD = 0.7              # estimated Jaccard to call two descriptions duplicates
+IMG_THRESHOLD = 0.6               # ... or two image sets
+MIN_SHINGLES = 5                  # shorter descriptions are too generic to compare
+COMMON_MAX = 20                   # a shingle / image URL on more listings than this is boilerplate
+CHUNK_ROWS = 200_000
+
+_rng = np.random.default_rng(20240601)  # fixed: signatures must be reproducible
+_DESC_A = _rng.integers(1, 2**63, DESC_PERMS, dtype=np.uint64) | np.uint64(1)
+_DESC_B = _rng.integers(0, 2**63, DESC_PERMS, dtype=np.uint64)
+_IMG_A = _rng.integers(1, 2**63, IMG_PERMS, dtype=np.uint64) | np.uint64(1)
+_IMG_B = _rng.integers(0, 2**63, IMG_PERMS, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+_IMG_SEP = re.compile(r"\s*;\s*")
+
+# —————————————————————————
+# SHINGLES → MINHASH
+# —————————————————————————
+def _token_hashes(token_lists):
+    """(row position per token, uint64 hash per token) for a list of per-row token lists."""
+    lengths = np.fromiter((len(t) for t in token_lists), dtype=np.int64, count=len(token_lists))
+    rows = np.repeat(np.arange(len(token_lists), dtype=np.int64), lengths)
+    flat = np.fromiter(chain.from_iterable(token_lists), dtype=object, count=int(lengths.sum()))
+    # hash each distinct token once
+    codes, uniques = pd.factorize(flat)
+    return rows, pd.util.hash_array(np.asarray(uniques, dtype=object))[codes]
+
+
+def _texts(values: pd.Series):
+    return ["" if pd.isna(v) else str(v) for v in values]
+
+
+def description_shingles(desc: pd.Series):
+    """(row, hash) for every word 3-gram of every description (positions relative to desc)."""
+    rows, h = _token_hashes([_WORD.findall(t.lower()) for t in _texts(desc)])
+    same = (rows[2:] == rows[:-2])  # the 3 words belong to one description
+    with np.errstate(over="ignore"):
+        sh = (h[:-2] * np.uint64(0x9E3779B97F4A7C15)) ^ (h[1:-1] * np.uint64(0xC2B2AE3D27D4EB4F)) ^ h[2:]
+    return rows[:-2][same], sh[same]
+
+
+def image_tokens(images: pd.Series):
+    """(row, hash) for every image URL (positions relative to images)."""
+    return _token_hashes([[u for u in _IMG_SEP.split(t.strip()) if u and u != "N/A"] for t in _texts(images)])
+
+
+def _drop_common(rows, hashes, max_listings=COMMON_MAX):
+    """Remove tokens found in more than max_listings listings (each listing counted once)."""
+    order = np.lexsort((rows, hashes))
+    rows, hashes = rows[order], hashes[order]
+    new_h = np.r_[True, hashes[1:] != hashes[:-1]]
+    first = new_h | np.r_[True, rows[1:] != rows[:-1]]  # drop repeats within one listing
+    rows, hashes, new_h = rows[first], hashes[first], new_h[first]
+    starts = np.flatnonzero(new_h)
+    counts = np.diff(np.r_[starts, len(hashes)])
+    keep = np.repeat(counts, counts) <= max_listings
+    return rows[keep], hashes[keep]
+
+
+def minhash(rows, hashes, n_rows, a, b, block=1 << 18):
+    """
+    MinHash signatures, shape (n_rows, len(a)) uint32; rows without tokens
+    get all-0xFFFFFFFF, which callers must exclude. Permutations are
+    multiply-shift hashes (a*x + b) >> 32 over uint64.
+    """
+    sig = np.full((len(a), n_rows), np.iinfo(np.uint32).max, dtype=np.uint32)
+    order = np.argsort(rows, kind="stable")
+    rows, hashes = rows[order], hashes[order]
+    for s in range(0, len(rows), block):
+        r, h = rows[s:s + block], hashes[s:s + block]
+        # permutations along axis 0 so reduceat runs over contiguous memory
+        v = np.multiply.outer(a, h)
+        v += b[:, None]
+        v >>= np.uint64(32)
+        starts = np.flatnonzero(np.r_[True, r[1:] != r[:-1]])
+        mins = np.minimum.reduceat(v.astype(np.uint32), starts, axis=1)
+        sig[:, r[starts]] = np.minimum(sig[:, r[starts]], mins)
+    return np.ascontiguousarray(sig.T)
+
+# —————————————————————————
+# LSH + CLUSTERING
+# —————————————————————————
+def lsh_candidates(sig, valid, bands, group=None):
+    """
+    (i, j) candidate pairs: listings sharing at least one band bucket.
+    Each bucket is compared star-wise against its first member, so a
+    bucket of g listings yields g-1 pairs rather than g².
+    """
+    n, k = sig.shape
+    r = k // bands
+    idx = np.flatnonzero(valid)
+    if len(idx) < 2:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    pairs_i, pairs_j = [], []
+    for band in range(bands):
+        # a 64-bit key per band; the rare collision only adds a candidate that fails verification
+        key = group[idx].copy() if group is not None else np.zeros(len(idx), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for c in range(band * r, (band + 1) * r):
+                key = key * np.uint64(0x100000001B3) ^ sig[idx, c].astype(np.uint64)
+        order = np.argsort(key, kind="stable")
+        ks = key[order]
+        first = np.r_[True, ks[1:] != ks[:-1]]
+        head = np.maximum.accumulate(np.where(first, np.arange(len(ks)), 0))
+        member = ~first
+        pairs_i.append(idx[order[head[member]]])
+        pairs_j.append(idx[order[member]])
+    pairs = np.unique(np.stack([np.concatenate(pairs_i), np.concatenate(pairs_j)], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def estimated_jaccard(sig, i, j):
+    return (sig[i] == sig[j]).mean(axis=1)
+
+
+def connected_components(n, i, j):
+    """Component label (smallest member) per node, by min-label propagation with pointer jumping."""
+    labels = np.arange(n, dtype=np.int64)
+    while True:
+        m = np.minimum(labels[i], labels[j])
+        new = labels.copy()
+        np.minimum.at(new, i, m)
+        np.minimum.at(new, j, m)
+        new = new[new]
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def find_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per listing that belongs to a duplicate cluster:
+    row, Listing ID, cluster, cluster_size, is_canonical, reason.
+    The canonical member is the most recently scraped one.
+    """
+    n = len(df)
+    province = pd.util.hash_array(df["Province"].astype(str).to_numpy(dtype=object))
+
+    # agency boilerplate ("liên hệ chính chủ...") and logo/placeholder images
+    # would otherwise chain unrelated listings into one cluster
+    rows, sh = _drop_common(*description_shingles(df["Description"]))
+    desc_sig = minhash(rows, sh, n, _DESC_A, _DESC_B)
+    desc_ok = np.bincount(rows, minlength=n) >= MIN_SHINGLES
+
+    rows, im = _drop_common(*image_tokens(df["Images"]))
+    img_sig = minhash(rows, im, n, _IMG_A, _IMG_B)
+    img_ok = np.bincount(rows, minlength=n) > 0
+
+    di, dj = lsh_candidates(desc_sig, desc_ok, DESC_BANDS, province)
+    d_hit = estimated_jaccard(desc_sig, di, dj) >= DESC_THRESHOLD
+    ii, ij = lsh_candidates(img_sig, img_ok, IMG_BANDS, province)
+    i_hit = estimated_jaccard(img_sig, ii, ij) >= IMG_THRESHOLD
+    logging.info(f"Candidate pairs: {len(di):,} by description ({d_hit.sum():,} confirmed), "
+                 f"{len(ii):,} by images ({i_hit.sum():,} confirmed)")
+
+    i = np.concatenate([di[d_hit], ii[i_hit]])
+    j = np.concatenate([dj[d_hit], ij[i_hit]])
+    labels = connected_components(n, i, j)
+    sizes = np.bincount(labels, minlength=n)[labels]
+    in_cluster = np.flatnonzero(sizes > 1)
+
+    reason = np.full(n, "", dtype=object)
+    reason[np.concatenate([di[d_hit], dj[d_hit]])] = "description"
+    both = np.zeros(n, dtype=bool)
+    both[np.concatenate([ii[i_hit], ij[i_hit]])] = True
+    reason[both] = np.where(reason[both] == "description", "description+images", "images")
+
+    out = pd.DataFrame({
+        "row": in_cluster,
+        "Listing ID": df["Listing ID"].to_numpy()[in_cluster],
+        "cluster": labels[in_cluster],
+        "cluster_size": sizes[in_cluster],
+        "reason": reason[in_cluster],
+        "Scraped At": df["Scraped At"].astype(str).to_numpy()[in_cluster],
+    })
+    # latest scrape wins; ties keep the first row
+    out = out.sort_values(["cluster", "Scraped At", "row"], ascending=[True, False, True], kind="stable")
+    out["is_canonical"] = ~out["cluster"].duplicated()
+    return out.drop(columns="Scraped At").sort_values("row").reset_index(drop=True)
+
+
+def non_canonical_rows(path) -> np.ndarray:
+    """Row positions of guland_final.csv to leave out of statistics (empty if no dedup output)."""
+    if not os.path.exists(path):
+        return np.empty(0, dtype=np.int64)
+    dups = pd.read_csv(path, usecols=["row", "is_canonical"])
+    return dups.loc[~dups["is_canonical"], "row"].to_numpy(dtype=np.int64)
+
+
+def run():
+    # same folder convention as preprocessData.py
+    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    folder = os.path.join(script_dir, "preprocessed-data")
+    infile = os.path.join(folder, "guland_final.csv")
+    outfile = os.path.join(folder, "guland_duplicates.csv")
+
+    logging.info(f"Loading data from {infile}")
+    cols = ["Listing ID", "Description", "Images", "Province", "Scraped At"]
+    df = pd.concat(read_typed(infile, "final", columns=cols, chunksize=CHUNK_ROWS), ignore_index=True)
+
+    logging.info(f"Computing MinHash signatures for {len(df):,} listings...")
+    dups = find_duplicates(df)
+    n_clusters = dups["cluster"].nunique()
+    n_dropped = int((~dups["is_canonical"]).sum())
+    logging.info(f"Found {n_clusters:,} duplicate clusters covering {len(dups):,} listings; "
+                 f"{n_dropped:,} non-canonical copies ({n_dropped / max(len(df), 1):.1%} of rows)")
+    logging.info(f"Largest clusters:\n{dups['cluster_size'].value_counts().sort_index(ascending=False).head(5)}")
+
+    dups.to_csv(outfile, index=False, encoding="utf-8-sig")
+    logging.info(f"✅ Duplicate clusters saved to: {outfile}")
+    return len(df)
+
+
+if __name__ == "__main__":
+    run()
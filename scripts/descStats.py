@@ -1,6 +1,19 @@
 import logging
 import pandas as pd
 import os
+try:
+    from scripts.snapshot import read_typed
+    from scripts.streamStats import collect
+    from scripts.dedupData import non_canonical_rows
+except ImportError:  # run directly as `python scripts/descStats.py`
+    from snapshot import read_typed
+    from streamStats import collect
+    from dedupData import non_canonical_rows
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_final.csv", "preprocessed-data/guland_duplicates.csv"]
+OUTPUTS = []
 
 # —————————————————————————
 # SETUP LOGGING
@@ -15,49 +28,74 @@ logging.basicConfig(
 # MAIN PIPELINE
 # —————————————————————————
 
+CHUNK_ROWS = 200_000  # rows per chunk; bounds memory regardless of file size
+
 def run():
     # File path
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     infile = os.path.join(script_dir, "preprocessed-data", "guland_final.csv")
+    dupfile = os.path.join(script_dir, "preprocessed-data", "guland_duplicates.csv")
 
-    logging.info(f"Loading dataset from {infile}")
-    df = pd.read_csv(infile)
-    n_rows, n_cols = df.shape
+    # Single chunked pass: every statistic below comes from the same scan,
+    # with one mergeable partial state per province.
+    cat_cols = ['Position', 'Direction', 'Road Type', 'Legal Status', 'Furnishing', 'Property Type', 'Province']
+    logging.info(f"Streaming dataset from {infile} in chunks of {CHUNK_ROWS} rows")
+    chunks = read_typed(infile, "final", chunksize=CHUNK_ROWS)
+
+    # Reposts of the same property would count its price several times;
+    # keep one row per duplicate cluster (see dedupData.py)
+    if not os.path.exists(dupfile):
+        logging.warning(f"{dupfile} not found (run dedupData); statistics include reposts")
+    drop = non_canonical_rows(dupfile)
+    if len(drop):
+        logging.info(f"Excluding {len(drop)} near-duplicate rows found by dedupData")
+        chunks = (c[~c.index.isin(drop)] for c in chunks)
+    stats, by_province = collect(chunks, by='Province', cat_cols=cat_cols)
+    n_rows, n_cols = stats.rows, len(stats.missing)
     logging.info(f"Total rows: {n_rows}, Total columns: {n_cols}")
 
     # 1. Missingness summary
-    logging.info("Computing missingness per column...")
-    missing = df.isna().sum().to_frame(name='missing_count')
-    missing['missing_pct'] = (missing['missing_count'] / n_rows * 100).round(2)
+    missing = stats.missing_frame()
     logging.info(f"Missingness summary:\n{missing}")
 
-    # 2. Numeric descriptive statistics
-    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+    # 2. Numeric descriptive statistics (quartiles are t-digest estimates)
+    numeric_cols = stats.numeric_cols or []
     logging.info(f"Numeric columns detected: {numeric_cols}")
     if numeric_cols:
-        desc = df[numeric_cols].describe().T
+        desc = stats.describe_frame()
         logging.info(f"Numeric descriptive statistics:\n{desc}")
     else:
         logging.info("No numeric columns to describe.")
 
     # 3. Categorical value counts for key columns
-    cat_cols = ['Position', 'Direction', 'Road Type', 'Property Type', 'Province']
     for col in cat_cols:
-        if col in df.columns:
-            logging.info(f"Value counts for {col} (top 10):\n{df[col].value_counts(dropna=False).head(10)}")
+        if col in stats.missing.index:
+            logging.info(f"Value counts for {col} (top 10):\n{stats.topk[col].top(10)}")
         else:
             logging.warning(f"Column {col} not found in dataset.")
 
     # 4. Area and Price distributions (quartiles)
     for col in ['Price', 'Area']:
-        if col in df.columns:
-            stats = df[col].describe()[['min','25%','50%','75%','max']]
+        if col in stats.sketches:
+            m, s = stats.moments[col], stats.sketches[col]
             logging.info(
-                f"{col} distribution - min: {stats['min']}, 25%: {stats['25%']}, "
-                f"50%: {stats['50%']}, 75%: {stats['75%']}, max: {stats['max']}"
+                f"{col} distribution - min: {m.min}, 25%: {s.quantile(0.25)}, "
+                f"50%: {s.quantile(0.5)}, 75%: {s.quantile(0.75)}, max: {m.max}"
             )
 
+    # 5. Per-province medians from the partial states
+    rows = {}
+    for province, part in by_province.items():
+        rows[province] = {'rows': part.rows}
+        for col in ['Price', 'Area']:
+            if col in part.sketches:
+                rows[province][f'{col} median'] = part.sketches[col].quantile(0.5)
+    if rows:
+        per_province = pd.DataFrame.from_dict(rows, orient='index').sort_values('rows', ascending=False)
+        logging.info(f"Per-province summary:\n{per_province}")
+
     logging.info("Analysis complete.")
+    return n_rows
 
 if __name__ == '__main__':
     run()
@@ -0,0 +1,413 @@
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+try:
+    import httpx
+except ImportError:  # optional: only needed for --transport httpx
+    httpx = None
+try:
+    from PIL import Image
+except ImportError:  # optional: without Pillow there are no perceptual hashes
+    Image = None
+try:
+    from scripts.snapshot import read_typed
+    from scripts.dedupData import connected_components
+except ImportError:  # run directly as `python scripts/downloadImages.py`
+    from snapshot import read_typed
+    from dedupData import connected_components
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_final.csv"]
+OUTPUTS = ["preprocessed-data/images/listing_images.csv"]
+# not part of a plain `python main.py`: needs the network and a lot of disk
+# (`main.py --images` or `--only downloadImages`)
+OPTIONAL = True
+
+# —————————————————————————
+# SETUP LOGGING
+# —————————————————————————
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# —————————————————————————
+# IMAGE STORE
+# —————————————————————————
+# preprocessed-data/images/
+#
+#   objects/ab/ab12…ef.jpg   every distinct image once, named by the SHA-256
+#                            of its bytes: a photo reposted under another
+#                            URL or listing is stored a single time
+#   downloads.csv            journal, one line per URL fetched: url, status,
+#                            sha256, bytes, dhash. Appended as downloads
+#                            finish, so an interrupted run resumes where it
+#                            stopped: URLs whose object is on disk (or that
+#                            are gone or not an image) are not fetched again
+#   listing_images.csv       Listing ID, position, url, sha256, dhash, group
+#   image_matches.csv        pairs of listings that share a photo: how many
+#                            groups they share, how many byte-identical
+#
+# Downloads run on one asyncio loop: CONCURRENCY fetches in flight, each
+# host paced to PER_HOST_RPS requests/s, retries with backoff on 429/5xx.
+# With Pillow installed every image also gets a 64-bit dHash, and images
+# whose dHashes differ in at most MAX_DISTANCE bits (the same photo
+# re-encoded, resized or lightly cropped) share a `group`.
+# —————————————————————————
+CONCURRENCY = 16
+PER_HOST_RPS = 8.0
+TIMEOUT = 20.0
+RETRIES = 3
+BACKOFF_S = 1.0
+MAX_BYTES = 20 * 1024 * 1024
+MAX_DISTANCE = 3          # dHash bits; 4 exact 16-bit bands find every pair this close
+COMMON_MAX = 20           # an image on more listings than this is a logo/placeholder
+FINAL = {"404", "410", "not-image", "too-large"}   # statuses not retried on resume
+JOURNAL_FIELDS = ["url", "status", "sha256", "bytes", "dhash"]
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; guland-image-fetch)"}
+
+_IMG_SEP = re.compile(r"\s*;\s*")
+_MAGIC = [(b"\xff\xd8\xff", ".jpg"), (b"\x89PNG\r\n\x1a\n", ".png"), (b"GIF8", ".gif"),
+          (b"RIFF", ".webp"), (b"BM", ".bmp")]
+
+
+def image_ext(data: bytes):
+    """File extension from the leading bytes, or None when it is not an image (an HTML error page, ...)."""
+    for magic, ext in _MAGIC:
+        if data.startswith(magic) and (ext != ".webp" or data[8:12] == b"WEBP"):
+            return ext
+    return None
+
+
+def dhash(data: bytes):
+    """64-bit difference hash of an image as 16 hex digits; None without Pillow or for undecodable data."""
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            px = np.asarray(im.convert("L").resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    except Exception:
+        return None
+    bits = (px[:, 1:] > px[:, :-1]).ravel()
+    return f"{int(np.packbits(bits).view('>u8')[0]):016x}"
+
+
+class ImageStore:
+    def __init__(self, root):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        os.makedirs(self.objects, exist_ok=True)
+        self.present = {}   # sha256 -> path, for every object on disk
+        for sub in os.listdir(self.objects):
+            for name in os.listdir(os.path.join(self.objects, sub)):
+                if not name.endswith(".tmp"):
+                    self.present[os.path.splitext(name)[0]] = os.path.join(self.objects, sub, name)
+
+    def __contains__(self, sha):
+        return sha in self.present
+
+    def path(self, sha):
+        return self.present.get(sha)
+
+    def put(self, data: bytes, ext):
+        """Store `data` under its SHA-256 (once); returns (sha256, newly written)."""
+        sha = hashlib.sha256(data).hexdigest()
+        if sha in self.present:
+            return sha, False
+        folder = os.path.join(self.objects, sha[:2])
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, sha + ext)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        self.present[sha] = path
+        return sha, True
+
+    def read(self, sha):
+        with open(self.present[sha], "rb") as f:
+            return f.read()
+
+
+def read_journal(path):
+    """Last journal line per URL, as a DataFrame indexed by url (empty when there is no journal)."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=JOURNAL_FIELDS[1:], index=pd.Index([], name="url"))
+    j = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return j.drop_duplicates("url", keep="last").set_index("url")
+
+
+# —————————————————————————
+# DOWNLOADER
+# —————————————————————————
+class HostPacer:
+    """Spaces requests to each host 1/rate seconds apart (loop-local, so no locks)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = {}
+
+    async def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self.next_slot.get(host, now))
+        self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class ImageDownloader:
+    def __init__(self, store, journal_path, concurrency=CONCURRENCY, per_host_rps=PER_HOST_RPS,
+                 timeout=TIMEOUT, transport="requests"):
+        if transport == "httpx" and httpx is None:
+            raise RuntimeError("--transport httpx needs httpx installed (pip install httpx)")
+        self.store, self.journal_path = store, journal_path
+        self.concurrency, self.timeout, self.transport = concurrency, timeout, transport
+        self.pacer = HostPacer(per_host_rps)
+        self.counts = {"fetched": 0, "new": 0, "duplicate": 0, "failed": 0, "bytes": 0}
+
+    async def _get(self, url):
+        """(status, body, Retry-After) of one GET; raises on network errors."""
+        if self.transport == "httpx":
+            resp = await self.client.get(url, timeout=self.timeout)
+            return resp.status_code, resp.content, resp.headers.get("Retry-After")
+        loop = asyncio.get_running_loop()
+        resp = await loop.run_in_executor(self.pool, partial(self.session.get, url, timeout=self.timeout))
+        return resp.status_code, resp.content, resp.headers.get("Retry-After")
+
+    async def fetch(self, url):
+        """One journal row for `url`, after up to RETRIES retries of 429/5xx/network errors."""
+        status = "error"
+        for attempt in range(RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(delay)
+            await self.pacer.wait(url)
+            delay = BACKOFF_S * 2 ** attempt
+            try:
+                code, body, retry_after = await self._get(url)
+            except Exception as err:
+                status = type(err).__name__
+                continue
+            status = str(code)
+            if code == 429 or code >= 500:
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                continue
+            if code != 200:
+                break
+            ext = image_ext(body)
+            if ext is None or len(body) > MAX_BYTES:
+                status = "not-image" if ext is None else "too-large"
+                break
+            sha, new = self.store.put(body, ext)
+            self.counts["new" if new else "duplicate"] += 1
+            self.counts["bytes"] += len(body) if new else 0
+            phash = await asyncio.get_running_loop().run_in_executor(None, dhash, body) if Image else None
+            return {"url": url, "status": status, "sha256": sha, "bytes": len(body), "dhash": phash or ""}
+        self.counts["failed"] += 1
+        return {"url": url, "status": status, "sha256": "", "bytes": "", "dhash": ""}
+
+    async def _worker(self, urls, writer, f):
+        for url in urls:   # the workers share one iterator: at most `concurrency` URLs in flight
+            row = await self.fetch(url)
+            writer.writerow(row)
+            f.flush()
+            self.counts["fetched"] += 1
+            if self.counts["fetched"] % 500 == 0:
+                logging.info(f"{self.counts['fetched']:,} fetched ({self.counts['new']:,} new, "
+                             f"{self.counts['duplicate']:,} already stored, {self.counts['failed']:,} failed)")
+
+    async def run(self, urls):
+        new_file = not os.path.exists(self.journal_path)
+        with open(self.journal_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=JOURNAL_FIELDS)
+            if new_file:
+                writer.writeheader()
+            it = iter(urls)
+            if self.transport == "httpx":
+                limits = httpx.Limits(max_connections=self.concurrency)
+                async with httpx.AsyncClient(headers=HEADERS, limits=limits, follow_redirects=True) as self.client:
+                    await asyncio.gather(*(self._worker(it, writer, f) for _ in range(self.concurrency)))
+            else:
+                self.session = requests.Session()
+                self.session.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.concurrency)
+                self.session.mount("http://", adapter)
+                self.session.mount("https://", adapter)
+                with ThreadPoolExecutor(self.concurrency, thread_name_prefix="image") as self.pool:
+                    await asyncio.gather(*(self._worker(it, writer, f) for _ in range(self.concurrency)))
+                self.session.close()
+        return self.counts
+
+
+# —————————————————————————
+# LISTINGS ↔ IMAGES
+# —————————————————————————
+def listing_urls(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per (Listing ID, position, url) from the `Images` column ("; "-separated, "N/A" = none)."""
+    rows = [(lid, pos, u)
+            for lid, images in zip(df["Listing ID"], df["Images"]) if isinstance(images, str)
+            for pos, u in enumerate(u for u in _IMG_SEP.split(images.strip()) if u and u != "N/A")]
+    return pd.DataFrame(rows, columns=["Listing ID", "position", "url"])
+
+
+def _popcount64(x):
+    return np.unpackbits(x.astype(">u8").view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def near_pairs(hashes: np.ndarray, max_distance=MAX_DISTANCE, max_bucket=COMMON_MAX * 10):
+    """
+    (i, j) positions of dHashes at most max_distance bits apart. The 64
+    bits are cut into max_distance + 1 bands; two hashes that close agree
+    exactly on at least one band, so only band bucket-mates are compared.
+    Buckets bigger than max_bucket (flat images: blank, all-white) are skipped.
+    """
+    bounds = np.linspace(0, 64, max_distance + 2).astype(int)
+    pi, pj = [], []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        key = (hashes >> np.uint64(lo)) & np.uint64((1 << (hi - lo)) - 1)
+        order = np.argsort(key, kind="stable")
+        ks = key[order]
+        first = np.r_[True, ks[1:] != ks[:-1]]
+        start = np.maximum.accumulate(np.where(first, np.arange(len(ks)), 0))
+        size = np.bincount(start, minlength=len(ks))[start]
+        for offset in range(1, min(int(size.max(initial=1)), max_bucket)):
+            a = np.arange(len(ks) - offset)
+            same = (start[a] == start[a + offset]) & (size[a] <= max_bucket)
+            pi.append(order[a[same]])
+            pj.append(order[a[same] + offset])
+    if not pi:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    i, j = np.concatenate(pi), np.concatenate(pj)
+    close = _popcount64(hashes[i] ^ hashes[j]) <= max_distance
+    pairs = np.unique(np.sort(np.stack([i[close], j[close]], axis=1), axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def image_groups(shas: pd.Series, dhashes: pd.Series) -> pd.Series:
+    """Group label per distinct sha256: near-identical dHashes share one (byte-identical images always do)."""
+    uniq = pd.DataFrame({"sha256": shas, "dhash": dhashes}).drop_duplicates("sha256").reset_index(drop=True)
+    has = uniq["dhash"].fillna("").str.len() == 16
+    idx = np.flatnonzero(has.to_numpy())
+    h = np.array([int(x, 16) for x in uniq.loc[has, "dhash"]], dtype=np.uint64)
+    i, j = near_pairs(h)
+    labels = connected_components(len(uniq), idx[i], idx[j])
+    return pd.Series(labels, index=uniq["sha256"])
+
+
+def listing_matches(images: pd.DataFrame, max_listings=COMMON_MAX) -> pd.DataFrame:
+    """Pairs of listings showing the same photo; logos/placeholders (groups on > max_listings listings) ignored."""
+    cols = ["Listing ID A", "Listing ID B", "shared_images", "identical_images"]
+    per = images.dropna(subset=["group"]).drop_duplicates(["Listing ID", "group", "sha256"])
+    listings = per.groupby("group")["Listing ID"].transform("nunique")
+    per = per[(listings > 1) & (listings <= max_listings)]
+    pairs = per.merge(per, on="group", suffixes=(" A", " B"))
+    pairs = pairs[pairs["Listing ID A"] < pairs["Listing ID B"]]
+    if pairs.empty:
+        return pd.DataFrame(columns=cols)
+    pairs = pairs.assign(identical=pairs["sha256 A"] == pairs["sha256 B"])
+    out = (pairs.groupby(["Listing ID A", "Listing ID B", "group"])["identical"].any()
+                .groupby(level=[0, 1]).agg(shared_images="size", identical_images="sum").reset_index())
+    return out.sort_values("shared_images", ascending=False)[cols]
+
+
+def run(infile=None, store_dir=None, concurrency=CONCURRENCY, per_host_rps=PER_HOST_RPS,
+        transport="requests", limit=None):
+    # same folder convention as preprocessData.py
+    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    folder = os.path.join(script_dir, "preprocessed-data")
+    infile = infile or os.path.join(folder, "guland_final.csv")
+    store_dir = store_dir or os.path.join(folder, "images")
+    journal_path = os.path.join(store_dir, "downloads.csv")
+    outfile = os.path.join(store_dir, "listing_images.csv")
+    matchfile = os.path.join(store_dir, "image_matches.csv")
+
+    logging.info(f"Loading image URLs from {infile}")
+    images = listing_urls(read_typed(infile, "final", columns=["Listing ID", "Images"]))
+    store = ImageStore(store_dir)
+    journal = read_journal(journal_path)
+    logging.info(f"{len(images):,} images on {images['Listing ID'].nunique():,} listings; "
+                 f"{len(store.present):,} objects already stored")
+
+    # resume: skip URLs whose object is on disk or that will not give an image
+    done = journal[journal["sha256"].map(lambda s: s in store) | journal["status"].isin(FINAL)]
+    todo = images["url"].drop_duplicates()
+    todo = todo[~todo.isin(done.index)]
+    if limit:
+        todo = todo.head(limit)
+    if Image is None:
+        logging.warning("Pillow not installed: images are stored and deduplicated by SHA-256 only, "
+                        "without perceptual hashes (pip install pillow, then re-run to add them)")
+
+    if len(todo):
+        logging.info(f"Downloading {len(todo):,} images ({concurrency} at a time, "
+                     f"{per_host_rps or 'unlimited'} requests/s per host, {transport})")
+        t0 = time.perf_counter()
+        downloader = ImageDownloader(store, journal_path, concurrency, per_host_rps, transport=transport)
+        counts = asyncio.run(downloader.run(todo))
+        dt = time.perf_counter() - t0
+        logging.info(f"Fetched {counts['fetched']:,} in {dt:.1f}s ({counts['fetched'] / max(dt, 1e-9):.1f}/s): "
+                     f"{counts['new']:,} new ({counts['bytes'] / 2**20:.1f} MB), "
+                     f"{counts['duplicate']:,} already stored, {counts['failed']:,} failed")
+        journal = read_journal(journal_path)
+    else:
+        logging.info("Nothing to download")
+
+    # perceptual hashes for objects stored before Pillow was installed
+    missing = journal.index[(journal["dhash"] == "") & journal["sha256"].map(lambda s: s in store)]
+    if Image is not None and len(missing):
+        by_sha = {}
+        for url in missing:
+            sha = journal.at[url, "sha256"]
+            if sha not in by_sha:
+                by_sha[sha] = dhash(store.read(sha)) or ""
+            journal.at[url, "dhash"] = by_sha[sha]
+        journal.reset_index().to_csv(journal_path, index=False, columns=JOURNAL_FIELDS)
+        logging.info(f"Added perceptual hashes for {len(by_sha):,} stored images")
+
+    stored = journal[journal["sha256"].map(lambda s: s in store)]
+    images = images.join(stored[["sha256", "dhash"]], on="url")
+    ok = images["sha256"].notna()
+    images["group"] = pd.Series(pd.NA, index=images.index, dtype="Int64")
+    if ok.any():
+        images.loc[ok, "group"] = images.loc[ok, "sha256"].map(image_groups(stored["sha256"], stored["dhash"]))
+    images.to_csv(outfile, index=False, encoding="utf-8-sig")
+    matches = listing_matches(images)
+    matches.to_csv(matchfile, index=False, encoding="utf-8-sig")
+    logging.info(f"{int(ok.sum()):,} of {len(images):,} listing images stored as {len(store.present):,} objects, "
+                 f"{images.loc[ok, 'group'].nunique():,} distinct photos; "
+                 f"{len(matches):,} listing pairs share a photo")
+    logging.info(f"✅ Image index saved to: {outfile}")
+    return len(images)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download listing images into a content-addressed store.")
+    parser.add_argument("--input", help="CSV with 'Listing ID' and 'Images' columns (default: guland_final.csv)")
+    parser.add_argument("--store", help="store folder (default: preprocessed-data/images)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="downloads in flight")
+    parser.add_argument("--per-host-rps", type=float, default=PER_HOST_RPS,
+                        help="requests/s per image host (0 = unlimited)")
+    parser.add_argument("--transport", choices=["requests", "httpx"], default="requests")
+    parser.add_argument("--limit", type=int, help="download at most this many new images")
+    args = parser.parse_args()
+    run(infile=args.input, store_dir=args.store, concurrency=args.concurrency,
+        per_host_rps=args.per_host_rps, transport=args.transport, limit=args.limit)
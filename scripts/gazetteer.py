@@ -0,0 +1,198 @@
+import logging
+import os
+import re
+import unicodedata
+
+import pandas as pd
+
+# —————————————————————————
+# ADMINISTRATIVE GAZETTEER
+# —————————————————————————
+# Maps the free-text Location of a listing ("Phường 5, Quận 3, TP. Hồ Chí
+# Minh") to canonical province / district / ward codes from the GSO list of
+# administrative units (danhmuchanhchinh.gso.gov.vn, exported as CSV to
+# data/gazetteer.csv).
+#
+# Unit names are folded (no diacritics, no 'Phường'/'Quận'/'TP.' type words,
+# lowercase, no leading zeros) into one word-level prefix trie. A location is
+# read once, left to right: at every word the trie gives the longest unit
+# name starting there, narrowed by the type word in front of it ('quận 1' is
+# a district, 'phường 1' a ward). The hits are then resolved top-down: the
+# province, a district of that province, a ward of that district.
+#
+# cleanData adds the codes (Int32, so district analytics are an integer
+# groupby) and the canonical District / Ward names; without the file it
+# warns and leaves Location as it is.
+# —————————————————————————
+GAZETTEER_PATH = "data/gazetteer.csv"
+
+PROVINCE, DISTRICT, WARD = 0, 1, 2
+CODE_COLUMNS = ["Province Code", "District Code", "Ward Code"]
+
+# folded CSV header -> field; both the plain names and the GSO export's headers
+HEADERS = {
+    "province code": "province_code", "ma tp": "province_code",
+    "province name": "province_name", "tinh thanh pho": "province_name",
+    "district code": "district_code", "ma qh": "district_code",
+    "district name": "district_name", "quan huyen": "district_name",
+    "ward code": "ward_code", "ma px": "ward_code",
+    "ward name": "ward_name", "phuong xa": "ward_name",
+}
+
+# type words (folded) that may precede a name, and the levels they allow
+TYPE_WORDS = {
+    "tinh": {PROVINCE},
+    "thanh pho": {PROVINCE, DISTRICT}, "tp": {PROVINCE, DISTRICT},
+    "quan": {DISTRICT}, "q": {DISTRICT}, "huyen": {DISTRICT}, "thi xa": {DISTRICT}, "tx": {DISTRICT},
+    "phuong": {WARD}, "p": {WARD}, "xa": {WARD}, "thi tran": {WARD}, "tt": {WARD},
+}
+# stripped from the front of gazetteer names (the spelled-out type words)
+_NAME_PREFIXES = ["thanh pho", "thi tran", "thi xa", "phuong", "huyen", "quan", "tinh", "xa"]
+
+# common spellings that are not the official name
+ALIASES = {
+    "ho chi minh": ["hcm", "tphcm", "sai gon"],
+    "ha noi": ["hn"],
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+|,")
+
+
+def fold(text) -> str:
+    """Lowercase, without diacritics ('đ' -> 'd'); words and commas separated by single spaces."""
+    if not isinstance(text, str):
+        return ""
+    t = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    t = "".join(ch for ch in t if not unicodedata.combining(ch))
+    return " ".join(str(int(tok)) if tok.isdigit() else tok for tok in _TOKEN.findall(t))
+
+
+def _bare_name(name) -> str:
+    """Folded unit name without its type word ('Thành phố Hồ Chí Minh' -> 'ho chi minh')."""
+    f = fold(name)
+    for prefix in _NAME_PREFIXES:
+        if f.startswith(prefix + " "):
+            return f[len(prefix) + 1:]
+    return f
+
+
+class Gazetteer:
+    def __init__(self, units):
+        """units: {(level, code): (name, parent code or None)}."""
+        self.units = units
+        self.trie = {}
+        for (level, code), (name, _) in units.items():
+            keys = [_bare_name(name)]
+            if level == PROVINCE:
+                keys += ALIASES.get(keys[0], [])
+            for key in keys:
+                node = self.trie
+                for tok in key.split():
+                    node = node.setdefault(tok, {})
+                node.setdefault(None, []).append((level, code))
+
+    @classmethod
+    def from_csv(cls, path):
+        df = pd.read_csv(path, dtype=str)
+        df = df.rename(columns={c: HEADERS[fold(c)] for c in df.columns if fold(c) in HEADERS})
+        missing = set(HEADERS.values()) - set(df.columns)
+        if missing:
+            raise ValueError(f"{path}: missing gazetteer columns {sorted(missing)}")
+        df = df.dropna(subset=["province_code"])
+
+        units = {}
+        for level, parent, code, name in [(PROVINCE, None, "province_code", "province_name"),
+                                          (DISTRICT, "province_code", "district_code", "district_name"),
+                                          (WARD, "district_code", "ward_code", "ward_name")]:
+            cols = [code, name] + ([parent] if parent else [])
+            for row in df[cols].dropna(subset=[code, name]).drop_duplicates(code).itertuples(index=False):
+                units[(level, int(row[0]))] = (row[1], int(row[2]) if parent else None)
+        return cls(units)
+
+    @classmethod
+    def load(cls, path):
+        """The gazetteer at `path`, or None (with a warning) when there is no such file."""
+        if not os.path.exists(path):
+            logging.warning(f"Gazetteer {path} not found; Location is left unparsed "
+                            f"(export the GSO list of administrative units there to enable it)")
+            return None
+        gaz = cls.from_csv(path)
+        logging.info(f"Loaded gazetteer with {len(gaz.units)} units from {path}")
+        return gaz
+
+    # ---- matching ----
+    def _longest(self, tokens, i):
+        """(end, entries) of the longest unit name starting at tokens[i]."""
+        node, best = self.trie, (i, None)
+        for j in range(i, len(tokens)):
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            if None in node:
+                best = (j + 1, node[None])
+        return best
+
+    def _scan(self, tokens):
+        """Candidate (level, code) lists of every name in the text, in reading order."""
+        hits, i = [], 0
+        while i < len(tokens):
+            levels = None
+            for n in (2, 1):
+                word = " ".join(tokens[i:i + n])
+                if len(tokens) - i > n and word in TYPE_WORDS:
+                    levels, i = TYPE_WORDS[word], i + n
+                    break
+            end, entries = self._longest(tokens, i)
+            if entries:
+                hits.append([e for e in entries if levels is None or e[0] in levels] or entries)
+                i = end
+            else:
+                i += 1
+        return hits
+
+    def _pick(self, hits, level, parents, before):
+        """(index, code) of the last name in hits[:before] at `level` whose parent is in `parents` (None = any)."""
+        for i in range(before - 1, -1, -1):
+            codes = [c for lv, c in hits[i] if lv == level
+                     and (parents is None or self.units[(lv, c)][1] in parents)]
+            if len(codes) == 1:
+                return i, codes[0]
+        return before, None
+
+    def match(self, location):
+        """
+        (province, district, ward) codes of a Location string, None where it
+        could not be told. Locations read ward, district, province, so each
+        level is looked for before the name taken for the level above it
+        ('Huyện Y, Bắc Ninh' must not take the city of Bắc Ninh as district).
+        """
+        hits = self._scan(fold(location).split())
+        i, province = self._pick(hits, PROVINCE, None, len(hits))
+        i, district = self._pick(hits, DISTRICT, None if province is None else {province}, i)
+        if district is not None:
+            province = self.units[(DISTRICT, district)][1]
+            _, ward = self._pick(hits, WARD, {district}, i)
+        elif province is not None:
+            # a ward without its district only counts if it is the only one of that name in the province
+            districts = {c for (lv, c), (_, p) in self.units.items() if lv == DISTRICT and p == province}
+            _, ward = self._pick(hits, WARD, districts, i)
+            if ward is not None:
+                district = self.units[(WARD, ward)][1]
+        else:
+            ward = None
+        return province, district, ward
+
+    def normalize(self, locations: pd.Series) -> pd.DataFrame:
+        """
+        Code and name columns for every row of `locations`. Each distinct
+        string is matched once (the column has few distinct values), then the
+        results are spread back to the rows.
+        """
+        row_codes, uniques = pd.factorize(locations)
+        matched = pd.DataFrame([self.match(u) for u in uniques], columns=CODE_COLUMNS, dtype="Int64")
+        name = {lv: {c: n for (l2, c), (n, _) in self.units.items() if l2 == lv} for lv in (DISTRICT, WARD)}
+        matched["District"] = matched["District Code"].map(name[DISTRICT])
+        matched["Ward"] = matched["Ward Code"].map(name[WARD])
+        out = matched.reindex(row_codes)   # factorize's -1 (missing Location) -> all-NA row
+        out.index = locations.index
+        return out
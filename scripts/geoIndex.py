@@ -0,0 +1,217 @@
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+try:
+    from scripts.snapshot import read_typed
+except ImportError:  # run directly as `python scripts/geoIndex.py`
+    from snapshot import read_typed
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_final.csv"]
+OUTPUTS = ["preprocessed-data/geo_index.npz"]
+
+# —————————————————————————
+# SETUP LOGGING
+# —————————————————————————
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# —————————————————————————
+# GRID INDEX
+# —————————————————————————
+# Points are bucketed into a lat/lon grid of CELL_DEG degrees (~1.1 km) and
+# stored sorted by cell, so a cell's points are one contiguous slice. Only
+# occupied cells are kept: `cells` holds their sorted ids and `offsets` the
+# slice boundaries (CSR layout). A query visits the few cells overlapping
+# its bounding box and computes exact haversine distances for those points
+# only.
+CELL_DEG = 0.01
+EARTH_KM = 6371.0088
+KM_PER_DEG_LAT = 110.574
+
+# Vietnam plus a margin; points outside are treated as bad coordinates
+LAT_RANGE = (7.0, 24.5)
+LON_RANGE = (101.0, 118.0)
+
+# columns carried along for comparable-price lookups
+PAYLOAD = ["Listing ID", "Price", "Area", "Province", "Property Type"]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(a))
+
+
+class GeoIndex:
+    def __init__(self, lat, lon, rows, cell_deg=CELL_DEG, payload=None):
+        """lat/lon: float arrays; rows: position of each point in the source frame."""
+        self.cell_deg = cell_deg
+        self.n_cols = int(np.ceil((LON_RANGE[1] - LON_RANGE[0]) / cell_deg)) + 1
+        cell = self._cell_of(lat, lon)
+        order = np.argsort(cell, kind="stable")
+        self.lat, self.lon = lat[order].astype(np.float64), lon[order].astype(np.float64)
+        self.rows = rows[order]
+        self.cells, starts = np.unique(cell[order], return_index=True)
+        self.offsets = np.append(starts, len(order)).astype(np.int64)
+        self.payload = payload.iloc[order].reset_index(drop=True) if payload is not None else None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _cell_of(self, lat, lon):
+        r = np.floor((lat - LAT_RANGE[0]) / self.cell_deg).astype(np.int64)
+        c = np.floor((lon - LON_RANGE[0]) / self.cell_deg).astype(np.int64)
+        return r * self.n_cols + c
+
+    @classmethod
+    def from_frame(cls, df, cell_deg=CELL_DEG):
+        lat = pd.to_numeric(df["Latitude"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        lon = pd.to_numeric(df["Longitude"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        ok = ((lat >= LAT_RANGE[0]) & (lat <= LAT_RANGE[1]) & (lon >= LON_RANGE[0]) & (lon <= LON_RANGE[1]))
+        rows = np.flatnonzero(ok)
+        payload = df.iloc[rows][[c for c in PAYLOAD if c in df]].reset_index(drop=True)
+        return cls(lat[ok], lon[ok], rows, cell_deg, payload)
+
+    # ---- persistence ----
+    def save(self, path):
+        arrays = {"lat": self.lat, "lon": self.lon, "rows": self.rows,
+                  "cells": self.cells, "offsets": self.offsets, "cell_deg": np.float64(self.cell_deg)}
+        if self.payload is not None:
+            for col in self.payload:
+                values = self.payload[col]
+                if pd.api.types.is_numeric_dtype(values):
+                    arrays[f"p:{col}"] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                else:
+                    arrays[f"p:{col}"] = values.astype("string").fillna("").to_numpy(dtype=str)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path, allow_pickle=False)
+        self = cls.__new__(cls)
+        self.cell_deg = float(z["cell_deg"])
+        self.n_cols = int(np.ceil((LON_RANGE[1] - LON_RANGE[0]) / self.cell_deg)) + 1
+        self.lat, self.lon, self.rows = z["lat"], z["lon"], z["rows"]
+        self.cells, self.offsets = z["cells"], z["offsets"]
+        cols = {k[2:]: z[k] for k in z.files if k.startswith("p:")}
+        self.payload = pd.DataFrame(cols) if cols else None
+        return self
+
+    # ---- queries ----
+    def _candidates(self, lat_min, lat_max, lon_min, lon_max):
+        """Sorted positions of points in the cells overlapping the box."""
+        r0, r1 = (np.floor((np.array([lat_min, lat_max]) - LAT_RANGE[0]) / self.cell_deg)).astype(np.int64)
+        c0, c1 = (np.floor((np.array([lon_min, lon_max]) - LON_RANGE[0]) / self.cell_deg)).astype(np.int64)
+        c0, c1 = max(c0, 0), min(c1, self.n_cols - 1)
+        if c0 > c1 or r0 > r1:
+            return np.empty(0, dtype=np.int64)
+        # each grid row of the box is one contiguous range of cell ids
+        lo_ids = np.arange(r0, r1 + 1) * self.n_cols + c0
+        lo = np.searchsorted(self.cells, lo_ids, side="left")
+        hi = np.searchsorted(self.cells, lo_ids + (c1 - c0), side="right")
+        spans = [(self.offsets[a], self.offsets[b]) for a, b in zip(lo, hi) if b > a]
+        if not spans:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(s, e) for s, e in spans])
+
+    def bbox(self, lat_min, lat_max, lon_min, lon_max):
+        """Source-row positions of points inside the box."""
+        idx = self._candidates(lat_min, lat_max, lon_min, lon_max)
+        keep = ((self.lat[idx] >= lat_min) & (self.lat[idx] <= lat_max)
+                & (self.lon[idx] >= lon_min) & (self.lon[idx] <= lon_max))
+        return self.rows[idx[keep]]
+
+    def _within(self, lat, lon, radius_km):
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlon = radius_km / (KM_PER_DEG_LAT * max(np.cos(np.radians(lat)), 1e-6))
+        idx = self._candidates(lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+        d = haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+        keep = d <= radius_km
+        return idx[keep], d[keep]
+
+    def radius(self, lat, lon, radius_km):
+        """(rows, distances_km) of points within radius_km, nearest first."""
+        idx, d = self._within(lat, lon, radius_km)
+        order = np.argsort(d, kind="stable")
+        return self.rows[idx[order]], d[order]
+
+    def knn(self, lat, lon, k=10, max_km=50.0):
+        """(rows, distances_km) of the k nearest points (fewer if none within max_km)."""
+        r = self.cell_deg * KM_PER_DEG_LAT
+        while True:
+            idx, d = self._within(lat, lon, r)
+            # everything within r has been seen, so the k nearest among them are exact
+            if len(idx) >= k or r >= max_km:
+                order = np.argsort(d, kind="stable")[:k]
+                return self.rows[idx[order]], d[order]
+            r = min(r * 2, max_km)
+
+    def comparables(self, lat, lon, k=10, max_km=50.0):
+        """k nearest listings with their price per m² (million VND)."""
+        return self.describe(*self.knn(lat, lon, k, max_km))
+
+    def describe(self, rows, distances):
+        """Payload columns (plus distance and price per m²) for query results."""
+        if self.payload is None:
+            return pd.DataFrame({"row": rows, "distance_km": distances})
+        # payload is stored in index order; map source rows back to it
+        out = self.payload.iloc[self._row_pos(rows)].reset_index(drop=True)
+        out.insert(0, "distance_km", np.round(distances, 3))
+        out.insert(0, "row", rows)
+        if {"Price", "Area"} <= set(out.columns):
+            price = pd.to_numeric(out["Price"], errors="coerce")
+            area = pd.to_numeric(out["Area"], errors="coerce")
+            out["price_per_m2"] = (price / area.where(area > 0)).round(2)
+        return out
+
+    def _row_pos(self, rows):
+        if not hasattr(self, "_by_row"):
+            self._by_row = np.argsort(self.rows, kind="stable")
+        return self._by_row[np.searchsorted(self.rows, rows, sorter=self._by_row)]
+
+
+def run():
+    # same folder convention as preprocessData.py
+    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    folder = os.path.join(script_dir, "preprocessed-data")
+    infile = os.path.join(folder, "guland_final.csv")
+    outfile = os.path.join(folder, "geo_index.npz")
+
+    logging.info(f"Loading data from {infile}")
+    df = read_typed(infile, "final", columns=["Latitude", "Longitude"] + PAYLOAD)
+
+    index = GeoIndex.from_frame(df)
+    logging.info(f"Indexed {len(index):,} of {len(df):,} rows with coordinates "
+                 f"in {len(index.cells):,} cells of {CELL_DEG}°")
+    index.save(outfile)
+    logging.info(f"✅ Geo index saved to: {outfile}")
+    return len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the listing geo index.")
+    parser.add_argument("--near", nargs=2, type=float, metavar=("LAT", "LON"),
+                        help="print the nearest comparables instead of rebuilding")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--km", type=float, default=None, help="all listings within this radius instead of k nearest")
+    args = parser.parse_args()
+    if not args.near:
+        run()
+    else:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        index = GeoIndex.load(os.path.join(root, OUTPUTS[0]))
+        lat, lon = args.near
+        if args.km:
+            rows, d = index.radius(lat, lon, args.km)
+            print(f"{len(rows)} listings within {args.km} km")
+            print(index.describe(rows, d).to_string(index=False))
+        else:
+            print(index.comparables(lat, lon, k=args.k).to_string(index=False))
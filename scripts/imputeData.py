@@ -3,6 +3,15 @@ import os
 import numpy as np
 import pandas as pd
 import logging
+try:
+    from scripts.schema import apply_schema, read_csv_typed
+except ImportError:  # run directly as `python scripts/imputeData.py`
+    from schema import apply_schema, read_csv_typed
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_full.csv"]
+OUTPUTS = ["preprocessed-data/guland_full_imputed.csv"]
 
 # —————————————————————————
 # 0. SETUP LOGGING
@@ -26,105 +35,181 @@ def preprocess(text):
     return t
 
 # —————————————————————————
-# 2. COMPILED REGEXES
+# 2. KEYWORDS AND PATTERNS
 # —————————————————————————
-dim_pair   = re.compile(r'(?P<w>\d+(?:\.\d+)?)\s*m?\s*[x×]\s*(?P<l>\d+(?:\.\d+)?)\s*m?')
-width_re   = re.compile(r'ngang\s*(?P<w>\d+(?:\.\d+)?)\s*m')
-length_re  = re.compile(r'(?:dài|dai)\s*(?P<l>\d+(?:\.\d+)?)\s*m')
-
-bed_re     = re.compile(r'(?P<b>\d+)\s*(?:pn|phòng ngủ)')
-bath_re    = re.compile(r'(?P<ba>\d+)\s*(?:wc|nhà vệ sinh)')
-
-floor_l    = re.compile(r'(\d+)\s*lầu')
-floor_tum  = re.compile(r'tum|gác')
-
-dir_re     = re.compile(
-    r'hướng\s*(đông bắc|tây nam|đông nam|tây bắc|đông|tây|nam|bắc)'
-)
-
-alley_w_re = re.compile(
-    r'(?:hẻm|lộ|đường)[^\d]{0,5}(?P<aw>\d+(?:\.\d+)?)\s*m'
-)
+# Every feature comes out of ONE scan of the description (see scan()):
+#
+#   KEYWORDS  literal phrases → (feature, value) tags, compiled into a prefix
+#             trie so 'đường', 'đường đất' and 'đường đá' share one branch and
+#             the longest phrase wins (it also carries its prefixes' tags)
+#   SCAN      the numeric patterns plus the keyword trie, one named group
+#             each, wrapped in a lookahead so it is tried at every position
+#             and overlapping hits ('ngang 5m' inside 'ngang 5m x 20m') are
+#             all seen
+#
+# A new feature is one more keyword or group in the same scan, not another
+# pass over every description.
+KEYWORDS = {
+    "trệt":             (("ground", 1),),
+    "tum":              (("attic", 1),),
+    "gác":              (("attic", 1),),
+    "hẻm":              (("position", "Trong hẻm"),),
+    "đường":            (("position", "Đường chính"),),
+    "bê tông":          (("road_type", "Đường bê tông"),),
+    "nhựa":             (("road_type", "Đường nhựa"),),
+    "đường đất":        (("road_type", "Đường đất"),),
+    "đường đá":         (("road_type", "Đường đá"),),
+    "sổ hồng":          (("legal_status", "Sổ hồng"),),
+    "sổ đỏ":            (("legal_status", "Sổ đỏ"),),
+    "sổ chung":         (("legal_status", "Sổ chung"),),
+    "giấy tay":         (("legal_status", "Giấy tay"),),
+    "mặt tiền":         (("frontage", 1),),
+    "mặt phố":          (("frontage", 1),),
+    "full nội thất":    (("furnishing", "Đầy đủ"),),
+    "đầy đủ nội thất":  (("furnishing", "Đầy đủ"),),
+    "nội thất đầy đủ":  (("furnishing", "Đầy đủ"),),
+    "nội thất cao cấp": (("furnishing", "Đầy đủ"),),
+    "nội thất cơ bản":  (("furnishing", "Cơ bản"),),
+    "không nội thất":   (("furnishing", "Không"),),
+    "nhà trống":        (("furnishing", "Không"),),
+    "bàn giao thô":     (("furnishing", "Không"),),
+}
+
+# When a description mentions several values of a feature, the first one
+# listed here wins
+PRIORITY = {
+    "position":     ["Trong hẻm", "Đường chính"],
+    "road_type":    ["Đường bê tông", "Đường nhựa", "Đường đất", "Đường đá"],
+    "legal_status": ["Sổ hồng", "Sổ đỏ", "Sổ chung", "Giấy tay"],
+    "furnishing":   ["Đầy đủ", "Cơ bản", "Không"],
+}
+
+DIRECTIONS = 'đông bắc|tây nam|đông nam|tây bắc|đông|tây|nam|bắc'
+NUMBER = r'\d+(?:\.\d+)?'
+
+
+def _trie_pattern(words):
+    """Regex alternation of `words` shaped like their prefix trie (longest match first)."""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        group = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{group})?" if "" in node else group
+    return build(trie)
+
+
+# every keyword's tags plus those of the keywords it starts with, which the
+# trie's longest match hides ('đường đất' is also an 'đường')
+_TAGS = {kw: tuple(tag for k in KEYWORDS if kw.startswith(k) for tag in KEYWORDS[k]) for kw in KEYWORDS}
+_RANK = {(f, v): i for f, values in PRIORITY.items() for i, v in enumerate(values)}
+
+keyword_re = re.compile(_trie_pattern(KEYWORDS))
+
+# At one position the first group that matches is the one reported, so the
+# groups are laid out to never start on the same text, except the alley
+# pattern whose leading word scan() looks up in the trie itself.
+SCAN = re.compile('(?=' + '|'.join([
+    rf'(?P<w>{NUMBER})\s*m?\s*[x×]\s*(?P<l>{NUMBER})',     # 5x20, 5m x 20m
+    r'(?P<b>\d+)\s*(?:pn|phòng ngủ)',
+    r'(?P<ba>\d+)\s*(?:wc|nhà vệ sinh)',
+    r'(?<!\d)(?P<lau>\d+)\s*lầu',                           # every one counts, so whole numbers only
+    rf'ngang\s*(?P<wo>{NUMBER})\s*m',
+    rf'(?:dài|dai)\s*(?P<lo>{NUMBER})\s*m',
+    rf'hướng\s*(?P<dir>{DIRECTIONS})',
+    rf'(?:hẻm|lộ|đường)[^\d]{{0,5}}(?P<aw>{NUMBER})\s*m',
+    rf'(?P<kw>{keyword_re.pattern})',
+]) + ')')
 
 # —————————————————————————
 # 3. EXTRACTION FUNCTION
 # —————————————————————————
-def extract(desc: str) -> pd.Series:
-    text = preprocess(desc)
-
-    # DIMENSIONS
-    w = l = np.nan
-    m = dim_pair.search(text)
-    if m:
-        w = float(m.group('w'))
-        l = float(m.group('l'))
+COLUMNS = [
+    'imputed_var_width', 'imputed_var_length', 'imputed_var_bedrooms',
+    'imputed_var_bathrooms', 'imputed_var_floors', 'imputed_var_direction',
+    'imputed_var_position', 'imputed_var_alley_width', 'imputed_var_road_type',
+    'Legal Status', 'Frontage', 'Furnishing',
+]
+
+
+def scan(text: str) -> tuple:
+    """Feature values (in COLUMNS order) of a preprocessed description."""
+    first = {}    # numeric group -> value at its leftmost match
+    best = {}     # keyword feature -> rank of the best value seen
+    lau = attics = 0
+
+    def tag(kw):
+        nonlocal attics
+        for feature, value in _TAGS[kw]:
+            if feature == "attic":
+                attics += 1
+            else:
+                r = _RANK.get((feature, value), 0)
+                if r < best.get(feature, len(_RANK)):
+                    best[feature] = r
+
+    for m in SCAN.finditer(text):
+        group = m.lastgroup
+        if group == 'kw':
+            tag(m['kw'])
+        elif group == 'lau':
+            lau += int(m['lau'])
+        elif group == 'aw':
+            kw = keyword_re.match(text, m.start())   # hẻm/đường, hidden behind the alley match
+            if kw:
+                tag(kw.group())
+            first.setdefault('aw', m['aw'])
+        elif group == 'l':
+            first.setdefault('w', m['w'])
+            first.setdefault('l', m['l'])
+        else:
+            first.setdefault(group, m[group])
+
+    # DIMENSIONS: a WxL pair beats separate 'ngang'/'dài' mentions
+    if 'l' in first:
+        w, l = float(first['w']), float(first['l'])
     else:
-        m = width_re.search(text)
-        if m: w = float(m.group('w'))
-        m = length_re.search(text)
-        if m: l = float(m.group('l'))
-
-    # BED & BATH
-    b = np.nan
-    m = bed_re.search(text)
-    if m: b = int(m.group('b'))
-
-    ba = np.nan
-    m = bath_re.search(text)
-    if m: ba = int(m.group('ba'))
-
-    # FLOORS
-    floors = 0.0
-    if 'trệt' in text:
-        floors += 1
-    floors += sum(int(n) for n in floor_l.findall(text))
-    floors += 0.5 * len(floor_tum.findall(text))
+        w = float(first['wo']) if 'wo' in first else np.nan
+        l = float(first['lo']) if 'lo' in first else np.nan
+
+    # FLOORS: ground floor once, every 'N lầu', half a floor per tum/gác
+    floors = ('ground' in best) + lau + 0.5 * attics
     if floors == 0.0:
         floors = np.nan
 
-    # DIRECTION
-    direction = np.nan
-    m = dir_re.search(text)
-    if m:
-        direction = m.group(1).title()
-
-    # POSITION: only 'Đường chính' or 'Trong hẻm'
-    if 'hẻm' in text:
-        position = 'Trong hẻm'
-    elif 'đường' in text:
-        position = 'Đường chính'
-    else:
-        position = np.nan
-
-    # ALLEY WIDTH
-    alley_width = np.nan
-    m = alley_w_re.search(text)
-    if m:
-        alley_width = float(m.group('aw'))
-
-    # ROAD TYPE: restrict to four values
-    if 'bê tông' in text:
-        road_type = 'Đường bê tông'
-    elif 'nhựa' in text:
-        road_type = 'Đường nhựa'
-    elif 'đường đất' in text:
-        road_type = 'Đường đất'
-    elif 'đường đá' in text:
-        road_type = 'Đường đá'
-    else:
-        road_type = np.nan
-
-    return pd.Series({
-        'imputed_var_width': w,
-        'imputed_var_length': l,
-        'imputed_var_bedrooms': b,
-        'imputed_var_bathrooms': ba,
-        'imputed_var_floors': floors,
-        'imputed_var_direction': direction,
-        'imputed_var_position': position,
-        'imputed_var_alley_width': alley_width,
-        'imputed_var_road_type': road_type
-    })
+    def label(feature):
+        return PRIORITY[feature][best[feature]] if feature in best else np.nan
+
+    return (
+        w, l,
+        int(first['b']) if 'b' in first else np.nan,
+        int(first['ba']) if 'ba' in first else np.nan,
+        float(floors),
+        first['dir'].title() if 'dir' in first else np.nan,
+        label('position'),
+        float(first['aw']) if 'aw' in first else np.nan,
+        label('road_type'),
+        label('legal_status'),
+        int('frontage' in best) if text else np.nan,
+        label('furnishing'),
+    )
+
+
+def extract(desc: str) -> pd.Series:
+    return pd.Series(dict(zip(COLUMNS, scan(preprocess(desc)))))
+
+
+def extract_all(descriptions: pd.Series) -> pd.DataFrame:
+    """extract() for a whole column, without building a Series per row."""
+    rows = [scan(preprocess(d)) for d in descriptions]
+    return pd.DataFrame(rows, columns=COLUMNS, index=descriptions.index)
 
 # —————————————————————————
 # 4. MAIN PIPELINE
@@ -135,11 +220,11 @@ def run():
     out_path = os.path.join(script_dir, "preprocessed-data", "guland_full_imputed.csv")
 
     logging.info(f"Loading data from {in_path}")
-    df = pd.read_csv(in_path, dtype=str)
+    df = read_csv_typed(in_path, "raw")
     logging.info(f"Total rows: {len(df)}")
 
     logging.info("Starting extraction of imputed variables...")
-    imputed = df['Description'].apply(extract)
+    imputed = apply_schema(extract_all(df['Description']), "imputed")
 
     # Summary logs
     for col in imputed.columns:
@@ -150,6 +235,7 @@ def run():
 
     df_out.to_csv(out_path, index=False, encoding='utf-8-sig')
     logging.info(f"✅ Done! Saved with imputed vars to: {out_path}")
+    return len(df)
 
 if __name__ == "__main__":
     run()
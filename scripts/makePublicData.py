@@ -1,6 +1,17 @@
 import os
 import pandas as pd
 import logging
+try:
+    from scripts.schema import apply_schema
+    from scripts.snapshot import read_typed
+except ImportError:  # run directly as `python scripts/makePublicData.py`
+    from schema import apply_schema
+    from snapshot import read_typed
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_final.csv"]
+OUTPUTS = ["preprocessed-data/guland_public.csv"]
 
 # —————————————————————————
 # SETUP LOGGING
@@ -19,7 +30,7 @@ def run():
     outfile = os.path.join(folder, "guland_public.csv")
 
     logging.info(f"Loading data from {infile}")
-    df = pd.read_csv(infile, dtype=str)
+    df = read_typed(infile, "final")
 
     logging.info("Dropping unnecessary columns...")
     df.drop(columns=["province_from_filename", "Images", "URL"], inplace=True, errors="ignore")
@@ -27,10 +38,13 @@ def run():
     logging.info("Converting 'Avatar' to binary indicator...")
     df["Avatar"] = df["Avatar"].apply(lambda x: 1 if pd.notna(x) and str(x).strip() != "" else 0)
 
+    apply_schema(df, "public")
+
     logging.info("Saving to guland_public.csv...")
     df.to_csv(outfile, index=False, encoding="utf-8-sig")
 
     logging.info(f"✅ Public data saved to: {outfile}")
+    return len(df)
 
 if __name__ == "__main__":
     run()
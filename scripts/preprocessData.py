@@ -3,6 +3,17 @@ from datetime import timedelta
 import pandas as pd
 import logging
 import os
+try:
+    from scripts.schema import apply_schema, read_csv_typed
+    from scripts.snapshot import snapshot_path, write_feather, write_snapshot
+except ImportError:  # run directly as `python scripts/preprocessData.py`
+    from schema import apply_schema, read_csv_typed
+    from snapshot import snapshot_path, write_feather, write_snapshot
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_full_imputed_cleaned.csv"]
+OUTPUTS = ["preprocessed-data/guland_final.csv", "preprocessed-data/guland_final.snapshot/meta.json"]
 
 # —————————————————————————
 # SETUP LOGGING
@@ -60,11 +71,11 @@ def parse_relative_to_timedelta(text: str) -> pd.Timedelta:
 def run():
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     folder = os.path.join(script_dir, "preprocessed-data")
-    infile  = folder + "\\guland_full_imputed_cleaned.csv"
-    outfile = folder + "\\guland_final.csv"
+    infile  = os.path.join(folder, "guland_full_imputed_cleaned.csv")
+    outfile = os.path.join(folder, "guland_final.csv")
 
     logging.info(f"Loading data from {infile}")
-    df = pd.read_csv(infile, dtype=str)
+    df = read_csv_typed(infile, "cleaned")
     logging.info(f"Total rows: {len(df)}")
 
     # 1) Price
@@ -109,9 +120,17 @@ def run():
     # cleanup
     df.drop(columns=['Scraped At DT', 'Delta', 'Last Updated Date DT'], inplace=True)
 
-    # 4) Save
+    apply_schema(df, "final")
+
+    # 4) Save, plus the memory-mappable snapshot later steps load instead of the CSV
     df.to_csv(outfile, index=False, encoding='utf-8-sig')
     logging.info(f"✅ Final data saved to: {outfile}")
+    snap = write_snapshot(df, snapshot_path(outfile), source_csv=outfile)
+    logging.info(f"✅ Snapshot saved to: {snap}")
+    feather = write_feather(df, outfile)
+    if feather:
+        logging.info(f"✅ Feather copy saved to: {feather}")
+    return len(df)
 
 if __name__ == '__main__':
     run()
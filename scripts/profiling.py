@@ -0,0 +1,107 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# —————————————————————————
+# RSS SAMPLING
+# —————————————————————————
+def current_rss():
+    """Resident set size in bytes, or None when the platform gives no cheap way to read it."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def lifetime_peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # macOS reports bytes, Linux KiB
+
+
+class _PeakSampler:
+    """Polls RSS in a background thread so each step gets its own peak."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __enter__(self):
+        if self.peak is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+# —————————————————————————
+# STEP PROFILER
+# —————————————————————————
+def profile_step(name, func, profile_dir=None):
+    """
+    Run func() and return (result, record) where record holds wall time,
+    CPU time, peak RSS during the step and rows/s (when func returns a
+    row count). With profile_dir, a cProfile dump is written to
+    <profile_dir>/<name>.prof (open with `python -m pstats` or snakeviz).
+    """
+    profiler = cProfile.Profile() if profile_dir else None
+    rss_before = current_rss()
+    with _PeakSampler() as sampler:
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            result = func()
+        finally:
+            if profiler:
+                profiler.disable()
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+
+    record = {
+        "step": name,
+        "status": "ran",
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu, 3),
+        "cpu_util": round(cpu / wall, 2) if wall else None,
+        "rss_start_mb": _mb(rss_before),
+        "rss_peak_mb": _mb(sampler.peak),
+        "process_peak_rss_mb": _mb(lifetime_peak_rss()),
+        "rows": result if isinstance(result, int) else None,
+    }
+    if record["rows"] is not None and wall:
+        record["rows_per_s"] = round(record["rows"] / wall, 1)
+    if profiler:
+        os.makedirs(profile_dir, exist_ok=True)
+        record["profile"] = os.path.join(profile_dir, f"{name}.prof")
+        profiler.dump_stats(record["profile"])
+    return result, record
+
+
+def _mb(n):
+    return round(n / 2**20, 1) if n is not None else None
@@ -0,0 +1,190 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+try:
+    from scripts.schema import read_csv_typed
+except ImportError:  # run directly as `python scripts/queryData.py`
+    from schema import read_csv_typed
+
+# Files read / written, relative to the repo root (used by main.py to skip
+# up-to-date steps)
+INPUTS = ["preprocessed-data/guland_public.csv"]
+OUTPUTS = ["preprocessed-data/guland_public.db"]
+
+# —————————————————————————
+# SETUP LOGGING
+# —————————————————————————
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# —————————————————————————
+# QUERY DATABASE
+# —————————————————————————
+# guland_public.csv is loaded into an indexed SQLite table so filters and
+# column selection run inside SQLite: only matching index entries and the
+# requested columns are read, and results stream row by row, so lookups
+# stay fast and memory-flat however large the file gets.
+TABLE = "listings"
+CHUNK_ROWS = 100_000
+UPDATED = "updated_at"  # Last Updated Date as sortable 'YYYY-MM-DD HH:MM'
+
+INDEXES = {
+    "province_type": ["Province", "Property Type Slug"],
+    "type": ["Property Type"],
+    "price": ["Price"],
+    "area": ["Area"],
+    "bedrooms": ["Bedrooms"],
+    "updated": [UPDATED],
+}
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def run():
+    # same folder convention as preprocessData.py
+    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    folder = os.path.join(script_dir, "preprocessed-data")
+    infile = os.path.join(folder, "guland_public.csv")
+    dbfile = os.path.join(folder, "guland_public.db")
+    tmpfile = dbfile + ".tmp"
+
+    if os.path.exists(tmpfile):
+        os.remove(tmpfile)
+    conn = sqlite3.connect(tmpfile)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    logging.info(f"Loading {infile} into {dbfile}")
+    n_rows = 0
+    for chunk in read_csv_typed(infile, "public", chunksize=CHUNK_ROWS):
+        when = pd.to_datetime(chunk["Last Updated Date"], format="%d/%m/%Y %H:%M", errors="coerce")
+        chunk[UPDATED] = when.dt.strftime("%Y-%m-%d %H:%M")
+        chunk.to_sql(TABLE, conn, if_exists="append", index=False)
+        n_rows += len(chunk)
+
+    for name, cols in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name} ON {TABLE} ({', '.join(map(_q, cols))})")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    os.replace(tmpfile, dbfile)
+
+    logging.info(f"✅ {n_rows} rows, indexes on {', '.join(INDEXES)} → {dbfile}")
+    return n_rows
+
+# —————————————————————————
+# QUERIES
+# —————————————————————————
+def build_query(columns=None, province=None, prop_type=None, price=None, area=None,
+                bedrooms=None, since=None, until=None, order_by=None, descending=False, limit=None):
+    """SELECT statement + parameters; ranges are (lo, hi) with None for open ends."""
+    select = ", ".join(map(_q, columns)) if columns else "*"
+    where, params = [], []
+    if province:
+        where.append(f"{_q('Province')} IN ({', '.join('?' * len(province))})")
+        params += list(province)
+    if prop_type:
+        marks = ", ".join("?" * len(prop_type))
+        where.append(f"({_q('Property Type Slug')} IN ({marks}) OR {_q('Property Type')} IN ({marks}))")
+        params += list(prop_type) * 2
+    for col, rng in (("Price", price), ("Area", area), ("Bedrooms", bedrooms)):
+        if rng:
+            lo, hi = rng
+            if lo is not None:
+                where.append(f"{_q(col)} >= ?")
+                params.append(lo)
+            if hi is not None:
+                where.append(f"{_q(col)} <= ?")
+                params.append(hi)
+    if since:
+        where.append(f"{UPDATED} >= ?")
+        params.append(since)
+    if until:
+        where.append(f"{UPDATED} < ?")
+        params.append(until)
+
+    sql = f"SELECT {select} FROM {TABLE}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if order_by:
+        sql += f" ORDER BY {_q(order_by)}{' DESC' if descending else ''}"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return sql, params
+
+
+def query(dbfile, **filters):
+    """Yields (column names, then) row tuples straight from the SQLite cursor."""
+    conn = sqlite3.connect(f"file:{dbfile}?mode=ro", uri=True)
+    try:
+        cur = conn.execute(*build_query(**filters))
+        yield [d[0] for d in cur.description]
+        yield from cur
+    finally:
+        conn.close()
+
+
+def _range(values):
+    lo, hi = values
+    return (None if lo in ("", "-") else float(lo), None if hi in ("", "-") else float(hi))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Filter guland_public.db (built by main.py); rows stream to stdout as CSV or JSON lines.")
+    parser.add_argument("--build", action="store_true", help="(re)build the database from guland_public.csv")
+    parser.add_argument("--province", nargs="+", metavar="SLUG")
+    parser.add_argument("--type", nargs="+", dest="prop_type", metavar="TYPE", help="slug or display name")
+    parser.add_argument("--price", nargs=2, metavar=("MIN", "MAX"), help="million VND; '-' leaves an end open")
+    parser.add_argument("--area", nargs=2, metavar=("MIN", "MAX"), help="m²; '-' leaves an end open")
+    parser.add_argument("--bedrooms", nargs=2, metavar=("MIN", "MAX"))
+    parser.add_argument("--since", help="Last Updated Date from, e.g. 2025-09-01")
+    parser.add_argument("--until", help="Last Updated Date before, e.g. 2025-10-01")
+    parser.add_argument("--columns", nargs="+", metavar="COL", help="columns to return (default: all)")
+    parser.add_argument("--order-by", metavar="COL", help="sort column")
+    parser.add_argument("--desc", action="store_true", help="sort descending")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--explain", action="store_true", help="print SQLite's query plan instead of rows")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                     OUTPUTS[0]))
+    args = parser.parse_args()
+
+    if args.build:
+        run()
+        sys.exit(0)
+
+    filters = dict(columns=args.columns, province=args.province, prop_type=args.prop_type,
+                   price=_range(args.price) if args.price else None,
+                   area=_range(args.area) if args.area else None,
+                   bedrooms=_range(args.bedrooms) if args.bedrooms else None,
+                   since=args.since, until=args.until, order_by=args.order_by,
+                   descending=args.desc, limit=args.limit)
+    if args.explain:
+        sql, params = build_query(**filters)
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+        print(sql, params)
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+            print(row[-1])
+        sys.exit(0)
+
+    rows = query(args.db, **filters)
+    header = next(rows)
+    if args.format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(header)
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            sys.stdout.write(json.dumps(dict(zip(header, row)), ensure_ascii=False) + "\n")
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+# —————————————————————————
+# RAW COLUMNS (order written by the scraper)
+# —————————————————————————
+CSV_COLUMNS = [
+    "Title","Price","Area","Location","Listing ID","Last Updated",
+    "Property Type","Width","Length","Bedrooms","Bathrooms","Floors",
+    "Position","Direction","Alley Width","Road Type",
+    "Description","URL","Latitude","Longitude","VIP Account","Images",
+    "Avatar","Agent Role","Agent Name","Agent Listing Count",
+    "Province","Property Type Slug","Scraped At"
+]
+
+# Low-cardinality labels: stored once per distinct value instead of per row
+CATEGORICAL_COLUMNS = [
+    "Property Type", "Position", "Direction", "Road Type", "VIP Account",
+    "Agent Role", "Province", "Property Type Slug", "province_from_filename",
+    "imputed_var_position", "imputed_var_direction", "imputed_var_road_type",
+    "Legal Status", "Furnishing", "District", "Ward",
+]
+
+# —————————————————————————
+# DTYPES PER PIPELINE STAGE
+# —————————————————————————
+# Each stage only lists the columns whose type changes at that stage;
+# anything not mentioned is kept as text.
+_RAW = {
+    "Latitude": "float64",
+    "Longitude": "float64",
+    "Agent Listing Count": "Int32",
+}
+
+_IMPUTED = {
+    "imputed_var_width": "float32",
+    "imputed_var_length": "float32",
+    "imputed_var_bedrooms": "Int32",
+    "imputed_var_bathrooms": "Int32",
+    "imputed_var_floors": "float32",
+    "imputed_var_alley_width": "float32",
+}
+
+# Read from the description by imputeData; no scraped counterpart, so they
+# keep their names through every later stage
+_DESCRIBED = {
+    "Frontage": "Int8",
+}
+
+_CLEANED = {
+    "Width": "float32",
+    "Length": "float32",
+    "Alley Width": "float32",
+    "Bedrooms": "Int32",
+    "Bathrooms": "Int32",
+    "Floors": "float32",
+    "Province Code": "Int32",   # administrative codes from the gazetteer
+    "District Code": "Int32",
+    "Ward Code": "Int32",
+}
+
+_FINAL = {
+    "Price": "float64",   # million VND, needs more than float32's 7 digits
+    "Area": "float32",
+}
+
+_PUBLIC = {
+    "Avatar": "Int8",
+}
+
+STAGES = {
+    "raw":      _RAW,                                       # scraped-data/*.csv, guland_full.csv
+    "imputed":  {**_RAW, **_IMPUTED, **_DESCRIBED},                       # guland_full_imputed.csv
+    "cleaned":  {**_RAW, **_DESCRIBED, **_CLEANED},                       # guland_full_imputed_cleaned.csv
+    "final":    {**_RAW, **_DESCRIBED, **_CLEANED, **_FINAL},             # guland_final.csv
+    "public":   {**_RAW, **_DESCRIBED, **_CLEANED, **_FINAL, **_PUBLIC},  # guland_public.csv
+}
+
+
+def dtypes_for(stage: str) -> dict:
+    """Target dtype of every known column at the given stage."""
+    numeric = STAGES[stage]
+    dtypes = {col: "category" for col in CATEGORICAL_COLUMNS}
+    dtypes.update(numeric)
+    return dtypes
+
+# —————————————————————————
+# COERCION
+# —————————————————————————
+def _to_int(s: pd.Series, dtype: str) -> pd.Series:
+    v = pd.to_numeric(s, errors="coerce")
+    info = np.iinfo(dtype.lower())
+    # non-integral or out-of-range values become missing instead of raising
+    bad = (v % 1 != 0) | (v < info.min) | (v > info.max)
+    return v.mask(bad).astype(dtype)
+
+
+def coerce(s: pd.Series, dtype: str) -> pd.Series:
+    if str(s.dtype) == dtype:
+        return s
+    if dtype == "category":
+        return s.astype("category")
+    if dtype.startswith(("Int", "int")):
+        return _to_int(s, dtype)
+    return pd.to_numeric(s, errors="coerce").astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, stage: str) -> pd.DataFrame:
+    """Cast the columns of `df` that the schema knows about, in place."""
+    for col, dtype in dtypes_for(stage).items():
+        if col in df.columns:
+            df[col] = coerce(df[col], dtype)
+    return df
+
+
+def read_csv_typed(path, stage: str, **kwargs):
+    """
+    pd.read_csv with the shared schema.
+
+    Text and categorical columns are typed by the parser directly; numeric
+    columns are read as text and coerced afterwards so stray values such as
+    'N/A' or '5 m' become missing rather than failing the whole load.
+    Passing `chunksize` returns an iterator of typed chunks.
+    """
+    target = dtypes_for(stage)
+    read_as = {col: str for col in CSV_COLUMNS}
+    read_as.update({col: ("category" if dt == "category" else str) for col, dt in target.items()})
+    read_as.update(kwargs.pop("dtype", {}))
+    reader = pd.read_csv(path, dtype=read_as, **kwargs)
+    if kwargs.get("chunksize") or kwargs.get("iterator"):
+        return (apply_schema(chunk, stage) for chunk in reader)
+    return apply_schema(reader, stage)
@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # optional: without pyarrow no Feather copy is written
+    pyarrow = None
+try:
+    from scripts.schema import read_csv_typed
+except ImportError:  # run directly from scripts/
+    from schema import read_csv_typed
+
+# —————————————————————————
+# COLUMNAR SNAPSHOT OF A TYPED CSV
+# —————————————————————————
+# preprocessData writes guland_final.csv and, next to it, the same typed
+# frame as a folder of per-column files (guland_final.snapshot/):
+#
+#   meta.json        row count, column order, kinds, dtypes, categories, and
+#                    the size/mtime of the CSV it was written with
+#   <i>.npy          values: numbers, flags and dates as they are, category codes
+#   <i>.mask.npy     missing flags of nullable integer/boolean columns and text
+#   <i>.txt          text columns: UTF-8 values separated by NUL
+#
+# load_snapshot() memory-maps the numeric and category columns copy-on-write:
+# nothing is parsed or copied, pages are read when touched, every process
+# that maps the files shares them through the page cache, and a page is only
+# copied (in that process, never on disk) when a caller edits it. Text is decoded only for the
+# columns asked for. read_typed() is what pipeline steps call: the snapshot
+# when it belongs to the CSV as it is now, the CSV itself otherwise. Floats
+# are the exact values the CSV was written from; read_csv's default parser
+# can come back one unit in the last place off (32299.999999999996 -> 32300.0).
+#
+# With pyarrow installed, write_feather() also leaves guland_final.feather
+# for tools outside this repo (pd.read_feather, R's arrow, DuckDB).
+# —————————————————————————
+FORMAT_VERSION = 1
+SUFFIX = ".snapshot"
+
+
+def snapshot_path(csv_path):
+    return os.path.splitext(csv_path)[0] + SUFFIX
+
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def write_snapshot(df: pd.DataFrame, path, source_csv=None):
+    """Write `df` (already typed) to the folder `path`; `source_csv` is the CSV it mirrors."""
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    for i, (name, s) in enumerate(df.items()):
+        base = os.path.join(tmp, str(i))
+        col = {"name": name, "dtype": str(s.dtype)}
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.cat.remove_unused_categories()
+            np.save(base + ".npy", s.cat.codes.to_numpy())
+            col.update(kind="category", categories=[str(c) for c in s.cat.categories])
+        elif isinstance(s.dtype, pd.api.extensions.ExtensionDtype) and s.dtype.kind in "biuf":
+            # nullable Int/Float/boolean: values with a placeholder where missing + mask
+            np.save(base + ".npy", s.to_numpy(dtype=s.dtype.numpy_dtype, na_value=0))
+            np.save(base + ".mask.npy", s.isna().to_numpy())
+            col["kind"] = "masked"
+        elif s.dtype.kind in "biufmM":
+            np.save(base + ".npy", s.to_numpy())
+            col["kind"] = "numpy"
+        else:
+            mask = s.isna().to_numpy()
+            text = "\0".join(s.astype(object).where(~mask, "").astype(str).str.replace("\0", "", regex=False))
+            with open(base + ".txt", "wb") as f:
+                f.write(text.encode("utf-8"))
+            np.save(base + ".mask.npy", mask)
+            col["kind"] = "text"
+        columns.append(col)
+
+    meta = {"version": FORMAT_VERSION, "rows": len(df), "columns": columns,
+            "source": _file_stamp(source_csv) if source_csv else None}
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    # swap folders; a reader never sees a half-written snapshot under `path`
+    old = path + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def write_feather(df: pd.DataFrame, csv_path):
+    """Write `df` as <csv_path minus .csv>.feather; None (and nothing written) without pyarrow."""
+    if pyarrow is None:
+        return None
+    path = os.path.splitext(csv_path)[0] + ".feather"
+    tmp = path + ".tmp"
+    df.reset_index(drop=True).to_feather(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def read_meta(path):
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: snapshot format {meta.get('version')}, expected {FORMAT_VERSION}")
+    return meta
+
+
+def _load_column(path, i, col, n_rows):
+    base = os.path.join(path, str(i))
+    kind = col["kind"]
+    if kind == "text":
+        with open(base + ".txt", "rb") as f:
+            values = f.read().decode("utf-8").split("\0") if n_rows else []
+        mask = np.load(base + ".mask.npy")
+        return pd.Series(values, dtype=col["dtype"]).mask(mask)
+    values = np.load(base + ".npy", mmap_mode="c")
+    if kind == "category":
+        return pd.Categorical.from_codes(values, categories=col["categories"], validate=False)  # validating copies
+    if kind == "masked":
+        dtype = pd.api.types.pandas_dtype(col["dtype"])
+        return dtype.construct_array_type()(values, np.load(base + ".mask.npy", mmap_mode="c"))
+    return values
+
+
+def load_snapshot(path, columns=None) -> pd.DataFrame:
+    """
+    The snapshot at `path` as a DataFrame, only `columns` if given (kept in
+    file order, like read_csv's usecols). Numeric and category columns are
+    copy-on-write memory maps: edits stay in this process.
+    """
+    meta = read_meta(path)
+    wanted = [(i, c) for i, c in enumerate(meta["columns"]) if columns is None or c["name"] in columns]
+    missing = set(columns or []) - {c["name"] for _, c in wanted}
+    if missing:
+        raise KeyError(f"{path}: no column(s) {sorted(missing)}")
+    data = {c["name"]: _load_column(path, i, c, meta["rows"]) for i, c in wanted}
+    return pd.DataFrame(data, index=pd.RangeIndex(meta["rows"]), copy=False)
+
+
+def is_current(path, csv_path):
+    """True when the snapshot at `path` was written together with csv_path as it is now."""
+    try:
+        return read_meta(path)["source"] == _file_stamp(csv_path)
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def read_typed(csv_path, stage, columns=None, chunksize=None):
+    """
+    read_csv_typed(csv_path, stage, usecols=columns, chunksize=chunksize),
+    served from the CSV's snapshot when there is a current one. With
+    `chunksize`, returns an iterator of frames (slices of the mapped columns,
+    keeping the row positions as index).
+    """
+    snap = snapshot_path(csv_path)
+    if not is_current(snap, csv_path):
+        if os.path.exists(snap):
+            logging.info(f"{snap} is older than {csv_path}; parsing the CSV")
+        return read_csv_typed(csv_path, stage, usecols=columns, chunksize=chunksize)
+    df = load_snapshot(snap, columns)
+    if chunksize:
+        return (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    return df
@@ -0,0 +1,260 @@
+import math
+import numpy as np
+import pandas as pd
+
+# —————————————————————————
+# Mergeable accumulators for one-pass, bounded-memory statistics.
+#
+# Every accumulator has update() for a new chunk and merge() for another
+# accumulator of the same kind, so partial states computed per chunk, per
+# province or per worker process can be combined in any order.
+# —————————————————————————
+
+
+class Moments:
+    """Count / mean / variance / min / max (Welford, batched with Chan's merge)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        other = Moments()
+        other.n = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other: "Moments"):
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def var(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var) if self.n > 1 else math.nan
+
+
+class QuantileSketch:
+    """
+    Merging t-digest: values are kept as weighted centroids, small near the
+    tails and coarse around the median, so memory stays ~`compression`
+    centroids regardless of how many values are added.
+    """
+
+    def __init__(self, compression: int = 200, buffer_size: int = 20000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(np.asarray(values, dtype=np.float64))
+        self._buffered += len(values)
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        other._compress()
+        self._compress()
+        self.means = np.concatenate([self.means, other.means])
+        self.weights = np.concatenate([self.weights, other.weights])
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(force=True)
+        return self
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum()) + self._buffered
+
+    def _compress(self, force: bool = False):
+        if not self._buffered and not force:
+            return
+        means = np.concatenate([self.means] + self._buffer)
+        weights = np.concatenate([self.weights] + [np.ones(len(b)) for b in self._buffer])
+        self._buffer, self._buffered = [], 0
+        if len(means) == 0:
+            return
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        q_left = (np.cumsum(weights) - weights) / total
+        # arcsine scale function: each centroid spans at most one unit of k
+        k = np.floor(self.compression * (np.arcsin(2 * q_left - 1) / np.pi + 0.5))
+        starts = np.flatnonzero(np.r_[True, np.diff(k) != 0])
+        w = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / w
+        self.weights = w
+
+    def quantile(self, q: float) -> float:
+        self._compress()
+        if len(self.means) == 0:
+            return math.nan
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xp = np.r_[0.0, centers, total]
+        fp = np.r_[self.min, self.means, self.max]
+        return float(np.interp(q * total, xp, fp))
+
+
+class TopK:
+    """Frequent-value counts, pruned to `capacity` labels (Misra–Gries style)."""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.error = 0  # upper bound on the count of any pruned label
+
+    def update(self, series: pd.Series):
+        for label, cnt in series.value_counts(dropna=False).items():
+            self._add(label, int(cnt))
+        self._prune()
+
+    def merge(self, other: "TopK"):
+        for label, cnt in other.counts.items():
+            self._add(label, cnt)
+        self.error += other.error
+        self._prune()
+        return self
+
+    def _add(self, label, cnt):
+        key = None if pd.isna(label) else label
+        self.counts[key] = self.counts.get(key, 0) + cnt
+
+    def _prune(self):
+        if len(self.counts) <= self.capacity:
+            return
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        self.error = max(self.error, ranked[self.capacity][1])
+        self.counts = dict(ranked[:self.capacity])
+
+    def top(self, k: int = 10) -> pd.Series:
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        index = [np.nan if label is None else label for label, _ in ranked]
+        return pd.Series([c for _, c in ranked], index=index, name="count", dtype="int64")
+
+
+# —————————————————————————
+# DATASET-LEVEL STATE
+# —————————————————————————
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class DatasetStats:
+    """Missingness, numeric moments + quantiles and top-k labels for a table."""
+
+    def __init__(self, numeric_cols=None, cat_cols=(), compression: int = 200):
+        self.numeric_cols = list(numeric_cols) if numeric_cols is not None else None
+        self.cat_cols = list(cat_cols)
+        self.compression = compression
+        self.rows = 0
+        self.missing = pd.Series(dtype="int64")
+        self.moments = {}
+        self.sketches = {}
+        self.topk = {col: TopK() for col in self.cat_cols}
+
+    def _numeric(self, df: pd.DataFrame):
+        if self.numeric_cols is None:
+            self.numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
+        for col in self.numeric_cols:
+            if col not in self.moments:
+                self.moments[col] = Moments()
+                self.sketches[col] = QuantileSketch(self.compression)
+        return self.numeric_cols
+
+    def update(self, df: pd.DataFrame):
+        self.rows += len(df)
+        self.missing = self.missing.add(df.isna().sum(), fill_value=0).astype("int64")
+        for col in self._numeric(df):
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            self.moments[col].update(values)
+            self.sketches[col].update(values)
+        for col in self.cat_cols:
+            if col in df.columns:
+                self.topk[col].update(df[col])
+        return self
+
+    def merge(self, other: "DatasetStats"):
+        self.rows += other.rows
+        self.missing = self.missing.add(other.missing, fill_value=0).astype("int64")
+        if self.numeric_cols is None:
+            self.numeric_cols = other.numeric_cols
+        for col, m in other.moments.items():
+            self.moments.setdefault(col, Moments()).merge(m)
+            self.sketches.setdefault(col, QuantileSketch(self.compression)).merge(other.sketches[col])
+        for col, t in other.topk.items():
+            self.topk.setdefault(col, TopK()).merge(t)
+        return self
+
+    # ---- summaries (same shape as the pandas equivalents) ----
+    def missing_frame(self) -> pd.DataFrame:
+        missing = self.missing.to_frame(name="missing_count")
+        missing["missing_pct"] = (missing["missing_count"] / max(self.rows, 1) * 100).round(2)
+        return missing
+
+    def describe_frame(self) -> pd.DataFrame:
+        rows = {}
+        for col in self.numeric_cols or []:
+            m, s = self.moments[col], self.sketches[col]
+            row = {"count": m.n, "mean": m.mean if m.n else math.nan, "std": m.std,
+                   "min": m.min if m.n else math.nan}
+            for q in QUANTILES:
+                row[f"{int(q * 100)}%"] = s.quantile(q)
+            row["max"] = m.max if m.n else math.nan
+            rows[col] = row
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def collect(chunks, by=None, **kwargs):
+    """
+    Run DatasetStats over an iterable of DataFrame chunks in one pass.
+
+    With `by`, also keeps one partial state per group value and returns
+    (total, {group: stats}); the total is the merge of the partials.
+    """
+    if by is None:
+        total = DatasetStats(**kwargs)
+        for chunk in chunks:
+            total.update(chunk)
+        return total
+
+    groups = {}
+    for chunk in chunks:
+        for key, part in chunk.groupby(by, observed=True, dropna=False, sort=False):
+            if key not in groups:
+                groups[key] = DatasetStats(**kwargs)
+            groups[key].update(part)
+    total = DatasetStats(**kwargs)
+    for part in groups.values():
+        total.merge(part)
+    return total, groups
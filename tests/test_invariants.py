@@ -0,0 +1,121 @@
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from crawler import idset
+from crawler.coordinator import LeaseLost, WorkQueue, unit_key
+from crawler.idset import BloomFilter, IdSet, paths_for
+from scripts.downloadImages import near_pairs
+
+# —————————————————————————
+# Invariants of the crawl queue, the seen-ID sets and image matching.
+#
+#   python -m pytest tests
+# —————————————————————————
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = WorkQueue(str(tmp_path / "queue.db"), max_attempts=3)
+    q.seed([("ha-noi", "nha-mat-pho-mat-tien")])
+    yield q
+    q.conn.close()
+
+
+def _unit_status(queue, unit_id):
+    return queue.conn.execute("SELECT status FROM work_units WHERE unit_id = ?", (unit_id,)).fetchone()[0]
+
+
+# ---- coordinator ----
+def test_expired_lease_goes_to_the_next_worker(queue):
+    first = queue.lease("w1", lease_seconds=-1)  # expired as soon as it is taken
+    assert first.attempts == 1
+    second = queue.lease("w2", lease_seconds=600)
+    assert second.unit_id == first.unit_id and second.attempts == 2
+    assert queue.lease("w3") is None  # w2 holds a live lease
+
+
+def test_unit_fails_after_max_attempts_of_expired_leases(queue):
+    for _ in range(queue.max_attempts):
+        assert queue.lease("w", lease_seconds=-1) is not None
+    assert queue.lease("w") is None
+    assert queue.status() == {"failed": {"units": 1, "rows": 0}}
+    assert queue.reset_failed() == 1
+    assert queue.lease("w").attempts == 1
+
+
+def test_renew_after_takeover_loses_the_lease(queue):
+    unit = queue.lease("w1", lease_seconds=-1)
+    queue.lease("w2")
+
+    def heartbeat():  # as the scraper's queue worker renews after every page
+        if not queue.renew(unit.unit_id, "w1"):
+            raise LeaseLost(unit.unit_id)
+
+    with pytest.raises(LeaseLost):
+        heartbeat()
+    assert queue.renew(unit.unit_id, "w2")
+
+
+def test_split_replaces_the_parent_with_ranges(queue):
+    unit = queue.lease("w1")
+    ranges = [(unit.province, unit.prop_type, 1, 5), (unit.province, unit.prop_type, 6, None)]
+    queue.split(unit.unit_id, "w1", ranges)
+    assert _unit_status(queue, unit.unit_id) == "split"
+    first, second = queue.lease("w2"), queue.lease("w3")
+    assert {first.unit_id, second.unit_id} == {unit_key(*r) for r in ranges}
+    assert queue.lease("w4") is None
+    # only the range that finishes the combo reports it (its worker compacts the seen IDs)
+    assert queue.complete(first.unit_id, "w2", 10) is False
+    assert queue.complete(second.unit_id, "w3", 10) is True
+
+
+# ---- seen-ID sets ----
+def test_idset_compact_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(idset, "BLOOM_MIN_IDS", 100)  # exercise the Bloom filter path too
+    log_path = str(tmp_path / "ha-noi_nha_ids.log")
+    first = [str(i) for i in range(1000, 3000, 7)] + ["N/A", "abc"]
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.writelines(f"{x}\n" for x in first)
+
+    ids = IdSet.load(log_path)
+    assert ids.compact(log_path) == len(first) - 2
+    snap, bloom = paths_for(log_path)
+    assert os.path.exists(snap) and os.path.exists(bloom)
+    with open(log_path, encoding="utf-8") as f:
+        assert sorted(f.read().split()) == ["N/A", "abc"]  # only non-numeric IDs stay in the journal
+
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write("5\n1007\n")  # appended after compaction, one already in the snapshot
+    reloaded = IdSet.load(log_path)
+    for x in first + ["5"]:
+        assert x in reloaded
+    assert "1008" not in reloaded and "²" not in reloaded
+    assert reloaded.to_array().tolist() == sorted({int(x) for x in first[:-2]} | {5})
+
+
+def test_bloom_filter_has_no_false_negatives():
+    rng = np.random.default_rng(0)
+    ids = np.unique(rng.integers(1, 10**12, size=20_000, dtype=np.int64))
+    bloom = BloomFilter.build(ids)
+    assert all(int(x) in bloom for x in ids)
+
+
+# ---- image matching ----
+def test_near_pairs_matches_brute_force():
+    rng = np.random.default_rng(1)
+    base = rng.integers(0, 2**63, size=150, dtype=np.int64).astype(np.uint64)
+    # near copies of some hashes: 0 to 5 bits flipped, so some pairs are just out of reach
+    copies = []
+    for h in base[:100]:
+        bits = rng.choice(64, size=rng.integers(0, 6), replace=False)
+        copies.append(h ^ np.uint64(sum(1 << int(b) for b in bits)))
+    hashes = np.concatenate([base, np.array(copies, dtype=np.uint64)])
+
+    i, j = near_pairs(hashes, max_distance=3)
+    expected = {(a, b) for a, b in itertools.combinations(range(len(hashes)), 2)
+                if bin(int(hashes[a] ^ hashes[b])).count("1") <= 3}
+    assert set(zip(i.tolist(), j.tolist())) == expected
+    assert expected  # the planted copies produced pairs to find